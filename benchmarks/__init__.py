@@ -0,0 +1,6 @@
+"""
+Benchmark suite for devCLI.
+
+Generates synthetic BASE_PATH trees and aliases files, then measures how the
+CLI commands scale. Run it with `dev bench` (see `benchmarks.suite`).
+"""
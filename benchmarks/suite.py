@@ -0,0 +1,169 @@
+import os, sys, json, time, shutil, platform, statistics, subprocess, tempfile, logging
+
+from benchmarks.synthetic import make_workspace, remove_workspace
+
+logger = logging.getLogger(__name__)
+
+WORKER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "worker.py")
+DEFAULT_SIZES = [10, 100, 1000]
+# Syscall counts are two separate metrics: read/write calls from /proc/self/io (always) and every
+# syscall counted by `strace -c` (--strace only). Each is only compared with the same key of the baseline.
+COMPARED_METRICS = ["cold_ms", "warm_ms_median", "io_syscalls_cold", "syscalls_total"]
+
+
+def scenarios_for(workspace: dict) -> list:
+    """
+    Scenarios measured for every synthetic workspace.
+    """
+    project = workspace["projects"][-1] if workspace["projects"] else "missing"
+    alias = workspace["aliases"][-1] if workspace["aliases"] else project
+    return [
+        {"name": "list", "kind": "command", "args": ["list"]},
+        {"name": "alias", "kind": "command", "args": ["alias"]},
+        {"name": "run", "kind": "command", "args": ["run", project]},
+        {"name": "resolve_folder", "kind": "function", "target": "resolve_folder", "args": [alias]},
+        {"name": "load_config", "kind": "function", "target": "load_config", "args": ["alias"]},
+    ]
+
+
+def _strace_total_calls(output_file: str):
+    """
+    Parse the 'total' row of an `strace -c` summary.
+    """
+    try:
+        with open(output_file, "r") as f:
+            for line in f:
+                parts = line.split()
+                if parts and parts[-1] == "total":
+                    return int(parts[2])
+    except (OSError, ValueError, IndexError) as e:
+        logger.debug(f"Could not parse strace summary {output_file}: {e}")
+    return None
+
+
+def run_scenario(scenario: dict, env: dict, repeat: int, use_strace: bool = False) -> dict:
+    """
+    Run one scenario in a fresh worker process and return its measurements.
+    """
+    spec = dict(scenario, repeat=repeat)
+    cmd = [sys.executable, WORKER_PATH, json.dumps(spec)]
+    strace_out = None
+    if use_strace:
+        fd, strace_out = tempfile.mkstemp(prefix="devcli-strace-")
+        os.close(fd)
+        cmd = ["strace", "-f", "-c", "-o", strace_out] + cmd
+
+    process = subprocess.run(cmd, env=dict(os.environ, **env), capture_output=True, text=True)
+    if process.returncode != 0:
+        logger.error(f"Benchmark worker for '{scenario['name']}' failed:\n{process.stderr}")
+        return {"name": scenario["name"], "error": process.stderr.strip().splitlines()[-1:]}
+
+    measured = json.loads(process.stdout.strip().splitlines()[-1])
+    warm = measured.pop("warm_ms")
+    measured["warm_ms_median"] = statistics.median(warm) if warm else None
+    measured["warm_ms_min"] = min(warm) if warm else None
+    measured["name"] = scenario["name"]
+    if strace_out:
+        measured["syscalls_total"] = _strace_total_calls(strace_out)
+        try:
+            os.remove(strace_out)
+        except OSError:
+            pass
+    return measured
+
+
+def run_suite(sizes=None, aliases=None, repeat: int = 5, use_strace: bool = False, keep: bool = False, echo=None) -> dict:
+    """
+    Generate a workspace per size and run every scenario against it.
+
+    :param sizes: Number of projects per synthetic BASE_PATH.
+    :param aliases: Number of aliases per workspace (defaults to the project count).
+    :param echo: Optional callable used to report progress.
+    """
+    sizes = sizes or DEFAULT_SIZES
+    if use_strace and not shutil.which("strace"):
+        logger.warning("strace not found on PATH. Only read/write syscalls (/proc/self/io) are counted.")
+        use_strace = False
+
+    results = []
+    for size in sizes:
+        n_aliases = size if aliases is None else aliases
+        root = tempfile.mkdtemp(prefix=f"devcli-bench-{size}-")
+        try:
+            started = time.perf_counter()
+            workspace = make_workspace(root, size, n_aliases)
+            logger.debug(f"Workspace with {size} projects generated in {time.perf_counter() - started:.2f}s")
+            for scenario in scenarios_for(workspace):
+                if echo:
+                    echo(f"  {scenario['name']:<16} {size:>6} projects / {n_aliases:>6} aliases")
+                measured = run_scenario(scenario, workspace["env"], repeat, use_strace)
+                measured.update({"projects": size, "aliases": n_aliases})
+                results.append(measured)
+        finally:
+            if keep:
+                logger.info(f"Keeping benchmark workspace at {root}")
+            else:
+                remove_workspace(root)
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def result_key(result: dict) -> str:
+    return f"{result['name']}@{result['projects']}p/{result['aliases']}a"
+
+
+def compare(current: dict, baseline: dict, threshold: float = 0.2) -> list:
+    """
+    Compare two result sets. Returns a list of regressions, where a regression
+    is a metric that grew by more than `threshold` (0.2 == 20%).
+    """
+    baseline_by_key = {result_key(r): r for r in baseline.get("results", []) if "error" not in r}
+    regressions = []
+    for result in current.get("results", []):
+        if "error" in result:
+            continue
+        previous = baseline_by_key.get(result_key(result))
+        if not previous:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append({
+                    "key": result_key(result),
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change": change,
+                })
+    return regressions
+
+
+def format_results(results: dict) -> list:
+    """
+    Human readable table rows for a result set. "rw calls" are the read/write
+    syscalls of the cold call, "syscalls" every syscall of the worker under
+    strace (only with --strace).
+    """
+    lines = [f"{'scenario':<16}{'projects':>9}{'aliases':>9}{'cold ms':>10}{'warm ms':>10}{'rw calls':>10}{'syscalls':>10}"]
+    for r in results.get("results", []):
+        if "error" in r:
+            lines.append(f"{r['name']:<16}{r['projects']:>9}{r['aliases']:>9}  error: {r['error']}")
+            continue
+        rw_calls, syscalls = r.get("io_syscalls_cold"), r.get("syscalls_total")
+        lines.append(
+            f"{r['name']:<16}{r['projects']:>9}{r['aliases']:>9}"
+            f"{r['cold_ms']:>10.1f}{r['warm_ms_median']:>10.2f}"
+            f"{rw_calls if rw_calls is not None else '-':>10}{syscalls if syscalls is not None else '-':>10}"
+        )
+    return lines
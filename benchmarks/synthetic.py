@@ -0,0 +1,96 @@
+import os, sys, json, random, shutil, logging
+
+CLI_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CLI_ROOT_DIR, "src"))
+
+# discovery has no import-time side effects, unlike utils, which loads the env.
+from discovery import TAG_MARKERS
+
+logger = logging.getLogger(__name__)
+
+# Marker files recognised by utils.PROJECT_DETECTORS, grouped by tag. Directory
+# markers (.venv) are left out, the generated projects only contain files.
+PROJECT_MARKERS = {tag: [m for m in markers if m != ".venv"] for tag, markers in TAG_MARKERS.items()}
+
+
+def make_project_tree(base_path: str, n_projects: int, seed: int = 0) -> list:
+    """
+    Create `n_projects` project folders under `base_path` with a random mix of
+    project markers. Every project gets a devCLI-project.json whose startup
+    command is a no-op, so `run` can be measured without launching anything.
+    Returns the list of created folder names.
+    """
+    rng = random.Random(seed)
+    tags = list(PROJECT_MARKERS)
+    os.makedirs(base_path, exist_ok=True)
+    names = []
+    for i in range(n_projects):
+        name = f"project-{i:05d}"
+        project_dir = os.path.join(base_path, name)
+        os.makedirs(project_dir, exist_ok=True)
+        for tag in rng.sample(tags, rng.randint(0, 2)):
+            marker = rng.choice(PROJECT_MARKERS[tag])
+            open(os.path.join(project_dir, marker), "w").close()
+        if rng.random() < 0.5:
+            with open(os.path.join(project_dir, "package.json"), "w") as f:
+                json.dump({"name": name, "scripts": {"dev": "true"}}, f)
+        with open(os.path.join(project_dir, "devCLI-project.json"), "w") as f:
+            json.dump({"name": name, "startup": "true"}, f)
+        names.append(name)
+    # A few plain files next to the projects, like a real workspace has.
+    for i in range(max(1, n_projects // 20)):
+        open(os.path.join(base_path, f"notes-{i}.txt"), "w").close()
+    logger.debug(f"Generated {n_projects} synthetic projects in {base_path}")
+    return names
+
+
+def make_aliases_file(path: str, project_names: list, n_aliases: int, seed: int = 0) -> dict:
+    """
+    Write an aliases file with `n_aliases` entries pointing at random projects.
+    """
+    rng = random.Random(seed)
+    aliases = {}
+    for i in range(n_aliases):
+        aliases[f"alias-{i:05d}"] = rng.choice(project_names) if project_names else f"missing-{i}"
+    with open(path, "w") as f:
+        json.dump(aliases, f, indent=4)
+    return aliases
+
+
+def make_config_file(path: str, current_project: str = None) -> dict:
+    """
+    Write a config.json based on the one shipped with devCLI.
+    """
+    with open(os.path.join(CLI_ROOT_DIR, "config.json"), "r") as f:
+        config = json.load(f)
+    config["currentProject"] = current_project
+    with open(path, "w") as f:
+        json.dump(config, f, indent=4)
+    return config
+
+
+def make_workspace(root: str, n_projects: int, n_aliases: int, seed: int = 0) -> dict:
+    """
+    Build a complete synthetic devCLI environment under `root` and return the
+    environment variables pointing the CLI at it.
+    """
+    base_path = os.path.join(root, "projects")
+    home = os.path.join(root, "home")
+    os.makedirs(home, exist_ok=True)
+    names = make_project_tree(base_path, n_projects, seed)
+    aliases = make_aliases_file(os.path.join(root, "aliases.json"), names, n_aliases, seed)
+    make_config_file(os.path.join(root, "config.json"), names[0] if names else None)
+    return {
+        "env": {
+            "BASE_PATH": base_path,
+            "CONFIG_PATH": os.path.join(root, "config.json"),
+            "ALIAS_PATH": os.path.join(root, "aliases.json"),
+            "HOME": home,
+        },
+        "projects": names,
+        "aliases": list(aliases),
+    }
+
+
+def remove_workspace(root: str) -> None:
+    shutil.rmtree(root, ignore_errors=True)
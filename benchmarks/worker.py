@@ -0,0 +1,100 @@
+"""
+Benchmark worker. Runs in a fresh interpreter so the first measurement is a
+true cold start (module imports, dotenv, config loading) and the following
+ones are warm. Prints a single JSON object on stdout.
+
+Usage: python worker.py '<scenario json>'
+"""
+import os, sys, json, time
+
+CLI_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CLI_ROOT_DIR, "src"))
+
+
+def read_io_syscalls() -> int:
+    """
+    Number of read/write syscalls issued by this process so far, or -1 when
+    /proc/self/io is not available (non-Linux).
+    """
+    try:
+        with open("/proc/self/io", "r") as f:
+            counters = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(counters["syscr"]) + int(counters["syscw"])
+    except (OSError, KeyError, ValueError):
+        return -1
+
+
+def build_call(scenario):
+    """
+    Return (import_fn, call_fn) for the scenario. import_fn performs the module
+    imports that count towards cold latency, call_fn does one measured call.
+    """
+    kind = scenario["kind"]
+    target = scenario.get("target")
+
+    if kind == "command":
+        state = {}
+
+        def do_import():
+            from click.testing import CliRunner
+            from main import cli
+            state["runner"], state["cli"] = CliRunner(), cli
+
+        def do_call():
+            result = state["runner"].invoke(state["cli"], scenario["args"])
+            return result.exit_code
+        return do_import, do_call
+
+    if kind == "function":
+        state = {}
+
+        def do_import():
+            if target == "resolve_folder":
+                from utils import resolve_folder
+                state["fn"] = resolve_folder
+            elif target == "load_config":
+                from config import load_config
+                state["fn"] = load_config
+            else:
+                raise ValueError(f"Unknown benchmark function '{target}'")
+
+        def do_call():
+            state["fn"](*scenario.get("args", []))
+            return 0
+        return do_import, do_call
+
+    raise ValueError(f"Unknown scenario kind '{kind}'")
+
+
+def main(argv):
+    scenario = json.loads(argv[1])
+    repeat = int(scenario.get("repeat", 5))
+    do_import, do_call = build_call(scenario)
+
+    io_start = read_io_syscalls()
+    t0 = time.perf_counter()
+    do_import()
+    t1 = time.perf_counter()
+    exit_code = do_call()
+    t2 = time.perf_counter()
+    io_cold = read_io_syscalls()
+
+    warm = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        do_call()
+        warm.append((time.perf_counter() - start) * 1000)
+    io_warm = read_io_syscalls()
+
+    print(json.dumps({
+        "import_ms": (t1 - t0) * 1000,
+        "cold_ms": (t2 - t0) * 1000,
+        "warm_ms": warm,
+        "exit_code": exit_code,
+        "io_syscalls_cold": io_cold - io_start if io_start >= 0 else None,
+        "io_syscalls_warm": (io_warm - io_cold) / repeat if io_start >= 0 and repeat else None,
+    }))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
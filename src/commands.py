@@ -1,24 +1,44 @@
 import click, os, logging
-from dotenv import load_dotenv
-from InquirerPy import inquirer
+from envfiles import load_cli_env
+import prompts
 
 logger = logging.getLogger(__name__)
 from utils import resolve_folder # Keep other utils imports if used by other commands
 # Remove unused utils like run_install_package, updateRepo, open_in_vscode, run_npm_dev, is_bun, etc. if only run_dev is changing
 # For now, assume they might be used by other commands or future states.
-from utils import run_install_package, updateRepo, open_in_vscode, run_npm_dev, is_bun, PROJECT_DETECTORS, TAG_COLORS, run_bun_dev, select_dir_with_package_json, validate_package_json, change_directory, run_docker_compose_up
+from utils import iter_projects, run_install_package, sync_python_env, is_python, updateRepo, open_in_vscode, run_npm_dev, is_bun, TAG_COLORS, run_bun_dev, select_dir_with_package_json, validate_package_json, change_directory, run_docker_compose_up, list_projects
+from executor import execute, spawn, CommandError
 
-from config import handle_add_alias, handle_remove_alias, handle_list_aliases, load_config, save_config
+from config import handle_add_alias, handle_remove_alias, handle_list_aliases, handle_import_aliases, handle_export_aliases, handle_prune_aliases, alias_index, load_config, save_config, add_aliases, get_roots, BASE_PATH
 # from create import get_project_details, generate_project_json, create_project_files # Keep if init uses them
 from create import get_project_details, generate_project_json, create_project_files, handle_in_place_init
+from create import InitError, load_init_spec, build_project_details, scaffold_projects
 
 import json # Added for run_dev
-import subprocess # Added for run_dev
+import sys, time, shlex
+from create import CLI_ROOT_DIR
+from tracing import span
+import procstats
+from workspaces import affected_since, detect_package_manager
+import threading
+import tasks as task_runner
+from state import recent_runs
+import render
+import gitstatus
+import gitsync
+import diskusage
+import dockerignore
+import doctor as health
+import plugins
+import remote
+import warmstart
+import watch as watch_mode
+from envfiles import project_env, resolve_env
+from ports import is_port_free, load_leases, release_port, prune_leases
+from runstate import load_processes, is_alive, collect_garbage, find_processes, launch_detached, stop_process, log_path_for, tail_lines, process_start_ticks
 
-load_dotenv()
+load_cli_env()
 
-# Ensure config and aliases are loaded after BASE_PATH is potentially set by dotenv
-BASE_PATH = os.getenv("BASE_PATH")
 # Note: config and aliases are loaded globally. This is fine for now,
 # but for the 'configcmd set' to reflect changes immediately if 'config' variable is used by other commands
 # during the same run, 'config' might need to be reloaded or updated.
@@ -29,20 +49,27 @@ aliases = load_config("alias")
 
 @click.command("run", help="Run the startup command defined in devCLI-project.json for the specified folder.")
 @click.argument('folder_name')
-def run_dev(folder_name):
-    logger.debug(f"run_dev called with folder_name: {folder_name}")
+@click.option('--detach', '-d', is_flag=True, help="Run the startup command in the background. Manage it with 'dev ps/stop/restart'.")
+@click.option('--affected', is_flag=True, help="In a workspace, run only the packages affected by changes since --since.")
+@click.option('--since', default="origin/main", show_default=True, help="Git ref used by --affected.")
+def run_dev(folder_name, detach, affected, since):
+    logger.debug(f"run_dev called with folder_name: {folder_name}, detach: {detach}, affected: {affected}")
     target_dir = resolve_folder(folder_name)
     if not target_dir:
         logger.error(f"Could not resolve folder '{folder_name}'. It might not exist or an alias is incorrect.")
         # click.echo(f"Error: Folder '{folder_name}' not found.") # Redundant with resolve_folder's logging
         return
 
+    if affected:
+        run_affected_packages(target_dir, since, detach)
+        return
+
     project_json_path = os.path.join(target_dir, "devCLI-project.json")
     logger.debug(f"Looking for project config at: {project_json_path}")
 
     if os.path.exists(project_json_path):
         try:
-            with open(project_json_path, "r") as f:
+            with span("read devCLI-project.json"), open(project_json_path, "r") as f:
                 project_config = json.load(f)
             
             startup_command = project_config.get("startup")
@@ -53,27 +80,7 @@ def run_dev(folder_name):
             
             logger.info(f"Executing startup command for '{folder_name}' in '{target_dir}': {startup_command}")
             click.echo(f"Attempting to start project '{folder_name}' using command: {startup_command}")
-            
-            original_cwd = os.getcwd()
-            try:
-                os.chdir(target_dir)
-                logger.debug(f"Changed CWD to: {target_dir}")
-                # Using shell=True for flexibility with commands like '&&' or environment sourcing.
-                # Ensure startup_command is trusted.
-                subprocess.run(startup_command, shell=True, check=True)
-            except FileNotFoundError:
-                cmd_name = startup_command.split()[0]
-                logger.error(f"Error: The command '{cmd_name}' was not found. Ensure it is installed and in your PATH.")
-                click.echo(f"Error: Command not found: {cmd_name}")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Project startup command '{startup_command}' failed with exit code {e.returncode}.")
-                click.echo(f"Error: Project startup failed (exit code {e.returncode}).")
-            except Exception as e:
-                logger.error(f"An unexpected error occurred during startup: {str(e)}")
-                click.echo(f"An unexpected error occurred: {str(e)}")
-            finally:
-                os.chdir(original_cwd)
-                logger.debug(f"Restored CWD to: {original_cwd}")
+            run_startup(folder_name, target_dir, startup_command, project_config.get("port"), detach)
 
         except json.JSONDecodeError:
             logger.error(f"Error decoding {project_json_path}. It might be corrupted.")
@@ -85,10 +92,10 @@ def run_dev(folder_name):
             return
     else:
         logger.info(f"devCLI-project.json not found in {target_dir} for folder '{folder_name}'.")
-        if inquirer.confirm(
+        if prompts.confirm(
             message=f"devCLI-project.json not found in '{folder_name}'. Would you like to initialize it now?",
-            default=True
-        ).execute():
+            default=True, key="run.init"
+        ):
             logger.info(f"User opted to initialize '{folder_name}' in place.")
             success = handle_in_place_init(target_dir, os.path.basename(target_dir))
             if success:
@@ -105,24 +112,7 @@ def run_dev(folder_name):
                             return 
                         
                         logger.info(f"Executing startup command for {os.path.basename(target_dir)} after in-place init: {startup_command_reloaded}")
-                        # CWD management for this new execution block
-                        original_cwd_after_init = os.getcwd()
-                        try:
-                            os.chdir(target_dir)
-                            subprocess.run(startup_command_reloaded, shell=True, check=True)
-                        except FileNotFoundError:
-                            cmd_name_reloaded = startup_command_reloaded.split()[0]
-                            logger.error(f"Error: Post-init command '{cmd_name_reloaded}' was not found.")
-                            click.echo(f"Error: Post-init command not found: {cmd_name_reloaded}")
-                        except subprocess.CalledProcessError as e_reloaded:
-                            logger.error(f"Post-init startup command failed with exit code {e_reloaded.returncode}.")
-                            click.echo(f"Error: Post-init project startup failed (exit code {e_reloaded.returncode}).")
-                        except Exception as e_reloaded_general:
-                            logger.error(f"An unexpected error occurred during post-init startup: {str(e_reloaded_general)}")
-                            click.echo(f"An unexpected error occurred during post-init startup: {str(e_reloaded_general)}")
-                        finally:
-                            os.chdir(original_cwd_after_init)
-                            logger.debug(f"Restored CWD to: {original_cwd_after_init} after post-init attempt.")
+                        run_startup(folder_name, target_dir, startup_command_reloaded, project_config_reloaded.get("port"), detach)
                     except Exception as e_reloaded_file: # Catch errors reading/parsing the newly created json
                         logger.error(f"Failed to run project after in-place init (file read error): {e_reloaded_file}", exc_info=True)
                         click.echo(f"Error running project after initialization (file read error): {e_reloaded_file}")
@@ -133,29 +123,58 @@ def run_dev(folder_name):
                 click.echo(f"Failed to initialize project '{os.path.basename(target_dir)}'.")
         return # Important to return after handling the in-place init attempt
 
-@click.command("alias", help="Add or remove an alias.")
-@click.argument("action", required=False)
+@click.group("alias", invoke_without_command=True, help="Manage aliases. Without a subcommand, list them.")
+@click.pass_context
+def alias(ctx):
+    if ctx.invoked_subcommand is None:
+        handle_list_aliases(aliases) # This function in config.py will also need logger
+
+
+@alias.command("add", help="Add an alias for a folder relative to BASE_PATH.")
 @click.argument("alias_name", required=False)
 @click.argument("alias_for", required=False)
-def alias(action, alias_name, alias_for):
-    if action is None:
-        handle_list_aliases(aliases) # This function in config.py will also need logger
-        return
-    
-    logger.debug(f"alias command called with action: {action}, alias_name: {alias_name}, alias_for: {alias_for}")
-    if action not in ["add", "remove"]:
-        logger.error("Error: Invalid action. Use 'add' or 'remove'.")
-        return
-        
-    if action == "add":
-        handle_add_alias(aliases, alias_name, alias_for) # This function in config.py will also need logger
-        return
-    
-    if action == "remove":
-        handle_remove_alias(aliases, alias_name) # This function in config.py will also need logger
-        return
+def alias_add(alias_name, alias_for):
+    logger.debug(f"alias add called with alias_name: {alias_name}, alias_for: {alias_for}")
+    handle_add_alias(aliases, alias_name, alias_for)
+
+
+@alias.command("remove", help="Remove an alias.")
+@click.argument("alias_name", required=False)
+def alias_remove(alias_name):
+    logger.debug(f"alias remove called with alias_name: {alias_name}")
+    handle_remove_alias(aliases, alias_name)
+
+
+@alias.command("list", help="List aliases, optionally only those whose name or target matches PATTERN.")
+@click.argument("pattern", required=False)
+@click.option("--regex", "-E", is_flag=True, help="Treat PATTERN as a regular expression instead of a glob.")
+def alias_list(pattern, regex):
+    handle_list_aliases(aliases, pattern, regex)
+
+
+@alias.command("import", help="Import aliases from a JSON file in one transaction.")
+@click.argument("import_path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--replace", is_flag=True, help="Remove aliases that are not in the file.")
+@click.option("--allow-missing", is_flag=True, help="Also import aliases whose target folder does not exist.")
+def alias_import(import_path, replace, allow_missing):
+    if not handle_import_aliases(aliases, import_path, replace, allow_missing):
+        sys.exit(1)
 
 
+@alias.command("export", help="Export aliases as JSON to FILE (stdout without one).")
+@click.argument("export_path", required=False, metavar="FILE", type=click.Path(dir_okay=False))
+@click.option("--filter", "pattern", default=None, help="Only export aliases whose name or target matches this glob.")
+@click.option("--regex", "-E", is_flag=True, help="Treat --filter as a regular expression.")
+def alias_export(export_path, pattern, regex):
+    handle_export_aliases(aliases, export_path, pattern, regex)
+
+
+@alias.command("prune", help="Remove aliases whose target folder no longer exists.")
+@click.option("--dry-run", is_flag=True, help="Only list the aliases that would be removed.")
+@click.option("--yes", "-y", is_flag=True, help="Do not ask for confirmation.")
+def alias_prune(dry_run, yes):
+    handle_prune_aliases(aliases, dry_run, yes)
+
 
 @click.command("code", help="Opens the selected folder in VScode. (default: dev)")
 @click.argument('folder_name', required=True, type=str)
@@ -166,36 +185,99 @@ def code(folder_name = "dev"):
         logger.error(f"Folder '{folder_name}' not found or alias is incorrect.")
         return
     
-    change_directory(target_dir)
-    logger.info(f"Changed directory to: {target_dir}")
-    open_in_vscode()
+    open_in_vscode(target_dir)
     
 
-@click.command("docker", help="Run 'docker-compose up' in the selected folder.")
+@click.command("docker", help="Run 'docker-compose up/down' in the selected folder, or 'optimize' its build context with a .dockerignore.")
 @click.argument('folder_name', required=True, type=str) 
-@click.argument('state', required=True, type=click.Choice(["up", "down"], case_sensitive=False))
+@click.argument('state', required=True, type=click.Choice(["up", "down", "optimize"], case_sensitive=False))
 @click.option("--build", "-b", help="Build images before starting containers.", is_flag=True)
 @click.option("--detach", "-d", help="Run containers in the background.", is_flag=True)
-def docker(folder_name, state, build, detach):
+@click.option("--dry-run", is_flag=True, help="optimize: only report the context size with the generated rules.")
+def docker(folder_name, state, build, detach, dry_run):
     logger.debug(f"docker command called with folder_name: {folder_name}, state: {state}, build: {build}, detach: {detach}")
     target_dir = resolve_folder(folder_name)
     if not target_dir:
         logger.error(f"Folder '{folder_name}' not found or alias is incorrect.")
         return
 
-    change_directory(target_dir)
-    logger.info(f"Changed directory to: {target_dir}")
-    run_docker_compose_up(state, build, detach)
+    if state.lower() == "optimize":
+        optimize_docker_context(folder_name, target_dir, dry_run)
+        return
+    host = remote.for_project(target_dir)
+    if host:
+        args = ["docker", "compose", state.lower()] + (["--build"] if build else []) + (["--detach"] if detach else [])
+        click.echo(f"🔗 {shlex.join(args)} on {host.describe()}")
+        result = remote.run(host, shlex.join(args), tty=sys.stdin.isatty())
+        if not result.ok:
+            logger.error(f"Error: {result.describe()} on {host.describe()}")
+        return
+    run_docker_compose_up(state, build, detach, target_dir)
+
+
+def optimize_docker_context(folder_name, target_dir, dry_run=False):
+    """
+    Generate or update the project's .dockerignore and report the build
+    context size before and after.
+    """
+    tags = dockerignore.detect_tags(target_dir)
+    existing, merged = dockerignore.plan(target_dir, tags)
+    before = dockerignore.context_size(target_dir, dockerignore.parse_rules(existing))
+    after = dockerignore.context_size(target_dir, dockerignore.parse_rules(merged))
+    changed = merged != existing
+    if changed and not dry_run:
+        dockerignore.write(target_dir, tags)
+
+    result = {"project": folder_name, "path": target_dir, "tags": tags, "changed": changed and not dry_run,
+              "before_bytes": before[0], "before_files": before[1], "after_bytes": after[0], "after_files": after[1]}
+    if render.is_machine():
+        render.emit([result])
+        return
+    click.echo(f"Build context of '{folder_name}' ({', '.join(tags) or 'no project type detected'}):")
+    click.echo(f"  before: {procstats.format_bytes(before[0]):>10} in {before[1]} files")
+    click.echo(f"  after:  {procstats.format_bytes(after[0]):>10} in {after[1]} files")
+    if not changed:
+        click.echo(f"✅ {dockerignore.FILE_NAME} is already up to date.")
+    elif dry_run:
+        click.echo(f"Dry run: {dockerignore.FILE_NAME} not written.")
+    else:
+        click.echo(f"🐳 Wrote {os.path.join(target_dir, dockerignore.FILE_NAME)}")
 
 
-@click.command("init", help="Create a new project folder with a devCLI-project.json file. (not implemented yet)")
-def init():
+@click.command("init", help="Create a new project folder with a devCLI-project.json file.")
+@click.option("--from", "spec_path", type=click.Path(exists=True, dir_okay=False), default=None, help="JSON or YAML spec with one or more projects to create without prompts.")
+@click.option("--name", default=None, help="Project folder name (skips the prompt).")
+@click.option("--description", default=None, help="Project description (skips the prompt).")
+@click.option("--author", default=None, help="Author name (skips the prompt).")
+@click.option("--type", "project_type", default=None, help="Project type key from 'initialized_commands' in config.json (skips the prompt).")
+@click.option("--docker/--no-docker", "use_docker", default=None, help="Use Docker for the project environment (skips the prompt).")
+@click.option("--alias", "alias_name", default=None, help="Alias to add for the project (skips the prompt).")
+@click.option("--no-alias", is_flag=True, help="Do not add an alias.")
+@click.option("--jobs", "-j", type=int, default=4, show_default=True, help="Projects scaffolded in parallel with --from.")
+@click.option("--report", "report_path", default=None, help="Write a JSON report to this file ('-' for stdout). Non-interactive mode only.")
+def init(spec_path, name, description, author, project_type, use_docker, alias_name, no_alias, jobs, report_path):
     """
     Initialize a new project with a devCLI-project.json file and prompt the user for details.
+    With --from, or with --name and --type, no prompts are shown.
     """
+    if spec_path or (name and project_type):
+        if spec_path:
+            try:
+                specs = load_init_spec(spec_path)
+            except InitError as e:
+                logger.error(str(e))
+                click.echo(f"❌ Error: {e}")
+                sys.exit(1)
+        else:
+            specs = [{"name": name, "type": project_type, "docker": use_docker}]
+            specs[0].update({k: v for k, v in {"description": description, "author": author, "alias": alias_name}.items() if v is not None})
+        init_batch(specs, jobs, report_path, no_alias)
+        return
+
     logger.info("Starting project initialization...")
     # Gather project details
-    project_details = get_project_details()
+    project_details = get_project_details(name=name, description=description, author=author,
+                                          project_type_key=project_type, use_docker=use_docker)
     if not project_details:
         logger.error("Project details not provided or cancelled. Aborting init.")
         return
@@ -206,7 +288,7 @@ def init():
         click.echo("❌ Error: BASE_PATH is not configured. Please set it in your .env file.")
         return
         
-    project_path = os.path.join(BASE_PATH, project_details["name"])
+    project_path = project_details["path"]
     logger.debug(f"Project will be created at: {project_path}")
 
     try:
@@ -217,32 +299,22 @@ def init():
         click.echo(f"❌ Error creating project directory: {e}")
         return
 
-    # Generate devCLI-project.json
-    # generate_project_json expects project_details, and it creates the file *inside* project_details["name"]
-    # so we must be in BASE_PATH or provide full path.
-    # The current generate_project_json in create.py is:
-    # project_json_path = os.path.join(project_details["name"], "devCLI-project.json")
-    # This implies it should be called when CWD is BASE_PATH, or it needs adjustment.
-    # For safety, let's change CWD.
-    original_cwd = os.getcwd()
+    # generate_project_json and create_project_files work on project_details["path"], no chdir needed.
     try:
-        os.chdir(BASE_PATH) # Change to base path to match how generate_project_json constructs path
-        logger.debug(f"Changed CWD to {BASE_PATH} for generate_project_json")
         generate_project_json(project_details)
     except Exception as e:
         logger.error(f"Error during generate_project_json: {e}")
         click.echo(f"❌ Error generating devCLI-project.json: {e}")
-        os.chdir(original_cwd) # Restore CWD
         return
-    finally:
-        os.chdir(original_cwd) # Always restore CWD
-        logger.debug(f"Restored CWD to {original_cwd}")
-
 
     # Add folder to aliases if confirmed
-    if inquirer.confirm(message="Do you want to add this folder to your aliases?", default=True).execute():
+    if no_alias:
+        pass
+    elif alias_name:
+        handle_add_alias(aliases, alias_name, project_details["name"])
+    elif prompts.confirm(message="Do you want to add this folder to your aliases?", default=True, key="init.add_alias"):
         alias_name_default = project_details["name"].split('-NextJS-')[0].split('-Python-')[0] # Suggest cleaner name
-        alias_name = inquirer.text(message="Enter alias name:", default=alias_name_default).execute()
+        alias_name = prompts.text(message="Enter alias name:", default=alias_name_default, key="init.alias")
         
         # Validate alias_name (handle_add_alias does this, but good to catch early)
         if not alias_name:
@@ -255,49 +327,92 @@ def init():
             handle_add_alias(aliases, alias_name, project_details["name"])
             # aliases object is modified in place by handle_add_alias and saved by it.
 
-    # Create project-specific files
-    # create_project_files expects project_details.
-    # It then calls create_node_files(project_details["name"]) or create_python_files(project_details["name"])
-    # These functions then operate within that path.
-    # So, similar to generate_project_json, these need to be called from BASE_PATH or paths adjusted.
+    # Create project-specific files (initCommand runs with the project folder as cwd)
     try:
-        os.chdir(BASE_PATH)
-        logger.debug(f"Changed CWD to {BASE_PATH} for create_project_files")
         create_project_files(project_details) 
     except Exception as e:
         logger.error(f"Error during create_project_files: {e}")
         click.echo(f"❌ Error creating project specific files: {e}")
         return # Don't report success if this fails
-    finally:
-        os.chdir(original_cwd)
-        logger.debug(f"Restored CWD to {original_cwd} after create_project_files")
 
 
     logger.info(f"Project '{project_details['name']}' initialized successfully!")
     click.echo(f"✅ Project '{project_details['name']}' initialized successfully at {project_path}") # User facing
 
 
+def init_batch(specs, jobs, report_path=None, no_alias=False):
+    """
+    Scaffold the projects of an init spec in parallel, add their aliases and
+    print or write a JSON report. Exits with status 1 if any project failed.
+    """
+    project_types_config = load_config().get("initialized_commands", {})
+    details_list, reports = [], []
+    for spec in specs:
+        try:
+            details_list.append(build_project_details(spec, project_types_config))
+        except InitError as e:
+            reports.append({"name": spec.get("name"), "status": "failed", "error": str(e)})
+
+    to_stdout = report_path == "-"
+
+    def progress(report):
+        if not to_stdout:
+            icon = "✅" if report["status"] == "created" else "❌"
+            detail = f" in {report['seconds']:.1f}s" if report["status"] == "created" else f": {report['error']}"
+            click.echo(f"{icon} {report['name']}{detail}")
+
+    for report in reports:
+        progress(report)
+    scaffolded = scaffold_projects(details_list, jobs=jobs, on_result=progress)
+    reports += scaffolded
+
+    alias_reports = {} if no_alias else {
+        details["alias"]: report for details, report in zip(details_list, scaffolded)
+        if details.get("alias") and report["status"] == "created"
+    }
+    alias_errors = add_aliases(aliases, {a: r["name"] for a, r in alias_reports.items()}) if alias_reports else {}
+    for alias_name, report in alias_reports.items():
+        report["alias"] = alias_name
+        if alias_name in alias_errors:
+            report["alias_error"] = alias_errors[alias_name]
+            if not to_stdout:
+                click.echo(f"⚠️ Alias '{alias_name}' for {report['name']} not added: {alias_errors[alias_name]}")
+
+    created = sum(1 for r in reports if r["status"] == "created")
+    summary = {"created": created, "failed": len(reports) - created, "projects": reports}
+    if to_stdout:
+        click.echo(json.dumps(summary, indent=2))
+    else:
+        if report_path:
+            with open(report_path, "w") as f:
+                json.dump(summary, f, indent=2)
+        click.echo(f"Created {created} of {len(reports)} projects." + (f" Report: {report_path}" if report_path else ""))
+    if summary["failed"]:
+        sys.exit(1)
+
+
 @click.command("list", help="List all available folders.")
-def list_folders():
+@click.option("--refresh", is_flag=True, help="Rescan the project roots instead of using the cached index.")
+def list_folders(refresh):
     """
-    List all available folders in the BASE_PATH with detected project type tags.
+    List all projects under the configured roots (BASE_PATH by default) with detected project type tags.
     """
-    logger.debug(f"Listing folders in BASE_PATH: {BASE_PATH}")
-    folders = [
-        d for d in os.listdir(BASE_PATH)
-        if os.path.isdir(os.path.join(BASE_PATH, d))
-    ]
+    logger.debug("Listing projects from the project index.")
+    aliases_by_target = alias_index(aliases)
+    projects = list_projects(refresh=refresh) if not render.is_machine() else iter_projects(refresh=refresh)
+    records = (dict(project, aliases=aliases_by_target.get(os.path.normpath(project["path"]), [])) for project in projects)
+    render.emit(records, _echo_folders)
+
 
-    if not folders:
+def _echo_folders(projects):
+    if not projects:
         logger.info("No folders found in BASE_PATH.")
         click.echo("No folders found.") # User facing
         return
 
     click.echo("Available folders:") # User facing
-    for folder in folders:
-        full_path = os.path.join(BASE_PATH, folder)
-        logger.debug(f"Checking folder: {full_path}")
-        tags = [tag for tag, detector in PROJECT_DETECTORS.items() if detector(full_path)]
+    for project in projects:
+        tags = project["tags"]
 
         # Colorize tags
         colored_tags = [
@@ -306,57 +421,110 @@ def list_folders():
         ]
 
         # Align output nicely
-        folder_display = f"{folder:<35}"
+        folder_display = f"{project['name']:<35}"
         if tags:
             folder_display += f"[{', '.join(colored_tags)}]"
+        if project["aliases"]:
+            folder_display += click.style(f" ({', '.join(project['aliases'])})", fg="cyan")
 
         click.echo(f"  - {click.style(folder_display)}") # User facing
 
 
 @click.command("update", help="Get the latest version of the projects git repo (default: dev).")
 @click.argument('folder_name', required=False, default="dev")
-@click.option('--force', is_flag=True, help="Force update even if no changes detected.")
+@click.option('--force', is_flag=True, help="Fetch even if the last fetch is recent, and install even if no changes were pulled.")
 @click.option('--no-pull', is_flag=True, help="Skip pulling changes from the repository.")
-def update(folder_name, force = False , no_pull = False):
+@click.option('--affected', is_flag=True, help="In a workspace, only install packages affected by the pulled changes.")
+@click.option('--since', default=None, help="Git ref used by --affected (default: the commit before the pull).")
+def update(folder_name, force = False , no_pull = False, affected = False, since = None):
     """
     Update the devCLI to the latest version from GitHub.
     """
-    logger.debug(f"update command called with folder_name: {folder_name}, force: {force}, no_pull: {no_pull}")
+    logger.debug(f"update command called with folder_name: {folder_name}, force: {force}, no_pull: {no_pull}, affected: {affected}")
     target_dir = resolve_folder(folder_name)
     if not target_dir:
         logger.error("No valid directory selected for update.")
         return
+    host = remote.for_project(target_dir)
+    if host:
+        if affected:
+            click.echo("--affected is not supported for remote projects; installing the whole project instead.")
+        update_remote(folder_name, host, force, no_pull)
+        return
     
-    change_directory(target_dir)
-    logger.info(f"Changed directory to: {target_dir} for update")
-    if updateRepo(force, no_pull):
+    head_before = git_head(target_dir) if affected and not since else None
+    result = {"project": folder_name, "path": target_dir, "updated": False, "install": None, "installed": None}
+    if updateRepo(force, no_pull, target_dir):
+        result["updated"] = True
         logger.info("Update completed successfully!")
-        click.echo("Update completed successfully!") # User facing
+        render.status("Update completed successfully!") # User facing
+        if affected:
+            result["install"] = "affected"
+            # The pre-pull HEAD is an ancestor: diff against it directly. An explicit --since is a branch to fork from.
+            install_affected_packages(target_dir, since or head_before, merge_base=bool(since))
         # Check if the project has a package.json file and ask if to run npm install if it does
-        if validate_package_json(target_dir):
+        elif validate_package_json(target_dir):
             logger.debug(f"package.json found in {target_dir}")
-            if inquirer.confirm(message="Do you want to install packages?", default=True).execute():
+            if prompts.confirm(message="Do you want to install packages?", default=True, key="update.install"):
                 if is_bun(target_dir):
                     logger.info("Detected 'bun.lock'. Running 'bun install'...")
-                    click.echo("Detected 'bun.lock'. Running 'bun install'...") # User facing
-                    run_install_package("bun")
+                    render.status("Detected 'bun.lock'. Running 'bun install'...") # User facing
+                    result["install"] = "bun"
+                    result["installed"] = run_install_package("bun", cwd=target_dir)
                 else:
                     logger.info("Running 'npm install'...")
-                    click.echo("Running 'npm install'...") # User facing
-                    run_install_package("npm")
+                    render.status("Running 'npm install'...") # User facing
+                    result["install"] = "npm"
+                    result["installed"] = run_install_package("npm", cwd=target_dir)
+        elif is_python(target_dir):
+            result["install"] = "python"
+            result["installed"] = sync_python_env(target_dir)
         else:
             logger.info("No package.json found. Skipping package installation.")
-            click.echo("No package.json found. Skipping npm install.") # User facing
-        
+            render.status("No package.json found. Skipping npm install.") # User facing
+
     else:
         logger.warning("No updates available or an error occurred during update.")
-        click.echo("No updates available or an error occurred.") # User facing
+        render.status("No updates available or an error occurred.") # User facing
+    if render.is_machine():
+        render.emit([result])
+
+
+def update_remote(folder_name, host, force=False, no_pull=False):
+    """
+    `update` for a project with a `host`: fast-forward the remote checkout
+    and install there.
+    """
+    result = {"project": folder_name, "path": host.describe(), "updated": False, "install": None, "installed": None}
+    report = None
+    if not no_pull:
+        # Same as a local update: --force always fetches; otherwise a fetch younger than fetchTtl is reused.
+        report = remote.update(host, fetch_ttl=0 if force else load_config().get("fetchTtl", gitsync.DEFAULT_FETCH_TTL))
+        message = f"{folder_name} on {host.describe()}: {gitsync.describe(report)}"
+        if report["status"] == gitsync.FAILED:
+            logger.error(message)
+        else:
+            logger.info(message)
+    if report and (report["status"] == gitsync.UPDATED or (force and report["status"] == gitsync.UP_TO_DATE)):
+        result["updated"] = True
+        render.status("Update completed successfully!") # User facing
+        if prompts.confirm(message="Do you want to install packages?", default=True, key="update.install"):
+            result["install"] = "remote"
+            result["installed"] = remote.install(host)
+    else:
+        render.status("No updates available or an error occurred.") # User facing
+    if render.is_machine():
+        render.emit([result])
 
 
 @click.command("start", help="Start the current default project or set a new default project.")
 @click.option('setproject', "--set", help="Set a project to be the default for 'start'.", default=None, metavar='FOLDER_NAME_OR_ALIAS')
+@click.option('--detach', '-d', is_flag=True, help="Run the startup command in the background.")
+@click.option('--build', 'force_build', is_flag=True, help="Rebuild images even if the Dockerfile, compose file and lockfiles did not change.")
+@click.option('--prewarm', is_flag=True, help="Pull base images and build (or install dependencies) in the background, without starting.")
+@click.option('--wait', is_flag=True, help="With --prewarm: run in the foreground and wait until it is done.")
 # The --code flag is removed as per the plan, simplifying 'start' to focus on the startup command.
-def start(setproject): # Removed 'code' parameter
+def start(setproject, detach, force_build, prewarm, wait): # Removed 'code' parameter
     """
     Starts the current default project using its 'startup' command from devCLI-project.json.
     If --set is used, it updates the default project.
@@ -391,6 +559,13 @@ def start(setproject): # Removed 'code' parameter
         return
 
     logger.debug(f"Current default project to start: '{target_dir_name}'.")
+    # Warm path: the resolved folder and parsed devCLI-project.json of the last start, while neither changed.
+    warm = warmstart.project_record(target_dir_name, aliases.get(target_dir_name))
+    if warm:
+        target_dir, project_config = warm
+        logger.debug(f"Using the warm record of '{target_dir_name}': {target_dir}")
+        launch_default_project(target_dir_name, target_dir, project_config, detach, force_build, prewarm, wait)
+        return
     target_dir = resolve_folder(target_dir_name)
     if not target_dir:
         logger.error(f"Default project '{target_dir_name}' could not be resolved. It might have been moved, deleted, or its alias is broken.")
@@ -402,36 +577,10 @@ def start(setproject): # Removed 'code' parameter
 
     if os.path.exists(project_json_path):
         try:
-            with open(project_json_path, "r") as f:
+            with span("read devCLI-project.json"), open(project_json_path, "r") as f:
                 project_config = json.load(f)
-            startup_command = project_config.get("startup")
-
-            if not startup_command:
-                logger.error(f"'startup' command not found in {project_json_path} for project {target_dir_name}.")
-                click.echo(f"Error: 'startup' command missing in {project_json_path}.")
-                return
-            
-            logger.info(f"Executing startup command for current project {target_dir_name}: {startup_command}")
-            click.echo(f"Attempting to start project '{target_dir_name}' using command: {startup_command}")
-
-            original_cwd = os.getcwd()
-            try:
-                os.chdir(target_dir)
-                logger.debug(f"Changed CWD to: {target_dir}")
-                subprocess.run(startup_command, shell=True, check=True)
-            except FileNotFoundError:
-                cmd_name = startup_command.split()[0]
-                logger.error(f"Error: The command '{cmd_name}' was not found. Ensure it is installed and in your PATH.")
-                click.echo(f"Error: Command not found: {cmd_name}")
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Project startup command failed with exit code {e.returncode}.")
-                click.echo(f"Error: Project startup failed (exit code {e.returncode}).")
-            except Exception as e:
-                logger.error(f"An unexpected error occurred during startup: {str(e)}")
-                click.echo(f"An unexpected error occurred: {str(e)}")
-            finally:
-                os.chdir(original_cwd)
-                logger.debug(f"Restored CWD to: {original_cwd}")
+            warmstart.remember_project(target_dir_name, aliases.get(target_dir_name), target_dir, project_config)
+            launch_default_project(target_dir_name, target_dir, project_config, detach, force_build, prewarm, wait)
 
         except json.JSONDecodeError:
             logger.error(f"Error decoding {project_json_path} for project {target_dir_name}.")
@@ -443,10 +592,10 @@ def start(setproject): # Removed 'code' parameter
             return
     else:
         logger.info(f"devCLI-project.json not found in {target_dir} for project {target_dir_name}.")
-        if inquirer.confirm(
+        if prompts.confirm(
             message=f"devCLI-project.json not found for '{target_dir_name}'. Would you like to initialize it now?",
-            default=True
-        ).execute():
+            default=True, key="run.init"
+        ):
             logger.info(f"User opted to initialize '{target_dir_name}' in place.")
             success = handle_in_place_init(target_dir, os.path.basename(target_dir_name)) # Use target_dir_name for basename
             if success:
@@ -463,23 +612,7 @@ def start(setproject): # Removed 'code' parameter
                             return
                         
                         logger.info(f"Executing startup command for {os.path.basename(target_dir_name)} after in-place init: {startup_command_reloaded}")
-                        original_cwd_after_init = os.getcwd()
-                        try:
-                            os.chdir(target_dir)
-                            subprocess.run(startup_command_reloaded, shell=True, check=True)
-                        except FileNotFoundError:
-                            cmd_name_reloaded = startup_command_reloaded.split()[0]
-                            logger.error(f"Error: Post-init command '{cmd_name_reloaded}' was not found.")
-                            click.echo(f"Error: Post-init command not found: {cmd_name_reloaded}")
-                        except subprocess.CalledProcessError as e_reloaded:
-                            logger.error(f"Post-init startup command failed with exit code {e_reloaded.returncode}.")
-                            click.echo(f"Error: Post-init project startup failed (exit code {e_reloaded.returncode}).")
-                        except Exception as e_reloaded_general:
-                            logger.error(f"An unexpected error occurred during post-init startup: {str(e_reloaded_general)}")
-                            click.echo(f"An unexpected error occurred during post-init startup: {str(e_reloaded_general)}")
-                        finally:
-                            os.chdir(original_cwd_after_init)
-                            logger.debug(f"Restored CWD to: {original_cwd_after_init} after post-init attempt.")
+                        run_startup(target_dir_name, target_dir, startup_command_reloaded, project_config_reloaded.get("port"), detach)
                     except Exception as e_reloaded_file:
                         logger.error(f"Failed to run project after in-place init (file read error): {e_reloaded_file}", exc_info=True)
                         click.echo(f"Error running project after initialization (file read error): {e_reloaded_file}")
@@ -491,6 +624,457 @@ def start(setproject): # Removed 'code' parameter
         return # Important to return after handling the in-place init attempt
 
 
+def launch_default_project(project_name, target_dir, project_config, detach=False, force_build=False, prewarm=False, wait=False):
+    """
+    Start (or with `prewarm`, prepare) the default project. A compose
+    `up --build` only builds when the Dockerfile, compose file or lockfiles
+    changed since the last build.
+    """
+    project_json_path = os.path.join(target_dir, "devCLI-project.json")
+    startup_command = project_config.get("startup")
+    if not startup_command:
+        logger.error(f"'startup' command not found in {project_json_path} for project {project_name}.")
+        click.echo(f"Error: 'startup' command missing in {project_json_path}.")
+        return
+    if prewarm:
+        prewarm_project(project_name, target_dir, project_config, wait)
+        return
+
+    last = warmstart.last_prewarm(project_name)
+    if last and last["status"] == "running":
+        click.echo("⏳ A prewarm of this project is still running.")
+    elif last and last["status"] == "failed":
+        click.echo(f"⚠️  The last prewarm failed: {last.get('error')}")
+
+    if not project_config.get("host"):  # Remote projects build on their host, from files this machine does not see.
+        command, build_hash = warmstart.plan_build(project_name, target_dir, startup_command, force_build)
+        if build_hash:
+            # Built as a step of its own: a foreground `up` only returns when it is stopped, so its
+            # exit code cannot tell a finished build from one interrupted with Ctrl+C.
+            build = warmstart.build_command(startup_command)
+            click.echo(f"🔨 Build inputs changed, running: {build}")
+            result = execute(build, cwd=target_dir, env=project_env(target_dir, project_config.get("port")))
+            if not result.ok:
+                logger.error(f"Build of '{project_name}': {result.describe()}")
+                click.echo(f"Error: Build failed ({result.describe()}), not starting '{project_name}'.")
+                return
+            warmstart.record_build(project_name, build_hash)
+            command = warmstart.without_build(startup_command)
+        elif command != startup_command:
+            click.echo("♻️  Build inputs unchanged since the last build, starting without --build (use --build to force one).")
+        startup_command = command
+
+    logger.info(f"Executing startup command for current project {project_name}: {startup_command}")
+    click.echo(f"Attempting to start project '{project_name}' using command: {startup_command}")
+    run_startup(project_name, target_dir, startup_command, project_config.get("port"), detach)
+
+
+def prewarm_project(project_name, target_dir, project_config, wait=False):
+    """
+    Get the default project ready ahead of `start`: pull base images and build
+    for compose projects, install dependencies for the others. Without
+    `wait`, a background `dev start --prewarm --wait` does the work and the
+    next `start` reports how it went.
+    """
+    if project_config.get("host"):
+        click.echo("--prewarm is not supported for remote projects.")
+        return
+    if not wait:
+        main_script = os.path.abspath(sys.modules["__main__"].__file__)
+        # Marked before spawning so the child's own "ok" or "failed" always comes last.
+        warmstart.record_prewarm(project_name, "running")
+        try:
+            process = spawn([sys.executable, main_script, "start", "--prewarm", "--wait"], cwd=target_dir, new_session=True, quiet=True)
+        except OSError as e:
+            warmstart.record_prewarm(project_name, "failed", error=str(e))
+            click.echo(f"Error: Could not start the prewarm: {e}")
+            return
+        warmstart.attach_prewarm(project_name, process.pid)
+        click.echo(f"🔥 Prewarming '{project_name}' in the background. Details go to ~/.devcli/devcli.log.")
+        return
+
+    started = time.perf_counter()
+    warmstart.record_prewarm(project_name, "running", pid=os.getpid(), proc_start=process_start_ticks(os.getpid()))
+    inputs = warmstart.inputs_hash(project_name, target_dir)
+    commands = warmstart.prewarm_commands(target_dir, project_config["startup"])
+    if commands:
+        build, pull = commands
+        result = execute(build, cwd=target_dir, env=project_env(target_dir, project_config.get("port")))
+        if not result.ok:
+            logger.error(f"Prewarm of '{project_name}': {result.describe()}")
+            warmstart.record_prewarm(project_name, "failed", error=result.describe())
+            return
+        warmstart.record_build(project_name, inputs)
+        # Images of services without a build section; older compose versions lack --ignore-buildable.
+        result = execute(pull, cwd=target_dir)
+        if not result.ok:
+            logger.warning(f"Prewarm of '{project_name}': {result.describe()}")
+    elif warmstart.installed_hash(project_name) != inputs:
+        if validate_package_json(target_dir):
+            installed = run_install_package("bun" if is_bun(target_dir) else "npm", cwd=target_dir)
+        else:
+            installed = sync_python_env(target_dir) if is_python(target_dir) else True
+        if not installed:
+            warmstart.record_prewarm(project_name, "failed", error="dependency install failed")
+            return
+        warmstart.record_install(project_name, inputs)
+    seconds = time.perf_counter() - started
+    warmstart.record_prewarm(project_name, "ok", seconds=seconds)
+    logger.info(f"Prewarmed '{project_name}' in {seconds:.1f}s")
+    click.echo(f"✅ '{project_name}' is prewarmed ({seconds:.1f}s).")
+
+
+def run_startup(project_name, target_dir, startup_command, port=None, detach=False):
+    """
+    Run a project's startup command in its folder: in the background with
+    `detach`, otherwise in the foreground until it exits. The project's env
+    files are layered on top of the environment and its port is exported as
+    PORT. Projects with a `host` run there instead.
+    """
+    host = remote.for_project(target_dir)
+    if host:
+        run_remote_startup(project_name, target_dir, host, startup_command, port, detach)
+        return
+    problem = health.command_problem(startup_command, target_dir, project_env(target_dir, port).get("PATH"))
+    if problem:
+        click.echo(f"Error: Cannot start '{project_name}': {problem}. Run 'dev doctor' to check your setup.")
+        return
+    if not port_available(project_name, port, target_dir):
+        return
+    if detach:
+        start_detached(project_name, target_dir, startup_command, port)
+        return
+    result = execute(startup_command, cwd=target_dir, env=project_env(target_dir, port), project=project_name)
+    if not result.ok:
+        logger.error(f"Project startup: {result.describe()}")
+        click.echo(f"Error: Project startup failed: {result.describe()}")
+
+
+def run_remote_startup(project_name, target_dir, host, startup_command, port=None, detach=False):
+    """
+    Run a startup command in the project folder on its host. Locally it is
+    the ssh client that `dev ps/stop/logs` see; the remote command has a
+    terminal and ends together with it.
+    """
+    env = {"PORT": port} if port else None
+    click.echo(f"🔗 Running on {host.describe()}")
+    if detach:
+        start_detached(project_name, target_dir, shlex.join(remote.command_argv(host, startup_command, env, tty=True)), port)
+        return
+    result = remote.run(host, startup_command, env, tty=sys.stdin.isatty(), cwd=target_dir, project=project_name)
+    if not result.ok:
+        logger.error(f"Project startup on {host.describe()}: {result.describe()}")
+        click.echo(f"Error: Project startup failed on {host.describe()}: {result.describe()}")
+
+
+def port_available(project_name, port, target_dir=None) -> bool:
+    """
+    Probe the project's port before launching, so a collision is reported
+    up front instead of after the dev server has booted.
+    """
+    if not port or is_port_free(int(port)):
+        return True
+    running = find_processes(project_name, target_dir)
+    if running:
+        click.echo(f"'{project_name}' is already running (pid {running[0]['pid']}) on port {port}.")
+        return False
+    logger.error(f"Port {port} of '{project_name}' is already in use.")
+    click.echo(f"Error: Port {port} of '{project_name}' is already in use. Check 'dev ps' or 'dev ports'.")
+    return False
+
+
+def start_detached(project_name, target_dir, startup_command, port=None):
+    """
+    Launch a startup command in the background unless it is already running.
+    """
+    running = find_processes(project_name, target_dir)
+    if running:
+        click.echo(f"'{project_name}' is already running (pid {running[0]['pid']}). Use 'dev restart {project_name}'.")
+        return None
+    try:
+        entry = launch_detached(project_name, startup_command, target_dir, port=port, env=project_env(target_dir, port))
+    except OSError as e:
+        logger.error(f"Could not start '{project_name}' in the background: {e}")
+        click.echo(f"Error: Could not start '{project_name}': {e}")
+        return None
+    click.echo(f"🚀 Started '{project_name}' in the background (pid {entry['pid']}). Logs: {entry['log_path']}")
+    return entry
+
+
+def git_head(target_dir):
+    result = execute(["git", "rev-parse", "HEAD"], cwd=target_dir, capture=True)
+    if not result.ok:
+        logger.error(f"Could not read the current commit of {target_dir}: {result.describe()}")
+        return None
+    return result.stdout.strip()
+
+
+def workspace_affected(target_dir, since, merge_base=True):
+    """
+    (workspace, {package: reason}) for a workspace folder, or (None, None)
+    after reporting why it could not be computed. `merge_base=False` diffs
+    against `since` itself (the commit before a pull).
+    """
+    if not since:
+        click.echo("Error: No git ref to compare against.")
+        return None, None
+    try:
+        workspace, affected = affected_since(target_dir, since, merge_base)
+    except CommandError as e:
+        if e.result.error:
+            logger.error("Error: 'git' is not installed or not in your PATH.")
+            return None, None
+        logger.error(f"{e.result.text} failed in {target_dir}: {(e.result.stderr or '').strip()}")
+        click.echo(f"Error: Could not diff against '{since}'. Is it a valid ref?")
+        return None, None
+    if not workspace:
+        click.echo(f"'{os.path.basename(target_dir)}' is not a workspace (no package.json workspaces, pnpm-workspace.yaml or uv workspace).")
+        return None, None
+    return workspace, affected
+
+
+def install_affected_packages(target_dir, since, merge_base=True):
+    workspace, affected = workspace_affected(target_dir, since, merge_base)
+    if workspace is None:
+        return
+    if not affected:
+        click.echo(f"No packages affected since {since}. Nothing to install.")
+        return
+    for name, reason in affected.items():
+        click.echo(f"📦 Installing {name} ({reason})")
+        run_install_package(workspace["manager"], cwd=workspace["root"], package_name=name)
+
+
+def package_startup(package, manager):
+    """
+    (startup command, port) of a workspace package: its own devCLI-project.json
+    when present, otherwise its `dev` script.
+    """
+    project_json_path = os.path.join(package["path"], "devCLI-project.json")
+    if os.path.exists(project_json_path):
+        try:
+            with open(project_json_path, "r") as f:
+                project_config = json.load(f)
+            if project_config.get("startup"):
+                return project_config["startup"], project_config.get("port")
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not read {project_json_path}: {e}")
+    if package["kind"] == "node" and "dev" in package.get("scripts", {}):
+        return f"{manager or 'npm'} run dev", None
+    return None, None
+
+
+def run_affected_packages(target_dir, since, detach):
+    """
+    Start every affected workspace package, in parallel.
+    """
+    workspace, affected = workspace_affected(target_dir, since)
+    if workspace is None:
+        return
+    if not affected:
+        click.echo(f"No packages affected since {since}.")
+        return
+
+    launches = []
+    for name, reason in affected.items():
+        package = workspace["packages"][name]
+        command, port = package_startup(package, workspace["manager"])
+        if not command:
+            click.echo(f"Skipping {name}: no startup command or dev script.")
+            continue
+        if not port_available(name, port, package["path"]):
+            continue
+        click.echo(f"▶ {name} ({reason}): {command}")
+        launches.append((name, package["path"], command, port))
+
+    if detach:
+        for name, path, command, port in launches:
+            start_detached(name, path, command, port)
+        return
+
+    def run_one(name, path, command, port):
+        result = execute(command, cwd=path, env=project_env(path, port), project=name)
+        if not result.ok:
+            logger.error(f"'{name}': {result.describe()}")
+
+    threads = [threading.Thread(target=run_one, args=launch, daemon=True) for launch in launches]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(0.5)
+    except KeyboardInterrupt:
+        # The packages share our process group and received the interrupt as well.
+        click.echo("Interrupted, waiting for packages to exit...")
+        for thread in threads:
+            thread.join(5)
+
+
+@click.command("affected", help="List workspace packages affected by changes since a git ref.")
+@click.argument("folder_name")
+@click.option("--since", default="origin/main", show_default=True, help="Git ref to compare against.")
+@click.option("--json", "as_json", is_flag=True, help="Print JSON instead of a list.")
+def affected(folder_name, since, as_json):
+    target_dir = resolve_folder(folder_name)
+    if not target_dir:
+        logger.error(f"Folder '{folder_name}' not found or alias is incorrect.")
+        return
+    workspace, packages = workspace_affected(target_dir, since)
+    if workspace is None:
+        return
+    if as_json:
+        render.set_format("json")
+    records = ({"name": name, "path": workspace["packages"][name]["path"], "rel": workspace["packages"][name]["rel"], "reason": reason}
+               for name, reason in packages.items())
+    render.emit(records, lambda records: _echo_affected(records, since))
+
+
+def _echo_affected(records, since):
+    if not records:
+        click.echo(f"No packages affected since {since}.")
+        return
+    click.echo(f"Affected packages since {since}:")
+    for record in records:
+        click.echo(f"  - {record['name']:<30} {record['rel']:<30} ({record['reason']})")
+
+
+@click.command("install", help="Install the dependencies of a project.")
+@click.argument("folder_name")
+@click.option("--affected", "only_affected", is_flag=True, help="In a workspace, only install packages affected by changes since --since.")
+@click.option("--since", default="origin/main", show_default=True, help="Git ref used by --affected.")
+@click.option("--force", is_flag=True, help="Python projects: sync .venv even if the dependency files did not change.")
+def install(folder_name, only_affected, since, force):
+    target_dir = resolve_folder(folder_name)
+    if not target_dir:
+        logger.error(f"Folder '{folder_name}' not found or alias is incorrect.")
+        return
+    if only_affected:
+        install_affected_packages(target_dir, since)
+        return
+    manager = detect_package_manager(target_dir)
+    if manager in (None, "uv") and is_python(target_dir):
+        sync_python_env(target_dir, force=force)
+        return
+    if not manager:
+        click.echo(f"No package manager detected in '{folder_name}'.")
+        return
+    click.echo(f"📦 Running '{manager} install' in {target_dir}")
+    run_install_package(manager, cwd=target_dir)
+
+
+def echo_task_result(result):
+    icon = {"ran": "✅", "cached": "⚡", "failed": "❌", "skipped": "⏭", "cancelled": "🛑"}[result["status"]]
+    seconds = f" in {result['seconds']:.2f}s" if "seconds" in result else ""
+    click.echo(f"{icon} {result['task']}: {result['status']}{seconds}")
+    if result.get("log") and result["status"] != "cancelled":
+        for line in result["log"].rstrip().splitlines():
+            click.echo(f"  {result['task']} | {line}")
+
+
+@click.command("task", help="Run tasks from the 'tasks' section of devCLI-project.json, skipping unchanged ones.")
+@click.argument("folder_name")
+@click.argument("task_names", nargs=-1)
+@click.option("--jobs", "-j", type=int, default=4, show_default=True, help="Maximum number of tasks running in parallel.")
+@click.option("--force", is_flag=True, help="Ignore the cache and run every task.")
+@click.option("--list", "list_tasks", is_flag=True, help="List the tasks of the project.")
+@click.option("--clear-cache", is_flag=True, help="Delete all cached task outputs.")
+def task(folder_name, task_names, jobs, force, list_tasks, clear_cache):
+    if clear_cache:
+        stats_before = task_runner.cache_stats()
+        task_runner.clear_cache()
+        click.echo(f"Removed {stats_before['entries']} cache entries ({procstats.format_bytes(stats_before['bytes'])}).")
+        return
+
+    target_dir = resolve_folder(folder_name)
+    if not target_dir:
+        logger.error(f"Folder '{folder_name}' not found or alias is incorrect.")
+        return
+
+    try:
+        project_tasks = task_runner.load_tasks(target_dir)
+    except task_runner.TaskError as e:
+        logger.error(str(e))
+        click.echo(f"Error: {e}")
+        return
+
+    if list_tasks or not task_names:
+        records = ({"name": name, "command": definition["command"], "inputs": definition.get("inputs", []),
+                    "outputs": definition.get("outputs", []), "dependsOn": definition.get("dependsOn", [])}
+                   for name, definition in project_tasks.items())
+        render.emit(records, lambda records: _echo_tasks(records, target_dir))
+        return
+
+    max_bytes = load_config().get("taskCacheMaxBytes", task_runner.DEFAULT_CACHE_MAX_BYTES)
+    try:
+        results = task_runner.run_tasks(target_dir, list(task_names), jobs=jobs, use_cache=not force, max_bytes=max_bytes,
+                                         env=project_env(target_dir), on_result=echo_task_result)
+    except task_runner.TaskError as e:
+        logger.error(str(e))
+        click.echo(f"Error: {e}")
+        return
+    if any(r["status"] in ("failed", "skipped") for r in results):
+        sys.exit(1)
+
+
+def _echo_tasks(records, target_dir):
+    if not records:
+        click.echo(f"No tasks defined in {os.path.join(target_dir, 'devCLI-project.json')}.")
+        return
+    click.echo("Tasks:")
+    for record in records:
+        deps = f" (after {', '.join(record['dependsOn'])})" if record["dependsOn"] else ""
+        click.echo(f"  {record['name']:<20} {record['command']}{deps}")
+
+
+@click.command("watch", help="Rerun tasks when their inputs change. Without tasks, restart the startup command on changes.")
+@click.argument("folder_name")
+@click.argument("task_names", nargs=-1)
+@click.option("--debounce", type=int, default=int(watch_mode.DEFAULT_DEBOUNCE * 1000), show_default=True, help="Milliseconds without changes before a burst of events triggers a run.")
+@click.option("--jobs", "-j", type=int, default=4, show_default=True, help="Maximum number of tasks running in parallel.")
+def watch(folder_name, task_names, debounce, jobs):
+    target_dir = resolve_folder(folder_name)
+    if not target_dir:
+        logger.error(f"Folder '{folder_name}' not found or alias is incorrect.")
+        return
+
+    try:
+        project_tasks = task_runner.load_tasks(target_dir)
+    except task_runner.TaskError as e:
+        logger.error(str(e))
+        click.echo(f"Error: {e}")
+        return
+
+    def report_change(paths, targets):
+        shown = ", ".join(paths[:3]) + (f" (+{len(paths) - 3} more)" if len(paths) > 3 else "")
+        click.echo(f"🔄 {shown} changed, rerunning: {', '.join(targets)}")
+
+    try:
+        if task_names or project_tasks:
+            click.echo(f"👀 Watching {target_dir} (Ctrl+C to stop)")
+            max_bytes = load_config().get("taskCacheMaxBytes", task_runner.DEFAULT_CACHE_MAX_BYTES)
+            watch_mode.watch_tasks(target_dir, list(task_names), debounce=debounce / 1000, jobs=jobs,
+                                   max_bytes=max_bytes, env=project_env(target_dir), on_result=echo_task_result, on_change=report_change)
+            return
+
+        with open(os.path.join(target_dir, "devCLI-project.json"), "r") as f:
+            project_config = json.load(f)
+        startup_command = project_config.get("startup")
+        if not startup_command:
+            click.echo("Error: no tasks and no 'startup' command to watch.")
+            return
+        if not port_available(folder_name, project_config.get("port"), target_dir):
+            return
+        click.echo(f"👀 Watching {target_dir}, restarting '{startup_command}' on changes (Ctrl+C to stop)")
+        watch_mode.watch_command(target_dir, startup_command, env=project_env(target_dir, project_config.get("port")),
+                                 debounce=debounce / 1000, on_change=report_change)
+    except task_runner.TaskError as e:
+        logger.error(str(e))
+        click.echo(f"Error: {e}")
+    except KeyboardInterrupt:
+        click.echo("\nStopped watching.")
+
+
 @click.command("cd", help="Change directory to the specified folder.")
 @click.argument('folder_name', required=False, type=str, default=None)
 def cd(folder_name):
@@ -519,48 +1103,576 @@ def cd(folder_name):
 
 @click.command("help", help="Show help information.")
 @click.argument('command', required=False)
-def help(command = None):
+@click.pass_context
+def help(ctx, command = None):
+    # Generated from the command registry, so plugin commands are listed too.
+    root = ctx.find_root()
+    group = root.command
     if command:
-        commands = {
-            "run": run_dev,
-            "alias": alias,
-            "code": code,
-            "docker": docker,
-            "init": init,
-            "list": list_folders,
-            "update": update,
-            "start": start,
-            "help": help
-        }
-
-        if command in commands:
-            # click.echo(commands[command].get_help(click.Context(commands[command])))
-            # click.echo("")
-            # The above is fine, but for consistency, let's logger.debug it if verbose
-            help_text = commands[command].get_help(click.Context(commands[command]))
-            logger.debug(f"Displaying help for command: {command}\n{help_text}")
-            click.echo(help_text) # User facing
-            click.echo("") # User facing
-        else:
+        target = group.get_command(root, command)
+        if target is None:
             logger.error(f"Error: Command '{command}' not found for help display.")
-            # print "Error" in a red color
-            click.echo(f"Error: Command '{command}' not found.", fg="red") # User facing
+            click.secho(f"Error: Command '{command}' not found.", fg="red") # User facing
             click.echo() # User facing
+            return
+        help_text = target.get_help(click.Context(target, info_name=command, parent=root))
+        logger.debug(f"Displaying help for command: {command}\n{help_text}")
+        click.echo(help_text) # User facing
+        click.echo("") # User facing
+        return
+
+    click.echo("")
+    click.echo("devCLI - Command Line Interface")
+    click.echo("Available commands:")
+    for name, usage, short_help in group.summaries(root):
+        subcommand_group = group.commands.get(name)
+        if isinstance(subcommand_group, click.Group):
+            sub_ctx = click.Context(subcommand_group, info_name=name, parent=root)
+            for sub_name in subcommand_group.list_commands(sub_ctx):
+                sub = subcommand_group.get_command(sub_ctx, sub_name)
+                sub_usage = plugins.usage_of(sub, sub_ctx, sub_name)
+                click.echo(f"   {name} {sub_name} {sub_usage}".rstrip() + f"  - {sub.get_short_help_str(limit=80)}")
+            continue
+        click.echo(f"   {name} {usage}".rstrip() + f"  - {short_help}")
+    click.echo("")
+
+
+@click.command("bench", help="Benchmark devCLI command latency against synthetic project trees.")
+@click.option("--sizes", default="10,100,1000", show_default=True, help="Comma separated project counts to generate (up to 10000).")
+@click.option("--aliases", "n_aliases", type=int, default=None, help="Number of aliases per tree (default: same as project count).")
+@click.option("--repeat", type=int, default=5, show_default=True, help="Warm invocations per scenario.")
+@click.option("--output", "output_path", type=click.Path(dir_okay=False), default=None, help="Where to write the JSON results.")
+@click.option("--baseline", "baseline_path", type=click.Path(exists=True, dir_okay=False), default=None, help="Baseline JSON to compare against.")
+@click.option("--threshold", type=float, default=0.2, show_default=True, help="Allowed slowdown before a result counts as a regression (0.2 = 20%).")
+@click.option("--strace", "use_strace", is_flag=True, help="Also count every syscall (stat, getdents, open, ...) with strace, not only read/write calls. Slows the timed runs down.")
+@click.option("--keep", is_flag=True, help="Keep the generated project trees for inspection.")
+def bench(sizes, n_aliases, repeat, output_path, baseline_path, threshold, use_strace, keep):
+    """
+    Run the benchmark suite from the benchmarks/ folder and optionally compare to a baseline.
+    """
+    # The suite lives next to src/, outside of the CLI's import path.
+    if CLI_ROOT_DIR not in sys.path:
+        sys.path.insert(0, CLI_ROOT_DIR)
+    from benchmarks.suite import run_suite, compare, format_results
+
+    try:
+        size_list = [int(s) for s in sizes.split(",") if s.strip()]
+    except ValueError:
+        click.echo(f"Error: Invalid --sizes value '{sizes}'. Use comma separated integers.")
+        return
+
+    click.echo(f"Running benchmarks for sizes: {', '.join(map(str, size_list))}")
+    results = run_suite(size_list, n_aliases, repeat, use_strace, keep, echo=click.echo)
+    for line in format_results(results):
+        click.echo(line)
+
+    if not output_path:
+        output_path = os.path.expanduser(os.path.join("~", ".devcli", "bench", f"results-{time.strftime('%Y%m%d%H%M%S')}.json"))
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump(results, f, indent=4)
+    logger.info(f"Benchmark results written to {output_path}")
+    click.echo(f"Results written to {output_path}")
+
+    if baseline_path:
+        with open(baseline_path, "r") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, threshold)
+        if not regressions:
+            click.echo(f"✅ No regressions above {threshold:.0%} compared to {baseline_path}")
+            return
+        click.echo(f"❌ {len(regressions)} regression(s) above {threshold:.0%}:")
+        for r in regressions:
+            click.echo(f"  {r['key']:<36} {r['metric']:<16} {r['baseline']:.2f} -> {r['current']:.2f} (+{r['change']:.0%})")
+        sys.exit(1)
+
+
+@click.command("stats", help="Show CPU, memory, open files and child processes of running projects.")
+@click.option("--watch", "-w", is_flag=True, help="Refresh the statistics until interrupted.")
+@click.option("--interval", "-n", type=float, default=2.0, show_default=True, help="Seconds between refreshes in --watch mode.")
+@click.option("--json", "as_json", is_flag=True, help="Print JSON instead of a table.")
+def stats(watch, interval, as_json):
+    """
+    Sample resource usage of the process trees started by run/start.
+    """
+    if not procstats.is_supported():
+        logger.error("Process statistics need /proc and are only available on Linux.")
+        click.echo("Error: 'dev stats' is only supported on Linux.")
+        return
+
+    previous = None
+    collect_garbage()
+    while True:
+        entries = [e for e in load_processes() if is_alive(e)]
+        logger.debug(f"Sampling {len(entries)} recorded processes.")
+        results, previous = procstats.sample(entries, previous, interval=min(interval, 0.5))
+        results = [r for r in results if r["alive"]]
+
+        if as_json:
+            click.echo(json.dumps(results))
+        elif render.is_machine():
+            render.emit(results)
+        else:
+            if watch:
+                click.clear()
+            _echo_stats_table(results)
+
+        if not watch:
+            return
+        try:
+            time.sleep(interval)
+        except KeyboardInterrupt:
+            return
+
+
+def _echo_stats_table(results):
+    if not results:
+        click.echo("No running projects recorded. Start one with 'dev run' or 'dev start'.")
+        return
+    click.echo(f"{'PROJECT':<30}{'PID':>8}{'CPU %':>8}{'RSS':>12}{'FDS':>6}{'CHILDREN':>10}")
+    for r in results:
+        click.echo(
+            f"{str(r['project']):<30}{r['pid']:>8}{r['cpu_percent']:>8.1f}"
+            f"{procstats.format_bytes(r['rss_bytes']):>12}{r['open_fds']:>6}{r['children']:>10}"
+        )
+
+
+@click.command("ps", help="List projects started by devCLI that are still running.")
+@click.option("--history", is_flag=True, help="Show the most recent runs, including finished ones.")
+def ps(history):
+    """
+    Show the run registry after removing entries of processes that have exited.
+    """
+    collect_garbage()
+    if history:
+        render.emit(recent_runs(), _echo_run_history)
+        return
+    render.emit(load_processes(), _echo_processes)
+
+
+def _echo_processes(entries):
+    if not entries:
+        click.echo("No running projects.")
+        return
+    click.echo(f"{'PROJECT':<30}{'PID':>8}  {'MODE':<11}{'UPTIME':>10}{'PORT':>7}  LOG")
+    now = time.time()
+    for e in entries:
+        uptime = int(now - e.get("started_at", now))
+        click.echo(
+            f"{str(e.get('project')):<30}{e.get('pid'):>8}  {e.get('mode', 'foreground'):<11}"
+            f"{f'{uptime // 3600}h{uptime % 3600 // 60:02d}m{uptime % 60:02d}s':>10}"
+            f"{str(e.get('port') or '-'):>7}  {e.get('log_path') or '-'}"
+        )
+
+
+def _echo_run_history(runs):
+    if not runs:
+        click.echo("No runs recorded.")
+        return
+    click.echo(f"{'PROJECT':<30}{'PID':>8}  {'STARTED':<20}{'DURATION':>10}  COMMAND")
+    now = time.time()
+    for r in runs:
+        seconds = int((r["ended_at"] or now) - r["started_at"])
+        duration = f"{seconds // 3600}h{seconds % 3600 // 60:02d}m{seconds % 60:02d}s" if r["ended_at"] else "running"
+        started = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(r["started_at"]))
+        click.echo(f"{str(r['project']):<30}{r['pid']:>8}  {started:<20}{duration:>10}  {r['command'] or '-'}")
+
+
+@click.command("stop", help="Stop a running project (SIGTERM, then SIGKILL after a timeout).")
+@click.argument("folder_name", required=False)
+@click.option("--all", "stop_all", is_flag=True, help="Stop every project started by devCLI.")
+@click.option("--timeout", "-t", type=float, default=10.0, show_default=True, help="Seconds to wait before sending SIGKILL.")
+def stop(folder_name, stop_all, timeout):
+    collect_garbage()
+    if stop_all:
+        entries = load_processes()
+    elif folder_name:
+        entries = find_processes(folder_name, resolve_folder(folder_name))
     else:
-        # This is general help, click.echo is appropriate
-        click.echo("")
-        click.echo("devCLI - Command Line Interface")
-        click.echo("Available commands:")
-        click.echo("   run <folder_name>  - Run 'npm run dev' in the specified folder.")
-        click.echo("   alias <action> <alias_name> <alias_for>  - Add or remove an alias.")
-        click.echo("   code <folder_name>  - Open the specified folder in VScode.")
-        click.echo("   docker <folder_name> <state> [--build] [--detach]  - Run docker-compose up/down.")
-        click.echo("   init  - Create a new project folder with a devCLI-project.json file.")
-        click.echo("   list  - List all available folders.")
-        click.echo("   update [folder_name] [--force] [--no-pull]  - Update devCLI to the latest version.")
-        click.echo("   configcmd <subcommand> [args] - View or modify CLI configuration.")
-        click.echo("   help  - Show help information.")
-        click.echo("")
+        click.echo("Error: Specify a project or use --all.")
+        return
+
+    if not entries:
+        click.echo(f"No running process found for '{folder_name}'." if folder_name else "No running projects.")
+        return
+    for entry in entries:
+        if stop_process(entry, timeout):
+            logger.info(f"Stopped '{entry['project']}' (pid {entry['pid']}).")
+            click.echo(f"🛑 Stopped '{entry['project']}' (pid {entry['pid']}).")
+        else:
+            logger.error(f"Could not stop '{entry['project']}' (pid {entry['pid']}).")
+            click.echo(f"Error: Could not stop '{entry['project']}' (pid {entry['pid']}).")
+
+
+@click.command("restart", help="Restart a project in the background.")
+@click.argument("folder_name")
+@click.option("--timeout", "-t", type=float, default=10.0, show_default=True, help="Seconds to wait before sending SIGKILL.")
+def restart(folder_name, timeout):
+    collect_garbage()
+    target_dir = resolve_folder(folder_name)
+    entries = find_processes(folder_name, target_dir)
+    if entries:
+        entry = entries[0]
+        for running in entries:
+            if not stop_process(running, timeout):
+                click.echo(f"Error: Could not stop '{folder_name}' (pid {running['pid']}).")
+                return
+        if port_available(entry["project"], entry.get("port")):
+            start_detached(entry["project"], entry["cwd"], entry["command"], entry.get("port"))
+        return
+
+    # Not running (anymore): start it from its devCLI-project.json.
+    if not target_dir:
+        click.echo(f"Error: Folder '{folder_name}' not found.")
+        return
+    project_json_path = os.path.join(target_dir, "devCLI-project.json")
+    try:
+        with open(project_json_path, "r") as f:
+            project_config = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.error(f"Could not read {project_json_path}: {e}")
+        click.echo(f"Error: Could not read {project_json_path}.")
+        return
+    if not project_config.get("startup"):
+        click.echo(f"Error: 'startup' command missing in {project_json_path}.")
+        return
+    run_startup(folder_name, target_dir, project_config["startup"], project_config.get("port"), detach=True)
+
+
+@click.command("logs", help="Show the output of a project started in the background, or run its 'logs' command.")
+@click.argument("folder_name")
+@click.option("--lines", "-n", type=int, default=50, show_default=True, help="Number of lines to show from the end of the log.")
+@click.option("--follow", "-f", is_flag=True, help="Keep printing new output until Ctrl+C.")
+def logs(folder_name, lines, follow):
+    target_dir = resolve_folder(folder_name)
+    if not target_dir:
+        logger.error(f"Folder '{folder_name}' not found or alias is incorrect.")
+        return
+    try:
+        with open(os.path.join(target_dir, "devCLI-project.json"), "r") as f:
+            project_config = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        project_config = {}
+
+    # A "logs" command (e.g. "docker compose logs --tail 100") runs where the project runs.
+    if project_config.get("logs"):
+        host = remote.for_project(target_dir, project_config)
+        if host:
+            result = remote.run(host, project_config["logs"], tty=sys.stdin.isatty())
+        else:
+            result = execute(project_config["logs"], cwd=target_dir, env=project_env(target_dir))
+        if not result.ok:
+            click.echo(f"Error: {result.describe()}")
+        return
+
+    log_path = log_path_for(target_dir)
+    try:
+        tail, position = tail_lines(log_path, lines)
+    except OSError:
+        click.echo(f"No logs for '{folder_name}'. Start it with 'dev run {folder_name} --detach'.")
+        return
+    for line in tail:
+        click.echo(line)
+    if not follow:
+        return
+    try:
+        with open(log_path, "r", errors="replace") as f:
+            f.seek(position)
+            while True:
+                line = f.readline()
+                if line:
+                    click.echo(line, nl=False)
+                else:
+                    time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+
+
+@click.command("ports", help="List port leases of devCLI projects.")
+@click.option("--release", "release_folder", default=None, metavar="FOLDER_NAME", help="Release the port leased to a project.")
+@click.option("--prune", is_flag=True, help="Release leases of projects that no longer exist.")
+def ports(release_folder, prune):
+    if release_folder:
+        target_dir = resolve_folder(release_folder)
+        released = release_port(target_dir) if target_dir else []
+        click.echo(f"Released port(s) {', '.join(map(str, released))}." if released else f"No port leased to '{release_folder}'.")
+        return
+    if prune:
+        pruned = prune_leases()
+        click.echo(f"Released {len(pruned)} stale lease(s).")
+        return
+
+    records = (dict(lease, port=int(port), state="free" if is_port_free(int(port)) else "in use")
+               for port, lease in sorted(load_leases().items(), key=lambda item: int(item[0])))
+    render.emit(records, _echo_ports)
+
+
+def _echo_ports(records):
+    if not records:
+        click.echo("No ports leased.")
+        return
+    click.echo(f"{'PORT':>6}  {'STATE':<6}  PROJECT")
+    for record in records:
+        click.echo(f"{record['port']:>6}  {record['state']:<6}  {record.get('project')}")
+
+
+@click.command("env", help="Print the environment devCLI passes to a project's commands.")
+@click.argument("folder_name")
+@click.option("--all", "show_all", is_flag=True, help="Include variables inherited from the current shell.")
+def env(folder_name, show_all):
+    target_dir = resolve_folder(folder_name)
+    if not target_dir:
+        logger.error(f"Folder '{folder_name}' not found or alias is incorrect.")
+        return
+    resolved = resolve_env(target_dir, _project_port(target_dir))
+    if show_all:
+        resolved = dict({k: (v, "inherited") for k, v in os.environ.items()}, **resolved)
+
+    records = ({"name": key, "value": value, "source": source} for key, (value, source) in sorted(resolved.items()))
+    render.emit(records, lambda records: _echo_env(records, folder_name))
+
+
+def _echo_env(records, folder_name):
+    if not records:
+        click.echo(f"No environment defined for '{folder_name}'.")
+        return
+    width = max(len(r["name"]) for r in records)
+    for record in records:
+        click.echo(f"{record['name']:<{width}} = {record['value']}  ({record['source']})")
+
+
+def _project_port(target_dir):
+    try:
+        with open(os.path.join(target_dir, "devCLI-project.json"), "r") as f:
+            return json.load(f).get("port")
+    except (OSError, ValueError):
+        return None
+
+
+@click.group("git", help="Git helpers across projects.")
+def git():
+    pass
+
+
+@git.command("status", help="Show branch, upstream and changes of one project or, with --all, every git project.")
+@click.argument("folder_name", required=False)
+@click.option("--all", "all_projects", is_flag=True, help="Check every git project under the project roots.")
+@click.option("--dirty", is_flag=True, help="Only show repos with staged, modified, untracked or conflicting files.")
+@click.option("--behind", is_flag=True, help="Only show repos behind their upstream.")
+@click.option("--jobs", "-j", type=int, default=gitstatus.DEFAULT_JOBS, show_default=True, help="git processes running in parallel.")
+@click.option("--refresh", is_flag=True, help="Ignore cached results and query every repo.")
+def git_status(folder_name, all_projects, dirty, behind, jobs, refresh):
+    if all_projects:
+        projects = [p for p in list_projects() if ".git" in p["markers"]]
+    elif folder_name:
+        target_dir = resolve_folder(folder_name)
+        if not target_dir:
+            logger.error(f"Folder '{folder_name}' not found or alias is incorrect.")
+            return
+        projects = [{"name": folder_name, "path": target_dir}]
+    else:
+        click.echo("Error: Pass a folder name or --all.")
+        return
+
+    max_age = load_config().get("gitStatusMaxAge", gitstatus.DEFAULT_MAX_AGE)
+    records = gitstatus.collect(projects, jobs=jobs, refresh=refresh, max_age=max_age)
+    records = (r for r in records if (not dirty or r.get("dirty")) and (not behind or r.get("behind")))
+    render.emit(records, lambda records: _echo_git_status(records, dirty or behind))
+
+
+@git.command("pull", help="Fetch and fast-forward one project or, with --all, every git project. Dirty or diverged repos are only reported.")
+@click.argument("folder_name", required=False)
+@click.option("--all", "all_projects", is_flag=True, help="Update every git project under the project roots.")
+@click.option("--jobs", "-j", type=int, default=8, show_default=True, help="Repos fetched in parallel.")
+@click.option("--fetch-ttl", type=float, default=None, help="Seconds a previous fetch stays fresh (default: fetchTtl in config.json or 300). 0 always fetches.")
+def git_pull(folder_name, all_projects, jobs, fetch_ttl):
+    if all_projects:
+        projects = [p for p in list_projects() if ".git" in p["markers"]]
+    elif folder_name:
+        target_dir = resolve_folder(folder_name)
+        if not target_dir:
+            logger.error(f"Folder '{folder_name}' not found or alias is incorrect.")
+            return
+        projects = [{"name": folder_name, "path": target_dir}]
+    else:
+        click.echo("Error: Pass a folder name or --all.")
+        return
+
+    if fetch_ttl is None:
+        fetch_ttl = load_config().get("fetchTtl", gitsync.DEFAULT_FETCH_TTL)
+    reports = gitsync.update_repos(projects, jobs=jobs, fetch_ttl=fetch_ttl)
+    if render.is_machine():
+        render.emit(reports)
+        return
+    counts = {}
+    for report in reports:
+        counts[report["status"]] = counts.get(report["status"], 0) + 1
+        color = {gitsync.UPDATED: "green", gitsync.FAILED: "red", gitsync.DIRTY: "yellow", gitsync.DIVERGED: "yellow"}.get(report["status"])
+        click.echo(f"{report['name']}: " + click.style(gitsync.describe(report), fg=color))
+    if counts:
+        click.echo(", ".join(f"{n} {status}" for status, n in counts.items()))
+    else:
+        click.echo("No git repos found.")
+
+
+def _echo_git_status(records, filtered):
+    if not records:
+        click.echo("No matching repos." if filtered else "No git repos found.")
+        return
+    records = sorted(records, key=lambda r: r["name"])
+    width = max(len("PROJECT"), *(len(r["name"]) for r in records))
+    click.echo(f"{'PROJECT':<{width}}  {'BRANCH':<24} {'SYNC':<10} CHANGES")
+    for record in records:
+        if record.get("error"):
+            click.echo(f"{record['name']:<{width}}  " + click.style(record["error"], fg="red"))
+            continue
+        branch = record["branch"] or f"({(record['commit'] or 'detached')[:8]})"
+        if not record["upstream"]:
+            sync = "-"
+        elif record["ahead"] or record["behind"]:
+            sync = f"↑{record['ahead']} ↓{record['behind']}"
+        else:
+            sync = "="
+        changes = [f"{record[key]} {key}" for key in ("conflicts", "staged", "modified", "untracked") if record[key]]
+        click.echo(f"{record['name']:<{width}}  {branch:<24} "
+                   + click.style(f"{sync:<10}", fg="red" if record["behind"] else None)
+                   + " " + (click.style(", ".join(changes), fg="yellow") if changes else click.style("clean", fg="green")))
+
+
+@click.command("du", help="Show disk usage of projects and their build artifacts (node_modules, .next, .venv, ...).")
+@click.argument("folder_name", required=False)
+@click.option("--kind", "kinds", default=None, help="Comma separated artifact directory names (default: cleanArtifacts in config.json).")
+@click.option("--top", type=int, default=None, help="Only show the N largest projects.")
+@click.option("--jobs", "-j", type=int, default=diskusage.DEFAULT_JOBS, show_default=True, help="Projects walked in parallel.")
+@click.option("--refresh", is_flag=True, help="Ignore cached directory sizes.")
+def du(folder_name, kinds, top, jobs, refresh):
+    projects = _scope_projects(folder_name)
+    if projects is None:
+        return
+    usages = diskusage.analyze(projects, _artifact_kinds(kinds), jobs=jobs, refresh=refresh)
+    if top:
+        usages = sorted(usages, key=lambda u: u["bytes"], reverse=True)[:top]
+    render.emit(usages, _echo_du)
+
+
+def _echo_du(usages):
+    if not usages:
+        click.echo("No projects found.")
+        return
+    usages = sorted(usages, key=lambda u: u["bytes"], reverse=True)
+    width = max(len("PROJECT"), *(len(u["name"]) for u in usages), *(len(a["kind"]) + 2 for u in usages for a in u["artifacts"]))
+    click.echo(f"{'PROJECT':<{width}}  {'TOTAL':>10}  {'ARTIFACTS':>10}  LAST ACTIVE")
+    for usage in usages:
+        active = time.strftime("%Y-%m-%d", time.localtime(usage["last_active"])) if usage["last_active"] else "-"
+        click.echo(f"{usage['name']:<{width}}  {procstats.format_bytes(usage['bytes']):>10}  "
+                   + click.style(f"{procstats.format_bytes(usage['artifact_bytes']):>10}", fg="yellow" if usage["artifact_bytes"] else None)
+                   + f"  {active}")
+        by_kind = {}
+        for artifact in usage["artifacts"]:
+            count, size = by_kind.get(artifact["kind"], (0, 0))
+            by_kind[artifact["kind"]] = (count + 1, size + artifact["bytes"])
+        for kind, (count, size) in sorted(by_kind.items(), key=lambda item: item[1][1], reverse=True):
+            click.echo(f"  {kind:<{width - 2}}  {'':>10}  {procstats.format_bytes(size):>10}" + (f"  ({count} dirs)" if count > 1 else ""))
+    total = sum(u["bytes"] for u in usages)
+    artifacts = sum(u["artifact_bytes"] for u in usages)
+    click.echo(f"Total: {procstats.format_bytes(total)}, of which {procstats.format_bytes(artifacts)} build artifacts.")
+
+
+@click.command("clean", help="Delete build artifacts of projects that have not been used for a while.")
+@click.argument("folder_name", required=False)
+@click.option("--older-than", default="30d", show_default=True, help="Only projects inactive this long (e.g. 30d, 12h, 2w). Activity: devCLI runs, git operations, manifest changes.")
+@click.option("--kind", "kinds", default=None, help="Comma separated artifact directory names (default: cleanArtifacts in config.json).")
+@click.option("--dry-run", is_flag=True, help="Only list what would be deleted.")
+@click.option("--yes", "-y", is_flag=True, help="Do not ask for confirmation.")
+@click.option("--jobs", "-j", type=int, default=diskusage.DEFAULT_JOBS, show_default=True, help="Projects walked in parallel.")
+def clean(folder_name, older_than, kinds, dry_run, yes, jobs):
+    try:
+        age = diskusage.parse_age(older_than)
+    except ValueError as e:
+        click.echo(f"Error: {e}")
+        return
+    projects = _scope_projects(folder_name)
+    if projects is None:
+        return
+    kinds = _artifact_kinds(kinds)
+    candidates = diskusage.clean_candidates(diskusage.analyze(projects, kinds, jobs=jobs), kinds, age)
+    reclaimable = sum(c["bytes"] for c in candidates)
+    if not candidates:
+        render.status(f"Nothing to clean in projects inactive for {older_than}.")
+        render.emit([])
+        return
+    if not render.is_machine():
+        for candidate in candidates:
+            click.echo(f"  {procstats.format_bytes(candidate['bytes']):>10}  {candidate['path']}")
+    render.status(f"{len(candidates)} artifact directories, {procstats.format_bytes(reclaimable)}.")
+    if dry_run:
+        render.emit([dict(c, removed=False) for c in candidates], lambda records: None)
+        return
+    if not yes and not prompts.confirm(message=f"Delete {len(candidates)} directories?", default=False, key="clean.delete"):
+        click.echo("Clean cancelled.")
+        return
+
+    def removals():
+        for candidate in candidates:
+            ok, error = diskusage.remove(candidate)
+            if not ok:
+                logger.error(f"Could not delete {candidate['path']}: {error}")
+            yield dict(candidate, removed=ok, error=error)
+
+    records = list(removals())
+    render.emit(records, lambda records: None)
+    removed = [r for r in records if r["removed"]]
+    reclaimed = sum(r["bytes"] for r in removed)
+    logger.info(f"Cleaned {len(removed)} artifact directories, {reclaimed} bytes.")
+    render.status(f"🧹 Reclaimed {procstats.format_bytes(reclaimed)} from {len(removed)} directories.")
+
+
+def _scope_projects(folder_name):
+    """
+    [project] for a folder name, every project without one, None when the
+    folder cannot be resolved.
+    """
+    if not folder_name:
+        return list_projects()
+    target_dir = resolve_folder(folder_name)
+    if not target_dir:
+        logger.error(f"Folder '{folder_name}' not found or alias is incorrect.")
+        return None
+    return [{"name": folder_name, "path": target_dir}]
+
+
+def _artifact_kinds(kinds):
+    if kinds:
+        return [kind.strip() for kind in kinds.split(",") if kind.strip()]
+    return load_config().get("cleanArtifacts", diskusage.DEFAULT_ARTIFACTS)
+
+
+@click.command("doctor", help="Check configured binaries, project templates and the startup command of every project.")
+@click.option("--refresh", is_flag=True, help="Rerun '--version' of binaries that did not change since the last check.")
+@click.option("--jobs", "-j", type=int, default=8, show_default=True, help="Checks running in parallel.")
+def doctor(refresh, jobs):
+    cfg = load_config()
+    records = health.run_checks(list_projects(), get_roots(cfg), cfg.get("initialized_commands", {}), CLI_ROOT_DIR,
+                                jobs=jobs, refresh=refresh)
+    render.emit(records, _echo_doctor)
+    if any(r["status"] == health.ERROR for r in records):
+        sys.exit(1)
+
+
+def _echo_doctor(records):
+    titles = {"binary": "Binaries", "config": "Project roots", "template": "Project templates", "startup": "Startup commands"}
+    marks = {health.OK: click.style("✔", fg="green"), health.WARN: click.style("!", fg="yellow"), health.ERROR: click.style("✘", fg="red")}
+    for check, title in titles.items():
+        group = [r for r in records if r["check"] == check]
+        if not group:
+            continue
+        click.echo(f"{title}:")
+        width = max(len(r["target"]) for r in group)
+        for record in group:
+            click.echo(f"  {marks[record['status']]} {record['target']:<{width}}  {record['detail']}")
+    errors = sum(r["status"] == health.ERROR for r in records)
+    warnings = sum(r["status"] == health.WARN for r in records)
+    click.echo(f"{errors} problems, {warnings} warnings." if errors or warnings else "✅ Everything looks good.")
 
 
 # CONFIG COMMANDS START
@@ -574,19 +1686,23 @@ def view_config(key):
     cfg = load_config() # Loads from main config.json
     if not cfg:
         logger.warning("Configuration is empty or could not be loaded.")
-        click.echo("Configuration is empty.")
+        render.status("Configuration is empty.")
         return
 
     if key:
         if key in cfg:
-            click.echo(f"{key}: {cfg[key]}")
+            render.emit([{"key": key, "value": cfg[key]}], lambda records: click.echo(f"{key}: {cfg[key]}"))
         else:
             logger.warning(f"Configuration key '{key}' not found.")
-            click.echo(f"Error: Key '{key}' not found in configuration.")
+            render.status(f"Error: Key '{key}' not found in configuration.")
     else:
-        click.echo("Current configuration:")
-        for k, v in cfg.items():
-            click.echo(f"  {k}: {v}")
+        render.emit(({"key": k, "value": v} for k, v in cfg.items()), _echo_config)
+
+
+def _echo_config(records):
+    click.echo("Current configuration:")
+    for record in records:
+        click.echo(f"  {record['key']}: {record['value']}")
 
 @config_cmd.command("set", help="Set a configuration key-value pair.")
 @click.argument("key")
@@ -1,11 +1,16 @@
-import os, json, logging, re
-from dotenv import load_dotenv
-from InquirerPy import inquirer
+import os, json, logging, re, fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from envfiles import load_cli_env
+import prompts
 import click
+from tracing import span
+from discovery import DEFAULT_IGNORE
+import state
+import render
 
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+load_cli_env()
 logger.debug(f"CONFIG_PATH from env: {os.getenv('CONFIG_PATH')}")
 logger.debug(f"ALIAS_PATH from env: {os.getenv('ALIAS_PATH')}")
 CONFIG_PATH = os.getenv("CONFIG_PATH")
@@ -15,9 +20,21 @@ BASE_PATH = os.getenv("BASE_PATH")
 
 def load_config(pathC = "config"):
     """
-    Load the configuration from the JSON file.
+    Load the configuration from config.json, with the volatile settings
+    (currentProject) taken from the state store. Aliases come from the store.
     """
-    path = CONFIG_PATH if pathC == "config" else ALIAS_PATH
+    with span("config.load_config", file=pathC):
+        if pathC != "config":
+            return state.load_aliases()
+        config_data = _read_config(CONFIG_PATH)
+        for key in state.VOLATILE_SETTINGS:
+            value = state.get_setting(key)
+            if value is not None:
+                config_data[key] = value
+        return config_data
+
+
+def _read_config(path):
     logger.debug(f"Loading config from path: {path}")
     if not os.path.exists(path):
         logger.error(f"Config file not found at {path}.")
@@ -37,38 +54,199 @@ def load_config(pathC = "config"):
         logger.debug(e, exc_info=True)
         return {}
 
+def get_roots(cfg=None):
+    """
+    Project roots from the "roots" list in config.json, each with a path, a
+    depth limit and ignore globs. Without roots, BASE_PATH is the single root
+    and only its direct children are listed.
+    """
+    cfg = load_config() if cfg is None else cfg
+    roots = []
+    for root in cfg.get("roots") or []:
+        if isinstance(root, str):
+            root = {"path": root}
+        if not isinstance(root, dict) or not root.get("path"):
+            logger.warning(f"Ignoring invalid root entry in config: {root}")
+            continue
+        roots.append({
+            "path": os.path.abspath(os.path.expanduser(os.path.expandvars(root["path"]))),
+            "depth": int(root.get("depth", 3)),
+            "ignore": list(root.get("ignore", DEFAULT_IGNORE)),
+            "name": root.get("name"),
+        })
+    if not roots and BASE_PATH:
+        roots.append({"path": os.path.abspath(BASE_PATH), "depth": 1, "ignore": list(DEFAULT_IGNORE), "name": None})
+    return roots
+
+
 def save_config(config_data, pathC="config"):
     """
-    Save the configuration to the JSON file.
+    Save the configuration. Volatile settings and aliases go to the state
+    store; config.json is only rewritten when the rest of it changed.
     """
-    path = CONFIG_PATH if pathC == "config" else ALIAS_PATH
-    logger.debug(f"Saving config to path: {path}. Data: {config_data}")
+    logger.debug(f"Saving {pathC}. Data: {config_data}")
     try:
-        with open(path, "w") as f:
-            json.dump(config_data, f, indent=4)
-        logger.info(f"Config saved successfully to {path}.")
+        with span("config.save_config", file=pathC):
+            if pathC != "config":
+                state.replace_aliases(config_data)
+                return
+            file_data = {k: v for k, v in config_data.items() if k not in state.VOLATILE_SETTINGS}
+            for key in state.VOLATILE_SETTINGS:
+                if key in config_data:
+                    state.set_setting(key, config_data[key])
+            on_disk = _read_config(CONFIG_PATH)
+            if {k: v for k, v in on_disk.items() if k not in state.VOLATILE_SETTINGS} == file_data:
+                return
+            with open(CONFIG_PATH, "w") as f:
+                json.dump(file_data, f, indent=4)
+        logger.info(f"Config saved successfully to {CONFIG_PATH}.")
     except Exception as e:
-        logger.error(f"An unexpected error occurred while saving config to {path}: {e}")
+        logger.error(f"An unexpected error occurred while saving {pathC}: {e}")
         logger.debug(e, exc_info=True)
 
 
-def handle_list_aliases(aliases):
+def handle_list_aliases(aliases, pattern=None, regex=False):
     """
-    List all aliases.
+    List all aliases, or those whose name or target matches a glob `pattern`
+    (a regular expression with `regex`).
     """
-    logger.debug("Listing aliases.")
-    if not aliases:
+    logger.debug(f"Listing aliases matching {pattern!r}.")
+    if pattern:
+        try:
+            aliases = filter_aliases(aliases, pattern, regex)
+        except re.error as e:
+            render.status(f"Error: Invalid regular expression '{pattern}': {e}")
+            return
+    records = ({"name": name, "target": alias_path, "path": alias_target(alias_path)} for name, alias_path in aliases.items())
+    render.emit(records, lambda records: _echo_aliases(records, pattern))
+
+
+def _echo_aliases(records, pattern=None):
+    if not records:
         logger.info("No aliases found to list.")
         # It's okay to use click.echo for direct user output not related to errors/status
-        import click 
-        click.echo("No aliases found.")
+        click.echo(f"No aliases match '{pattern}'." if pattern else "No aliases found.")
         return
 
-    import click # for styled output if needed, or just log
     click.echo("Aliases:")
-    for alias_name, alias_path in aliases.items():
-        logger.debug(f"Alias: {alias_name} -> {alias_path}")
-        click.echo(f"  {alias_name} -> {alias_path}")
+    for record in records:
+        logger.debug(f"Alias: {record['name']} -> {record['target']}")
+        click.echo(f"  {record['name']} -> {record['target']}")
+
+
+def filter_aliases(aliases, pattern, regex=False) -> dict:
+    if regex:
+        matcher = re.compile(pattern)
+        matches = lambda value: matcher.search(value) is not None
+    else:
+        matches = lambda value: fnmatch.fnmatchcase(value, pattern)
+    return {name: path for name, path in aliases.items() if matches(name) or matches(path)}
+
+
+def alias_target(alias_path) -> str:
+    """
+    Absolute folder an alias points at (alias targets are relative to BASE_PATH).
+    """
+    return os.path.normpath(os.path.join(BASE_PATH or "", alias_path))
+
+
+def alias_index(aliases) -> dict:
+    """
+    Reverse index {absolute target folder: [alias names]}, built in one pass
+    so callers can look up the aliases of many folders in O(1) each.
+    """
+    index = {}
+    for name, alias_path in aliases.items():
+        index.setdefault(alias_target(alias_path), []).append(name)
+    return index
+
+
+def _missing_targets(aliases, jobs: int = 16) -> dict:
+    """
+    Aliases whose target folder does not exist. The checks run in parallel,
+    since stat calls on network drives or sleeping disks are slow.
+    """
+    names = list(aliases)
+    with ThreadPoolExecutor(max_workers=max(1, min(jobs, len(names) or 1))) as pool:
+        exists = list(pool.map(lambda name: os.path.isdir(alias_target(aliases[name])), names))
+    return {name: aliases[name] for name, ok in zip(names, exists) if not ok}
+
+
+def handle_import_aliases(aliases_data, import_path, replace=False, allow_missing=False) -> bool:
+    """
+    Import aliases from a JSON file ({alias name: folder relative to
+    BASE_PATH}, the format of `alias export`) in a single transaction.
+    With `replace`, aliases not in the file are removed.
+    """
+    try:
+        with open(import_path, "r") as f:
+            imported = json.load(f)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: Could not read {import_path}: {e}")
+        return False
+    if not isinstance(imported, dict) or not all(isinstance(v, str) for v in imported.values()):
+        click.echo(f"Error: {import_path} must map alias names to folders.")
+        return False
+
+    skipped = {name: "invalid name" for name in imported if not re.match(r"^[a-zA-Z0-9_-]+$", name)}
+    if not allow_missing:
+        skipped.update({name: "target does not exist" for name in _missing_targets(imported) if name not in skipped})
+    accepted = {name: path for name, path in imported.items() if name not in skipped}
+
+    if replace:
+        state.replace_aliases(accepted)
+    elif accepted:
+        state.set_aliases(accepted)
+    changed = sum(1 for name, path in accepted.items() if aliases_data.get(name) != path)
+    removed = [name for name in aliases_data if name not in accepted] if replace else []
+    if replace:
+        aliases_data.clear()
+    aliases_data.update(accepted)
+
+    for name, reason in list(skipped.items())[:20]:
+        click.echo(f"  Skipped '{name}': {reason}")
+    if len(skipped) > 20:
+        click.echo(f"  ... and {len(skipped) - 20} more skipped")
+    click.echo(f"Imported {len(accepted)} aliases ({changed} new or changed{f', {len(removed)} removed' if removed else ''}).")
+    logger.info(f"Imported {len(accepted)} aliases from {import_path}, skipped {len(skipped)}.")
+    return not skipped
+
+
+def handle_export_aliases(aliases_data, export_path=None, pattern=None, regex=False) -> None:
+    """
+    Write aliases as JSON to `export_path`, or to stdout without one.
+    """
+    exported = filter_aliases(aliases_data, pattern, regex) if pattern else aliases_data
+    text = json.dumps(exported, indent=4)
+    if not export_path:
+        click.echo(text)
+        return
+    with open(export_path, "w") as f:
+        f.write(text + "\n")
+    click.echo(f"Exported {len(exported)} aliases to {export_path}.")
+
+
+def handle_prune_aliases(aliases_data, dry_run=False, yes=False) -> None:
+    """
+    Remove aliases whose target folder no longer exists.
+    """
+    missing = _missing_targets(aliases_data)
+    if not missing:
+        click.echo("All alias targets exist.")
+        return
+    click.echo(f"{len(missing)} aliases point at missing folders:")
+    for name, alias_path in missing.items():
+        click.echo(f"  {name} -> {alias_path}")
+    if dry_run:
+        return
+    if not yes and not prompts.confirm(message=f"Remove {len(missing)} aliases?", default=False, key="alias.prune"):
+        click.echo("Prune cancelled.")
+        return
+    state.remove_aliases(list(missing))
+    for name in missing:
+        del aliases_data[name]
+    logger.info(f"Pruned {len(missing)} aliases with missing targets.")
+    click.echo(f"Removed {len(missing)} aliases.")
 
 
 def handle_remove_alias(aliases_data, alias_name_to_remove):
@@ -86,17 +264,17 @@ def handle_remove_alias(aliases_data, alias_name_to_remove):
         click.echo(f"Error: Alias '{alias_name_to_remove}' does not exist.")
         return
 
-    confirm_remove = inquirer.confirm(
+    confirm_remove = prompts.confirm(
         message=f"Are you sure you want to remove the alias '{alias_name_to_remove}'?",
-        default=False
-    ).execute()
+        default=False, key="alias.remove"
+    )
     if not confirm_remove:
         logger.info(f"Alias removal cancelled for '{alias_name_to_remove}'.")
         click.echo("Alias removal cancelled.")
         return
 
     del aliases_data[alias_name_to_remove]
-    save_config(aliases_data, "alias")
+    state.remove_aliases([alias_name_to_remove])
     logger.info(f"Alias '{alias_name_to_remove}' removed.")
     click.echo(f"Alias '{alias_name_to_remove}' removed.")
 
@@ -141,7 +319,26 @@ def handle_add_alias(aliases_data, new_alias_name, path_to_alias):
         return
 
     aliases_data[new_alias_name] = path_to_alias
-    save_config(aliases_data, "alias")
+    state.set_aliases({new_alias_name: path_to_alias})
     logger.info(f"Alias '{new_alias_name}' added for '{path_to_alias}'.")
     import click # For user confirmation
-    click.echo(f"Alias '{new_alias_name}' added for '{path_to_alias}'.")
\ No newline at end of file
+    click.echo(f"Alias '{new_alias_name}' added for '{path_to_alias}'.")
+
+def add_aliases(aliases_data, new_aliases: dict) -> dict:
+    """
+    Add several aliases ({alias name: folder relative to BASE_PATH}) without
+    prompts, in a single write. Returns {alias name: error} for the aliases
+    that were not added.
+    """
+    errors, added = {}, {}
+    for alias_name, path_to_alias in new_aliases.items():
+        if not re.match(r"^[a-zA-Z0-9_-]+$", alias_name):
+            errors[alias_name] = "invalid name, only alphanumeric characters, hyphens and underscores are allowed"
+        elif alias_name in aliases_data:
+            errors[alias_name] = "already exists"
+        else:
+            aliases_data[alias_name] = added[alias_name] = path_to_alias
+            logger.info(f"Alias '{alias_name}' added for '{path_to_alias}'.")
+    if added:
+        state.set_aliases(added)
+    return errors
@@ -1,9 +1,22 @@
-import click, os, json, subprocess, logging, shutil # Added shutil
+import click, os, json, time, logging, shutil # Added shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from InquirerPy import inquirer
-from dotenv import load_dotenv
+import prompts
+from envfiles import load_cli_env
 
-from config import load_config
+from config import load_config, BASE_PATH
+from tracing import traced
+from ports import lease_port, release_port, render_compose_ports
+from executor import execute, CommandResult, CommandError
+from pyenv import sync_environment, write_requirements
+import dockerignore
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional, JSON specs work without it.
+    yaml = None
+
+SPEC_PARSE_ERRORS = (ValueError, yaml.YAMLError) if yaml else (ValueError,)
 
 logger = logging.getLogger(__name__)
 
@@ -11,8 +24,7 @@ logger = logging.getLogger(__name__)
 CLI_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 logger.debug(f"CLI_ROOT_DIR determined as: {CLI_ROOT_DIR}")
 
-load_dotenv() 
-BASE_PATH = os.getenv("BASE_PATH") # Used for new projects and potentially by resolve_folder
+load_cli_env()
 NPX_PATH = os.getenv("NPX_PATH") # Used by initCommand for Next.js
 
 # These are loaded globally in commands.py, but for create.py to use them if needed directly:
@@ -23,10 +35,12 @@ NPX_PATH = os.getenv("NPX_PATH") # Used by initCommand for Next.js
 # or they are passed in as args. `load_config` is used in `get_project_details`.
 
 
-def get_project_details(existing_project_name: str = None, existing_project_path: str = None):
+def get_project_details(existing_project_name: str = None, existing_project_path: str = None, name: str = None,
+                        description: str = None, author: str = None, project_type_key: str = None, use_docker: bool = None):
     """
     Prompt the user for project details and return them as a dictionary.
-    Can pre-fill project name and path for in-place initialization.
+    Can pre-fill project name and path for in-place initialization. Every
+    other argument that is given skips its prompt.
     """
     final_project_name = None
     project_path_to_use = None
@@ -42,7 +56,7 @@ def get_project_details(existing_project_name: str = None, existing_project_path
             click.echo("❌ Error: BASE_PATH is not configured. Please set it in your .env file.")
             return {}
 
-        project_name_input = inquirer.text(message="Enter the project name:").execute()
+        project_name_input = name if name is not None else prompts.text(message="Enter the project name:", key="init.name")
         if not project_name_input.strip():
             logger.error("Project name cannot be empty.")
             click.echo("❌ Project name cannot be empty.")
@@ -59,8 +73,8 @@ def get_project_details(existing_project_name: str = None, existing_project_path
         
         project_path_to_use = os.path.join(BASE_PATH, final_project_name)
 
-    project_description = inquirer.text(message="Enter the project description:", default="A new project").execute()
-    project_author = inquirer.text(message="Enter the author name:", default="Your Name").execute()
+    project_description = description if description is not None else prompts.text(message="Enter the project description:", default="A new project", key="init.description")
+    project_author = author if author is not None else prompts.text(message="Enter the author name:", default="Your Name", key="init.author")
 
     # Load Project Types from config.json
     cli_config = load_config() # Loads main config.json
@@ -75,7 +89,7 @@ def get_project_details(existing_project_name: str = None, existing_project_path
         click.echo("❌ Error: No project types found in CLI configuration.")
         return {}
 
-    # Prepare Choices for InquirerPy
+    # Choices for the project type prompt
     choices = [
         {"name": details.get("name", key), "value": key}
         for key, details in project_types_config.items() if isinstance(details, dict) # ensure details is a dict
@@ -86,11 +100,15 @@ def get_project_details(existing_project_name: str = None, existing_project_path
         return {}
 
     # Prompt for Project Type
-    chosen_project_type_key = inquirer.select(
-        message="Select project type:",
-        choices=choices,
-        default=choices[0]["value"] if choices else None
-    ).execute()
+    if project_type_key is not None:
+        chosen_project_type_key = project_type_key
+    else:
+        chosen_project_type_key = prompts.select(
+            message="Select project type:",
+            choices=choices,
+            default=choices[0]["value"] if choices else None,
+            key="init.type"
+        )
     
     selected_config = project_types_config.get(chosen_project_type_key)
     if not selected_config:
@@ -99,10 +117,12 @@ def get_project_details(existing_project_name: str = None, existing_project_path
         return {}
 
     # Prompt for Docker Usage
-    use_docker = inquirer.confirm(
-        message="Do you want to use Docker for this project environment?",
-        default=selected_config.get("defaultUseCompose", False) # Use default from config if available
-    ).execute()
+    if use_docker is None:
+        use_docker = prompts.confirm(
+            message="Do you want to use Docker for this project environment?",
+            default=selected_config.get("defaultUseCompose", False), # Use default from config if available
+            key="init.docker"
+        )
 
     return {
         "name": final_project_name,
@@ -111,29 +131,36 @@ def get_project_details(existing_project_name: str = None, existing_project_path
         "author": project_author,
         "chosen_project_type_key": chosen_project_type_key,
         "project_type_config": selected_config,
-        "use_docker": use_docker
+        "use_docker": use_docker,
+        "port": assign_port(project_path_to_use, selected_config),
     }
 
 
-def generate_project_json(project_details):
+def assign_port(project_path: str, project_type_config: dict, quiet: bool = False):
     """
-    Create the devCLI-project.json file with project details and commands.
+    Lease a unique port for project types that serve on one (`defaultPort` in
+    config.json). Returns None for types without a port.
+    """
+    default_port = project_type_config.get("defaultPort")
+    if not default_port:
+        return None
+    try:
+        port = lease_port(project_path, preferred=default_port)
+    except (RuntimeError, OSError) as e:
+        logger.error(f"Could not lease a port for {project_path}: {e}")
+        if not quiet:
+            click.echo(f"⚠️ Could not assign a port, falling back to {default_port}.")
+        return default_port
+    if port != default_port and not quiet:
+        click.echo(f"🔌 Port {default_port} is taken, assigned port {port} instead.")
+    logger.info(f"Assigned port {port} to {project_path}")
+    return port
+
+
+def build_project_json(project_details) -> dict:
+    """
+    Content of devCLI-project.json for the given project details.
     """
-    project_type = project_details["type"]
-    project_json = {
-        "name": project_details["name"],
-        "description": project_details["description"],
-        "author": project_details["author"],
-        "commands": {
-            "npm": "npm run dev" if project_type == "node" else None,
-            "docker": "docker-compose up --build" if project_type in ["python"] else None,
-        }
-    }
-
-    if not project_details or not project_details.get("name") or not project_details.get("project_type_config"):
-        logger.error("generate_project_json called with incomplete project_details.")
-        return
-
     project_name = project_details["name"]
     project_config = project_details["project_type_config"]
     use_docker_choice = project_details.get("use_docker", False)
@@ -158,7 +185,7 @@ def generate_project_json(project_details):
     actual_use_compose = bool(use_docker_choice and docker_compose_path_template and default_use_compose_from_config)
     logger.debug(f"Determined useCompose for {project_name}: {actual_use_compose} (use_docker_choice: {use_docker_choice}, docker_compose_path_template: {docker_compose_path_template}, default_use_compose_from_config: {default_use_compose_from_config})")
 
-    project_json_data = {
+    return {
         "name": project_name,
         "version": "0.1.0", # Default version
         "description": project_details.get("description", ""),
@@ -168,10 +195,23 @@ def generate_project_json(project_details):
         "use_docker_preference": use_docker_choice, # User's direct choice for Docker
         "useCompose": actual_use_compose, # Specific logic as per requirements
         "startup": startup_command,
+        "port": project_details.get("port"),
         # Store template paths for reference, only if Docker is chosen by user
         "dockerfile_template": project_config.get("dockerfilePath") if use_docker_choice else None,
         "docker_compose_template": docker_compose_path_template if use_docker_choice else None,
     }
+
+
+@traced("create.generate_project_json")
+def generate_project_json(project_details):
+    """
+    Create the devCLI-project.json file with project details and commands.
+    """
+    if not project_details or not project_details.get("name") or not project_details.get("project_type_config"):
+        logger.error("generate_project_json called with incomplete project_details.")
+        return
+
+    project_json_data = build_project_json(project_details)
     
     # The project_details['path'] is the absolute path to the project directory.
     # devCLI-project.json should be created inside this path.
@@ -193,6 +233,7 @@ def generate_project_json(project_details):
         click.echo(f"❌ Error writing devCLI-project.json: {e}")
 
 
+@traced("create.create_project_structure")
 def create_project_structure_from_command(project_details):
     project_name = project_details.get("name")
     project_root_path = project_details.get("path") # Absolute path to the project
@@ -210,20 +251,15 @@ def create_project_structure_from_command(project_details):
     logger.info(f"Executing initialization command in {project_root_path}: {init_command}")
     
     try:
-        if ".venv/bin/activate" in init_command:
-            full_command = f"bash -c 'cd \"{project_root_path}\" && {init_command}'"
-            logger.debug(f"Executing wrapped venv command: {full_command}")
-            process = subprocess.run(full_command, shell=True, check=True, capture_output=True, text=True)
-        else:
-            process = subprocess.run(init_command, shell=True, check=True, capture_output=True, text=True, cwd=project_root_path)
+        process = run_init_command(project_details)
 
         logger.info(f"Initialization command stdout for '{project_name}':\n{process.stdout}")
         if process.stderr:
             logger.info(f"Initialization command stderr for '{project_name}':\n{process.stderr}")
         click.echo(f"✅ Project files for '{project_name}' initialized successfully using command.")
 
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error during project files initialization for '{project_name}': {e.cmd}\nStdout: {e.stdout}\nStderr: {e.stderr}")
+    except CommandError as e:
+        logger.error(f"Error during project files initialization for '{project_name}': {e}\nStdout: {e.result.stdout}\nStderr: {e.result.stderr}")
         click.echo(f"❌ Error initializing project files for '{project_name}'. Check logs for details.")
         return # Stop if init command fails
 
@@ -232,39 +268,100 @@ def create_project_structure_from_command(project_details):
         click.echo(f"❌ An unexpected error occurred. Check logs for details.")
         return # Stop on other errors too
 
+    sync = provision_python(project_details)
+    if sync and sync["status"] == "failed":
+        click.echo(f"❌ Could not set up .venv for '{project_name}': {sync['error']}")
+    elif sync:
+        click.echo(f"🐍 .venv for '{project_name}' set up with {sync['tool']} in {sync['seconds']:.1f}s")
+
     # Docker file copying logic, executed after initCommand
     if project_details.get("use_docker"):
-        logger.debug(f"Attempting to copy Docker files for '{project_name}'. CLI_ROOT_DIR: {CLI_ROOT_DIR}")
-        dockerfile_template_rel_path = project_config.get("dockerfilePath")
-        docker_compose_template_rel_path = project_config.get("dockerComposePath")
-
-        if dockerfile_template_rel_path:
-            dockerfile_template_abs_path = os.path.join(CLI_ROOT_DIR, dockerfile_template_rel_path)
-            target_dockerfile_path = os.path.join(project_root_path, 'Dockerfile') # Standard name
-            if os.path.exists(dockerfile_template_abs_path):
-                try:
-                    shutil.copy(dockerfile_template_abs_path, target_dockerfile_path)
-                    logger.info(f"Copied Dockerfile from {dockerfile_template_abs_path} to {target_dockerfile_path}")
-                except Exception as e:
-                    logger.error(f"Error copying Dockerfile from {dockerfile_template_abs_path} to {target_dockerfile_path}: {e}")
-            else:
-                logger.warning(f"Dockerfile template not found at {dockerfile_template_abs_path}")
-        
-        if docker_compose_template_rel_path:
-            compose_template_abs_path = os.path.join(CLI_ROOT_DIR, docker_compose_template_rel_path)
-            target_compose_path = os.path.join(project_root_path, 'docker-compose.yml') # Standard name
-            if os.path.exists(compose_template_abs_path):
-                try:
-                    shutil.copy(compose_template_abs_path, target_compose_path)
-                    logger.info(f"Copied docker-compose.yml from {compose_template_abs_path} to {target_compose_path}")
-                except Exception as e:
-                    logger.error(f"Error copying docker-compose.yml from {compose_template_abs_path} to {target_compose_path}: {e}")
-            else:
-                logger.warning(f"docker-compose.yml template not found at {compose_template_abs_path}")
+        copy_docker_files(project_details)
+
+
+def run_init_command(project_details) -> CommandResult:
+    """
+    Run the project type's initCommand inside the project directory. Raises
+    CommandError when it fails.
+    """
+    init_command = project_details["project_type_config"]["initCommand"]
+    # Activation scripts are sourced, so those commands always go through bash.
+    command = ["bash", "-c", init_command] if ".venv/bin/activate" in init_command else init_command
+    return execute(command, cwd=project_details["path"], capture=True, check=True)
+
+
+def provision_python(project_details):
+    """
+    Create the .venv of Python templates (those with "pythonRequirements")
+    after their initCommand. Returns the sync report, or None for other types.
+    """
+    project_config = project_details["project_type_config"]
+    if "pythonRequirements" not in project_config:
+        return None
+    write_requirements(project_details["path"], project_config["pythonRequirements"])
+    return sync_environment(project_details["path"], python_version=project_config.get("pythonVersion"))
+
+
+def copy_docker_files(project_details) -> None:
+    """
+    Copy the Dockerfile and docker-compose.yml templates of the project type
+    into the project, map the leased port and write a .dockerignore.
+    """
+    project_root_path = project_details["path"]
+    project_config = project_details["project_type_config"]
+    logger.debug(f"Attempting to copy Docker files for '{project_details['name']}'. CLI_ROOT_DIR: {CLI_ROOT_DIR}")
+    dockerfile_template_rel_path = project_config.get("dockerfilePath")
+    docker_compose_template_rel_path = project_config.get("dockerComposePath")
+
+    if dockerfile_template_rel_path:
+        dockerfile_template_abs_path = os.path.join(CLI_ROOT_DIR, dockerfile_template_rel_path)
+        target_dockerfile_path = os.path.join(project_root_path, 'Dockerfile') # Standard name
+        if os.path.exists(dockerfile_template_abs_path):
+            try:
+                shutil.copy(dockerfile_template_abs_path, target_dockerfile_path)
+                logger.info(f"Copied Dockerfile from {dockerfile_template_abs_path} to {target_dockerfile_path}")
+            except Exception as e:
+                logger.error(f"Error copying Dockerfile from {dockerfile_template_abs_path} to {target_dockerfile_path}: {e}")
+        else:
+            logger.warning(f"Dockerfile template not found at {dockerfile_template_abs_path}")
+    
+    if docker_compose_template_rel_path:
+        compose_template_abs_path = os.path.join(CLI_ROOT_DIR, docker_compose_template_rel_path)
+        target_compose_path = os.path.join(project_root_path, 'docker-compose.yml') # Standard name
+        if os.path.exists(compose_template_abs_path):
+            try:
+                shutil.copy(compose_template_abs_path, target_compose_path)
+                logger.info(f"Copied docker-compose.yml from {compose_template_abs_path} to {target_compose_path}")
+                render_compose_file(target_compose_path, project_details.get("port"), project_config.get("containerPort"))
+            except Exception as e:
+                logger.error(f"Error copying docker-compose.yml from {compose_template_abs_path} to {target_compose_path}: {e}")
+        else:
+            logger.warning(f"docker-compose.yml template not found at {compose_template_abs_path}")
+
+    if dockerfile_template_rel_path or docker_compose_template_rel_path:
+        try:
+            dockerignore.write(project_root_path)
+        except OSError as e:
+            logger.error(f"Error writing .dockerignore for '{project_details['name']}': {e}")
+
+
+def render_compose_file(compose_path: str, port, container_port) -> None:
+    """
+    Write the leased host port into a copied docker-compose.yml.
+    """
+    if not port or not container_port:
+        return
+    with open(compose_path, "r") as f:
+        content = f.read()
+    rendered = render_compose_ports(content, port, container_port)
+    if rendered != content:
+        with open(compose_path, "w") as f:
+            f.write(rendered)
+        logger.info(f"Mapped host port {port} to container port {container_port} in {compose_path}")
 
 
 def create_project_files(project_details):
-    # CWD for create_project_files (and thus this function) is BASE_PATH from commands.py's init.
+    # Works on project_details["path"] only, the CWD of devCLI is left alone.
     # The project directory (project_details["name"] or project_details["path"]) itself is created in commands.py's init.
     create_project_structure_from_command(project_details)
 
@@ -324,3 +421,139 @@ def handle_in_place_init(target_dir: str, folder_name: str) -> bool:
     click.echo(f"Project '{folder_name}' has been configured.")
     return True
 
+
+class InitError(Exception):
+    pass
+
+
+def load_init_spec(spec_path: str) -> list:
+    """
+    Project definitions from a JSON or YAML spec. The spec is either a single
+    project, a list of projects or {"defaults": {...}, "projects": [...]}:
+
+        defaults: {type: simple-python-cli, author: Demo}
+        projects:
+          - name: demo-api
+            type: python-fastapi
+            docker: true
+            alias: api
+          - name: demo-cli
+    """
+    try:
+        with open(spec_path, "r") as f:
+            if spec_path.endswith((".yaml", ".yml")):
+                if not yaml:
+                    raise InitError("YAML specs need PyYAML (pip install pyyaml). Use a JSON spec instead.")
+                spec = yaml.safe_load(f)
+            else:
+                spec = json.load(f)
+    except OSError as e:
+        raise InitError(f"Could not read spec {spec_path}: {e}")
+    except SPEC_PARSE_ERRORS as e:
+        raise InitError(f"Could not parse spec {spec_path}: {e}")
+
+    defaults = {}
+    if isinstance(spec, dict) and "projects" in spec:
+        defaults, spec = spec.get("defaults") or {}, spec["projects"]
+    if isinstance(spec, dict):
+        spec = [spec]
+    if not isinstance(spec, list) or not all(isinstance(p, dict) for p in spec):
+        raise InitError(f"Spec {spec_path} must contain a project, a list of projects or a 'projects' list.")
+    return [{**defaults, **project} for project in spec]
+
+
+def build_project_details(spec: dict, project_types_config: dict) -> dict:
+    """
+    Non-interactive counterpart of get_project_details for one spec entry.
+    Raises InitError for missing or invalid fields.
+    """
+    name = str(spec.get("name") or "").strip()
+    if not name:
+        raise InitError("Every project needs a 'name'.")
+    if os.sep in name or name in (".", ".."):
+        raise InitError(f"Invalid project name '{name}'.")
+    type_key = spec.get("type")
+    if type_key not in project_types_config:
+        raise InitError(f"Unknown project type '{type_key}' for '{name}'. Available: {', '.join(project_types_config)}.")
+    if not BASE_PATH:
+        raise InitError("BASE_PATH is not configured. Please set it in your .env file.")
+
+    selected_config = project_types_config[type_key]
+    use_docker = spec.get("docker")
+    if use_docker is None:
+        use_docker = selected_config.get("defaultUseCompose", False)
+    return {
+        "name": name,
+        "path": os.path.join(BASE_PATH, name),
+        "description": spec.get("description", "A new project"),
+        "author": spec.get("author", "Your Name"),
+        "chosen_project_type_key": type_key,
+        "project_type_config": selected_config,
+        "use_docker": bool(use_docker),
+        "alias": spec.get("alias"),
+    }
+
+
+def scaffold_project(project_details: dict, run_init: bool = True) -> dict:
+    """
+    Create one project without prompts or output and return its report entry.
+    Everything runs against the project's own path, so several projects can be
+    scaffolded at the same time.
+    """
+    started = time.perf_counter()
+    report = {"name": project_details["name"], "path": project_details["path"], "type": project_details["chosen_project_type_key"]}
+    try:
+        os.makedirs(project_details["path"])
+    except FileExistsError:
+        report.update(status="failed", error="folder already exists")
+        return report
+    except OSError as e:
+        report.update(status="failed", error=str(e))
+        return report
+
+    try:
+        project_details["port"] = assign_port(project_details["path"], project_details["project_type_config"], quiet=True)
+        report["port"] = project_details["port"]
+        with open(os.path.join(project_details["path"], "devCLI-project.json"), "w") as f:
+            json.dump(build_project_json(project_details), f, indent=4)
+        if run_init and project_details["project_type_config"].get("initCommand"):
+            run_init_command(project_details)
+            sync = provision_python(project_details)
+            if sync:
+                report["python"] = {"tool": sync["tool"], "status": sync["status"], "seconds": round(sync["seconds"], 3)}
+                if sync["status"] == "failed":
+                    raise RuntimeError(f".venv: {sync['error']}")
+        if project_details.get("use_docker"):
+            copy_docker_files(project_details)
+        report["status"] = "created"
+    except CommandError as e:
+        logger.error(f"initCommand failed for '{project_details['name']}':\nStdout: {e.result.stdout}\nStderr: {e.result.stderr}")
+        report.update(status="failed", error=f"initCommand: {e}", stderr=(e.result.stderr or "")[-2000:])
+    except Exception as e:
+        logger.error(f"Scaffolding '{project_details['name']}' failed: {e}", exc_info=True)
+        report.update(status="failed", error=str(e))
+    if report["status"] == "failed":
+        # The folder is ours (makedirs above); left behind it would block a rerun and show up in `list`.
+        shutil.rmtree(project_details["path"], ignore_errors=True)
+        try:
+            release_port(project_details["path"])
+        except OSError as e:
+            logger.warning(f"Could not release the port of '{project_details['name']}': {e}")
+        report["cleaned_up"] = not os.path.exists(project_details["path"])
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    return report
+
+
+def scaffold_projects(details_list: list, jobs: int = 4, run_init: bool = True, on_result=None) -> list:
+    """
+    Scaffold several projects on a pool of `jobs` workers. Reports are
+    returned in the order of `details_list`.
+    """
+    reports = [None] * len(details_list)
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = {pool.submit(scaffold_project, details, run_init): i for i, details in enumerate(details_list)}
+        for future in as_completed(futures):
+            reports[futures[future]] = future.result()
+            if on_result:
+                on_result(reports[futures[future]])
+    return reports
@@ -0,0 +1,237 @@
+import os, json, sqlite3, fnmatch, logging
+
+import state
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+
+# Files that mark a project, per tag. utils.PROJECT_DETECTORS is built on these.
+TAG_MARKERS = {
+    "BUN": ["bun.lockb", "bun.lock", ".bunfig.toml"],
+    "NPM": ["package-lock.json", "yarn.lock", "pnpm-lock.yaml"],
+    "PYTHON": ["requirements.txt", ".venv", "pyproject.toml"],
+    "DOCKER": ["Dockerfile", "docker-compose.yml"],
+}
+PROJECT_MARKERS = {"devCLI-project.json", "package.json", ".git"}.union(*TAG_MARKERS.values())
+WORKSPACE_MARKERS = {"pnpm-workspace.yaml", "lerna.json"}
+
+DEFAULT_IGNORE = ["node_modules", ".venv", "venv", ".git", "__pycache__", ".next", "dist", "build", ".cache"]
+
+
+def tags_for(markers) -> list:
+    markers = set(markers)
+    return [tag for tag, files in TAG_MARKERS.items() if markers.intersection(files)]
+
+
+def _is_workspace_root(path: str, names: set) -> bool:
+    """
+    Monorepo roots are projects whose packages live further down the tree.
+    """
+    if names & WORKSPACE_MARKERS:
+        return True
+    if "package.json" in names:
+        try:
+            with open(os.path.join(path, "package.json"), "r") as f:
+                if "workspaces" in json.load(f):
+                    return True
+        except (OSError, ValueError, TypeError):
+            pass
+    if "pyproject.toml" in names:
+        try:
+            with open(os.path.join(path, "pyproject.toml"), "r") as f:
+                if "[tool.uv.workspace]" in f.read():
+                    return True
+        except OSError:
+            pass
+    return False
+
+
+def _ignored(name: str, rel_path: str, ignore: list) -> bool:
+    return any(fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(rel_path, pattern) for pattern in ignore)
+
+
+def scan_root(root: dict) -> tuple:
+    """
+    Walk one root iteratively with os.scandir (see walk_root).
+
+    Returns (projects, dir_mtimes), where dir_mtimes holds the mtime of every
+    directory that was read and is used to validate the cached index.
+    """
+    dir_mtimes = {}
+    projects = sorted(walk_root(root, dir_mtimes), key=lambda p: p["name"])
+    return projects, dir_mtimes
+
+
+def walk_root(root: dict, dir_mtimes: dict):
+    """
+    Yield the projects of one root as they are found.
+
+    Every direct child directory of the root is listed (as `list` always did);
+    deeper directories are listed only when they contain a project marker.
+    Descending stops at a project unless it is a workspace root, at `depth`
+    levels below the root, and at ignored names (pruned before being opened).
+    The mtime of every directory read is recorded in `dir_mtimes`.
+    """
+    root_path = root["path"]
+    max_depth = root.get("depth", 1)
+    ignore = root.get("ignore", DEFAULT_IGNORE)
+    prefix = f"{root['name']}/" if root.get("name") else ""
+
+    stack = [(root_path, "", 0)]
+    while stack:
+        path, rel_path, level = stack.pop()
+        try:
+            dir_mtimes[path] = os.stat(path).st_mtime_ns
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.debug(f"Skipping unreadable directory {path}: {e}")
+            continue
+
+        names = {e.name for e in entries}
+        markers = sorted(names & PROJECT_MARKERS)
+        is_project = bool(markers)
+        if level >= 1 and (level == 1 or is_project):
+            yield {
+                "name": prefix + rel_path,
+                "path": path,
+                "root": root_path,
+                "markers": markers,
+                "tags": tags_for(markers),
+            }
+
+        if level >= max_depth:
+            continue
+        if level >= 1 and is_project and not _is_workspace_root(path, names):
+            continue
+        for entry in entries:
+            child_rel = f"{rel_path}/{entry.name}" if rel_path else entry.name
+            if _ignored(entry.name, child_rel, ignore):
+                continue
+            try:
+                # Symlinked folders directly under a root are listed as before; deeper ones are not followed.
+                if entry.is_dir(follow_symlinks=(level == 0)):
+                    stack.append((entry.path, child_rel, level + 1))
+            except OSError:
+                continue
+
+
+def _index_is_fresh(index: dict, roots: list) -> bool:
+    if index.get("version") != INDEX_VERSION or index.get("roots") != roots:
+        return False
+    for path, mtime in index.get("dir_mtimes", {}).items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def build_index(roots: list) -> dict:
+    projects, dir_mtimes = [], {}
+    for root in roots:
+        with span("discovery.scan_root", root=root["path"]):
+            root_projects, root_mtimes = scan_root(root)
+        projects.extend(root_projects)
+        dir_mtimes.update(root_mtimes)
+    return {"version": INDEX_VERSION, "roots": roots, "dir_mtimes": dir_mtimes, "projects": projects}
+
+
+_validated_roots = None  # Roots whose stored index was checked by this process.
+_projects_cache = None
+
+
+def _validate_index(roots: list, refresh: bool = False) -> None:
+    """
+    Rescan the roots unless the index in the state store was built for the
+    same roots and none of the scanned directories changed since.
+    """
+    global _validated_roots, _projects_cache
+    if not refresh and _validated_roots == roots:
+        return
+    _projects_cache = None
+    if refresh or not _stored_index_is_fresh(roots):
+        logger.debug("Project index is stale or missing, rescanning roots.")
+        index = build_index(roots)
+        _projects_cache = index.pop("projects")
+        _store_index(_projects_cache, index)
+    _validated_roots = roots
+
+
+def _stored_index_is_fresh(roots: list) -> bool:
+    meta = state.get_setting(state.PROJECT_INDEX_SETTING)
+    with span("discovery.validate_index"):
+        return meta is not None and _index_is_fresh(meta, roots)
+
+
+def _store_index(projects: list, meta: dict) -> None:
+    try:
+        state.replace_projects(projects, meta)
+    except sqlite3.Error as e:
+        logger.warning(f"Could not store the project index in {state.STATE_DB_PATH}: {e}")
+
+
+def load_index(roots: list, refresh: bool = False) -> list:
+    """
+    Projects under all roots. The index is kept in the state store and reused
+    as long as none of the scanned directories changed.
+    """
+    global _projects_cache
+    _validate_index(roots, refresh)
+    if _projects_cache is None:
+        _projects_cache = state.load_projects()
+    return _projects_cache
+
+
+def iter_index(roots: list, refresh: bool = False):
+    """
+    Like load_index, but yields projects as soon as they are read from the
+    store or, when the index is stale, found by the scan (in scan order).
+    The rescanned index is stored once the scan completes.
+    """
+    global _validated_roots, _projects_cache
+    if not refresh and (_validated_roots == roots or _stored_index_is_fresh(roots)):
+        _validated_roots = roots
+        yield from (_projects_cache if _projects_cache is not None else state.iter_projects())
+        return
+    projects, dir_mtimes = [], {}
+    for root in roots:
+        with span("discovery.scan_root", root=root["path"]):
+            for project in walk_root(root, dir_mtimes):
+                projects.append(project)
+                yield project
+    projects.sort(key=lambda p: p["name"])
+    _store_index(projects, {"version": INDEX_VERSION, "roots": roots, "dir_mtimes": dir_mtimes})
+    _validated_roots, _projects_cache = roots, projects
+
+
+def lookup_project(roots: list, name: str):
+    """
+    find_project() against the stored index, using its indexes instead of
+    loading every project.
+    """
+    _validate_index(roots)
+    if _projects_cache is not None:
+        return find_project(_projects_cache, name)
+    return _pick(name, state.find_projects(name))
+
+
+def find_project(projects: list, name: str):
+    """
+    Look a project up by its index name, falling back to a unique folder name.
+    """
+    for project in projects:
+        if project["name"] == name:
+            return project
+    return _pick(name, [p for p in projects if os.path.basename(p["path"]) == name])
+
+
+def _pick(name: str, matches: list):
+    if len(matches) == 1 or (matches and matches[0]["name"] == name):
+        return matches[0]
+    if len(matches) > 1:
+        logger.warning(f"'{name}' matches several projects: {', '.join(p['name'] for p in matches)}")
+    return None
@@ -0,0 +1,184 @@
+import os, re, time, shutil, logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import state
+from gitstatus import git_dir
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Directories devCLI treats as rebuildable. Override with "cleanArtifacts" in config.json
+# (e.g. to add "dist" or "build" where those are never checked in).
+DEFAULT_ARTIFACTS = ["node_modules", ".next", ".venv", "__pycache__", ".turbo", ".parcel-cache", ".pytest_cache", ".mypy_cache"]
+# Files whose mtime counts as activity, besides git's index and reflog.
+ACTIVITY_FILES = ["devCLI-project.json", "package.json", "pyproject.toml", "requirements.txt", "docker-compose.yml", "Dockerfile"]
+DEFAULT_JOBS = min(16, (os.cpu_count() or 1) * 2)
+
+AGE = re.compile(r"^(\d+(?:\.\d+)?)\s*([smhdw]?)$")
+AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400, "": 86400}
+
+
+def parse_age(text: str) -> float:
+    """
+    Seconds in "30d", "12h", "2w", "90m" or "45s". A bare number means days.
+    """
+    match = AGE.match(text.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid age '{text}'. Use e.g. 30d, 12h or 2w.")
+    return float(match.group(1)) * AGE_UNITS[match.group(2)]
+
+
+def _disk_bytes(st: os.stat_result) -> int:
+    # Allocated blocks where the platform reports them, so sparse files are not overcounted.
+    blocks = getattr(st, "st_blocks", None)
+    return blocks * 512 if blocks is not None else st.st_size
+
+
+def walk(root: str, kinds: set, cached: dict) -> tuple:
+    """
+    Size of the tree below `root` without following symlinks.
+
+    Returns (total bytes, {artifact path: (kind, bytes)}, entries for the
+    size cache). A directory whose mtime matches its cached entry is not
+    listed again; only its subdirectories are checked. Its mtime changes when
+    entries are added, removed or renamed, but not when a file grows in
+    place, which is rare inside build artifacts (`--refresh` rescans).
+    """
+    total, artifacts, entries = 0, {}, {}
+    stack = [(root, None)]
+    while stack:
+        path, artifact = stack.pop()
+        try:
+            mtime = os.lstat(path).st_mtime_ns
+        except OSError:
+            continue
+        entry = cached.get(path)
+        if entry and entry[0] == mtime:
+            file_bytes, subdirs = entry[1], entry[2]
+        else:
+            file_bytes, subdirs = 0, []
+            try:
+                with os.scandir(path) as it:
+                    for e in it:
+                        try:
+                            if e.is_dir(follow_symlinks=False):
+                                subdirs.append(e.name)
+                            else:
+                                file_bytes += _disk_bytes(e.stat(follow_symlinks=False))
+                        except OSError:
+                            continue
+            except OSError as e:
+                logger.debug(f"Skipping unreadable directory {path}: {e}")
+                continue
+        entries[path] = (mtime, file_bytes, subdirs)
+        total += file_bytes
+        if artifact:
+            artifacts[artifact] = (artifacts[artifact][0], artifacts[artifact][1] + file_bytes)
+        for name in subdirs:
+            child = os.path.join(path, name)
+            child_artifact = artifact
+            if artifact is None and name in kinds:
+                child_artifact = child
+                artifacts[child] = (name, 0)
+            stack.append((child, child_artifact))
+    return total, artifacts, entries
+
+
+def top_level(projects: list) -> list:
+    """
+    Projects not nested in another listed project (workspace packages are
+    counted with their workspace).
+    """
+    # Sorted with a trailing separator, everything below a path directly follows it.
+    kept, last = [], None
+    for project in sorted(projects, key=lambda p: os.path.join(os.path.normpath(p["path"]), "")):
+        path = os.path.join(os.path.normpath(project["path"]), "")
+        if last is None or not path.startswith(last):
+            kept.append(project)
+            last = path
+    return kept
+
+
+def last_active(path: str, run_times: dict) -> float:
+    """
+    Latest sign of use: a devCLI run in the project, a git operation, or a
+    change of its manifest. The directory's own mtime is not used, since
+    installing or deleting artifacts changes it.
+    """
+    times = [t for cwd, t in run_times.items() if cwd == path or cwd.startswith(path + os.sep)]
+    directory = git_dir(path)
+    candidates = [os.path.join(path, name) for name in ACTIVITY_FILES]
+    if directory:
+        candidates += [os.path.join(directory, "index"), os.path.join(directory, "logs", "HEAD")]
+    for candidate in candidates:
+        try:
+            times.append(os.stat(candidate).st_mtime)
+        except OSError:
+            continue
+    return max(times, default=0.0)
+
+
+def project_usage(project: dict, kinds: set, refresh: bool = False, run_times: dict = None) -> dict:
+    path = os.path.normpath(project["path"])
+    with span("diskusage.walk", project=project["name"]):
+        cached = {} if refresh else state.load_dir_sizes(path)
+        total, artifacts, entries = walk(path, kinds, cached)
+    try:
+        state.replace_dir_sizes(path, entries)
+    except Exception as e:  # sqlite3.Error; the sizes are still valid without the cache.
+        logger.warning(f"Could not cache directory sizes of {path}: {e}")
+    return {
+        "name": project["name"],
+        "path": path,
+        "bytes": total,
+        "artifact_bytes": sum(size for _, size in artifacts.values()),
+        "artifacts": [{"path": p, "kind": kind, "bytes": size} for p, (kind, size) in sorted(artifacts.items())],
+        "last_active": last_active(path, run_times or {}),
+    }
+
+
+def analyze(projects: list, kinds, jobs: int = DEFAULT_JOBS, refresh: bool = False):
+    """
+    Yield project_usage() of every top-level project as the walks finish,
+    walking up to `jobs` projects at once.
+    """
+    kinds, run_times = set(kinds), state.last_run_times()
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = [pool.submit(project_usage, project, kinds, refresh, run_times) for project in top_level(projects)]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+def running_paths() -> list:
+    return [entry["cwd"] for entry in state.active_runs() if entry.get("cwd")]
+
+
+def clean_candidates(usages, kinds, older_than: float) -> list:
+    """
+    Artifacts of the given kinds in projects inactive for `older_than`
+    seconds and not running under devCLI.
+    """
+    cutoff, running = time.time() - older_than, running_paths()
+    candidates = []
+    for usage in usages:
+        if usage["last_active"] > cutoff:
+            continue
+        if any(cwd == usage["path"] or cwd.startswith(usage["path"] + os.sep) for cwd in running):
+            logger.info(f"Skipping {usage['name']}: it is running.")
+            continue
+        candidates += [dict(artifact, project=usage["name"], last_active=usage["last_active"])
+                       for artifact in usage["artifacts"] if artifact["kind"] in kinds]
+    return candidates
+
+
+def remove(artifact: dict) -> tuple:
+    """
+    (ok, error) of deleting an artifact directory. Symlinks are never followed.
+    """
+    try:
+        if os.path.islink(artifact["path"]):
+            return False, "is a symlink"
+        shutil.rmtree(artifact["path"])
+        return True, None
+    except OSError as e:
+        return False, str(e)
@@ -0,0 +1,174 @@
+import os, re, logging
+
+from utils import PROJECT_DETECTORS
+
+logger = logging.getLogger(__name__)
+
+FILE_NAME = ".dockerignore"
+BEGIN_MARKER = "# --- devCLI: generated rules (edit below the end marker to override) ---"
+END_MARKER = "# --- devCLI: end ---"
+
+# Rules for every project, then per tag of PROJECT_DETECTORS. Only directories
+# a Dockerfile rebuilds itself or never needs; `.env` stays, builds read it.
+COMMON_RULES = [".git", "**/.DS_Store", "**/*.log"]
+TAG_RULES = {
+    "NPM": ["**/node_modules", ".next", ".turbo", ".parcel-cache", "coverage"],
+    "BUN": ["**/node_modules", ".next", ".turbo"],
+    "PYTHON": [".venv", "venv", "**/__pycache__", "**/*.pyc", ".pytest_cache", ".mypy_cache"],
+    "DOCKER": ["docker-compose*.yml"],
+}
+
+
+def detect_tags(project_dir: str) -> list:
+    return [tag for tag, detect in PROJECT_DETECTORS.items() if detect(project_dir)]
+
+
+def generated_rules(tags: list) -> list:
+    rules = list(COMMON_RULES)
+    for tag in tags:
+        rules += [rule for rule in TAG_RULES.get(tag, []) if rule not in rules]
+    return rules
+
+
+def _read(project_dir: str) -> str:
+    try:
+        with open(os.path.join(project_dir, FILE_NAME), "r") as f:
+            return f.read()
+    except FileNotFoundError:
+        return ""
+
+
+def parse_rules(text: str) -> list:
+    """
+    The patterns of a .dockerignore, without comments and blank lines.
+    """
+    return [line.strip() for line in text.splitlines() if line.strip() and not line.strip().startswith("#")]
+
+
+def merge(existing: str, rules: list) -> str:
+    """
+    Put the generated block at the top of an existing .dockerignore. Later
+    rules win in Docker, so the project's own lines (including `!` exceptions)
+    keep overriding the generated ones. A previous generated block is replaced.
+    """
+    lines = existing.splitlines()
+    if BEGIN_MARKER in lines and END_MARKER in lines[lines.index(BEGIN_MARKER):]:
+        start = lines.index(BEGIN_MARKER)
+        end = lines.index(END_MARKER, start)
+        lines = lines[:start] + lines[end + 1:]
+    own = set(line.strip() for line in lines)
+    block = [BEGIN_MARKER] + [rule for rule in rules if rule not in own] + [END_MARKER]
+    while lines and not lines[0].strip():
+        lines.pop(0)
+    return "\n".join(block + lines) + "\n"
+
+
+def plan(project_dir: str, tags: list = None) -> tuple:
+    """
+    (current, updated) content of the project's .dockerignore.
+    """
+    existing = _read(project_dir)
+    return existing, merge(existing, generated_rules(detect_tags(project_dir) if tags is None else tags))
+
+
+def write(project_dir: str, tags: list = None) -> bool:
+    """
+    Generate or update the project's .dockerignore. Returns True when the file changed.
+    """
+    existing, content = plan(project_dir, tags)
+    if content == existing:
+        return False
+    path = os.path.join(project_dir, FILE_NAME)
+    with open(path, "w") as f:
+        f.write(content)
+    logger.info(f"Wrote {path}")
+    return True
+
+
+def _compile(pattern: str) -> re.Pattern:
+    """
+    Docker's pattern syntax as a regex: `*` and `?` stay within one path
+    segment, `**` spans any number of them. A pattern also matches everything
+    below the paths it matches, as excluding a directory excludes its content.
+    """
+    pattern = os.path.normpath(pattern.lstrip("/")).replace(os.sep, "/")
+    regex, i = "", 0
+    while i < len(pattern):
+        c = pattern[i]
+        if pattern.startswith("**/", i):
+            regex, i = regex + "(?:.*/)?", i + 3
+            continue
+        if pattern.startswith("**", i):
+            regex, i = regex + ".*", i + 2
+            continue
+        if c == "*":
+            regex += "[^/]*"
+        elif c == "?":
+            regex += "[^/]"
+        elif c == "[":
+            close = pattern.find("]", i + 1)
+            if close == -1:
+                regex += re.escape(c)
+            else:
+                regex += "[" + pattern[i + 1:close].replace("\\", "\\\\") + "]"
+                i = close
+        elif c == "\\" and i + 1 < len(pattern):
+            regex, i = regex + re.escape(pattern[i + 1]), i + 1
+        else:
+            regex += re.escape(c)
+        i += 1
+    return re.compile(regex + "(?:/.*)?")
+
+
+def compile_rules(rules: list) -> list:
+    """
+    [(negated, regex)] in file order.
+    """
+    compiled = []
+    for rule in rules:
+        negated = rule.startswith("!")
+        pattern = rule[1:].strip() if negated else rule
+        if pattern:
+            compiled.append((negated, _compile(pattern)))
+    return compiled
+
+
+def is_excluded(compiled: list, rel_path: str) -> bool:
+    excluded = False
+    for negated, regex in compiled:
+        if regex.fullmatch(rel_path):
+            excluded = not negated
+    return excluded
+
+
+def context_size(project_dir: str, rules: list) -> tuple:
+    """
+    (bytes, files) docker would send as build context with these ignore
+    rules. Excluded directories are not walked unless an exception (`!`)
+    could re-include something inside them. Symlinks are sent as links.
+    """
+    compiled = compile_rules(rules)
+    has_exceptions = any(negated for negated, _ in compiled)
+    total, files = 0, 0
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            with os.scandir(os.path.join(project_dir, rel_dir)) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.debug(f"Skipping unreadable directory {rel_dir or project_dir}: {e}")
+            continue
+        for entry in entries:
+            rel = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            excluded = is_excluded(compiled, rel)
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not excluded or has_exceptions:
+                        stack.append(rel)
+                elif not excluded:
+                    total += entry.stat(follow_symlinks=False).st_size
+                    files += 1
+            except OSError:
+                continue
+    return total, files
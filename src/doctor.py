@@ -0,0 +1,225 @@
+import os, re, json, shlex, shutil, logging
+from concurrent.futures import ThreadPoolExecutor
+
+from executor import execute, SHELL_BUILTINS
+from runstate import locked_json_file, read_json_file
+from envfiles import project_env
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.expanduser(os.path.join("~", ".devcli", "cache", "doctor.json"))
+VERSION_TIMEOUT = 15.0
+
+# (variable in .env, program): the binaries .env.sample asks for, plus git and
+# uv, which devCLI finds on PATH (uv also through UV_PATH).
+BINARIES = [
+    ("NPX_PATH", "npx"),
+    ("NPM_PATH", "npm"),
+    ("BUN_PATH", "bun"),
+    ("DOCKER_PATH", "docker"),
+    ("VSCODE_PATH", "code"),
+    (None, "git"),
+    ("UV_PATH", "uv"),
+]
+# Looked up on PATH when the variable is empty, so an empty variable is fine.
+PATH_FALLBACK = {None, "UV_PATH"}
+# Missing entirely is only a warning: not every setup uses them.
+OPTIONAL = {"BUN_PATH", "DOCKER_PATH", "VSCODE_PATH", "UV_PATH"}
+
+# Commands a shell runs without looking them up on PATH.
+SHELL_WORDS = SHELL_BUILTINS | {"echo", "test", "[", "true", "false", "exit", "export", "trap", "wait", "command", "env"}
+
+ASSIGNMENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*=")
+VERSION = re.compile(r"(\d+\.\d+(?:\.\d+)?)")
+OK, WARN, ERROR = "ok", "warn", "error"
+
+_cache = None
+
+
+def _load_cache() -> dict:
+    global _cache
+    if _cache is None:
+        _cache = read_json_file(CACHE_PATH, {})
+    return _cache
+
+
+def _fingerprint(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def resolve_binary(value: str):
+    """
+    Absolute path of a configured binary: a path as given, a bare name via PATH.
+    None when it does not exist.
+    """
+    if not value:
+        return None
+    if os.sep in value or (os.altsep and os.altsep in value):
+        return os.path.abspath(os.path.expanduser(value)) if os.path.exists(os.path.expanduser(value)) else None
+    return shutil.which(value)
+
+
+def _record(check: str, target: str, status: str, detail: str, **extra) -> dict:
+    return dict({"check": check, "target": target, "status": status, "detail": detail}, **extra)
+
+
+def check_binary(variable, program: str, refresh: bool = False) -> dict:
+    """
+    Existence, executability and `--version` of a binary from .env (or of
+    `program` on PATH). The version output is cached on the binary's mtime
+    and size, so it only runs again after the binary changed.
+    """
+    target = variable or program
+    configured = os.getenv(variable) if variable else None
+    if configured:
+        path = resolve_binary(configured)
+        if not path:
+            return _record("binary", target, ERROR, f"{configured} does not exist")
+        status, detail = OK, None
+    else:
+        path = shutil.which(program)
+        if not path:
+            reason = f"not set in .env and '{program}' is not on PATH" if variable else "not on PATH"
+            return _record("binary", target, WARN if variable in OPTIONAL else ERROR, reason)
+        status = OK if variable in PATH_FALLBACK else WARN
+        detail = None if status == OK else f"not set in .env; '{program}' found at {path}"
+    if not os.access(path, os.X_OK) or os.path.isdir(path):
+        return _record("binary", target, ERROR, f"{path} is not executable", path=path)
+
+    fingerprint = _fingerprint(path)
+    cached = _load_cache().get(path)
+    if not refresh and cached and cached.get("fingerprint") == fingerprint:
+        version, error = cached.get("version"), cached.get("error")
+    else:
+        result = execute([path, "--version"], capture=True, merge_stderr=True, timeout=VERSION_TIMEOUT)
+        match = VERSION.search(result.stdout or "") if result.ok else None
+        version = match.group(1) if match else None
+        error = None if match else (result.describe() if not result.ok else "no version in '--version' output")
+        _load_cache()[path] = {"fingerprint": fingerprint, "version": version, "error": error}
+    if error:
+        return _record("binary", target, ERROR, f"{path}: {error}", path=path)
+    return _record("binary", target, status, detail or f"{path} ({version})", path=path, version=version)
+
+
+def check_roots(roots: list) -> list:
+    if not roots:
+        return [_record("config", "BASE_PATH", ERROR, "BASE_PATH is not set and config.json has no roots")]
+    return [_record("config", root["path"], OK if os.path.isdir(root["path"]) else ERROR,
+                    "project root" if os.path.isdir(root["path"]) else "project root does not exist") for root in roots]
+
+
+def check_templates(templates: dict, root: str) -> list:
+    """
+    The Dockerfile and compose paths of every project type exist, and their
+    initCommand starts with a program that can be found.
+    """
+    records = []
+    for key, template in templates.items():
+        if not isinstance(template, dict):
+            records.append(_record("template", key, ERROR, "not an object"))
+            continue
+        problems = []
+        for field in ("dockerfilePath", "dockerComposePath"):
+            if template.get(field) and not os.path.isfile(os.path.join(root, template[field])):
+                problems.append(f"{field} {template[field]} does not exist")
+        if not template.get("initCommand"):
+            problems.append("no initCommand")
+        else:
+            problem = command_problem(template["initCommand"], root, os.environ.get("PATH"))
+            if problem:
+                problems.append(f"initCommand: {problem}")
+        records.append(_record("template", key, ERROR if problems else OK, "; ".join(problems) or "ok"))
+    return records
+
+
+def _first_word(command: str):
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        return None
+    for word in words:
+        if not ASSIGNMENT.match(word):  # Skip FOO=bar prefixes.
+            return word
+    return None
+
+
+def command_problem(command: str, cwd: str, path_var: str = None):
+    """
+    Why the program a command line starts with cannot run, or None. Shell
+    builtins and unparsable lines are not checked.
+    """
+    word = _first_word(command)
+    if not word or word in SHELL_WORDS or any(c in word for c in "$`("):
+        return None
+    if "/" in word:
+        program = os.path.normpath(os.path.join(cwd, os.path.expanduser(word)))
+        if not os.path.exists(program):
+            return f"{word} does not exist"
+        if not os.access(program, os.X_OK):
+            return f"{word} is not executable"
+        return None
+    if not shutil.which(word, path=path_var):
+        return f"'{word}' is not on PATH"
+    return None
+
+
+def check_project(project: dict) -> dict:
+    path = project["path"]
+    try:
+        with open(os.path.join(path, "devCLI-project.json"), "r") as f:
+            startup = json.load(f).get("startup")
+    except (OSError, ValueError) as e:
+        return _record("startup", project["name"], ERROR, f"devCLI-project.json: {e}")
+    if not startup:
+        return _record("startup", project["name"], WARN, "no startup command")
+    problem = command_problem(startup, path, project_env(path).get("PATH", os.environ.get("PATH")))
+    return _record("startup", project["name"], ERROR if problem else OK, problem or startup)
+
+
+def run_checks(projects: list, roots: list, templates: dict, template_root: str, jobs: int = 8, refresh: bool = False) -> list:
+    """
+    Every check, run concurrently. Binary results are written to the cache.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        binary_futures = [pool.submit(check_binary, variable, program, refresh) for variable, program in BINARIES]
+        project_futures = [pool.submit(check_project, project) for project in projects
+                           if "devCLI-project.json" in project.get("markers", ["devCLI-project.json"])]
+        records = [future.result() for future in binary_futures]
+        records += check_roots(roots)
+        records += check_templates(templates, template_root)
+        records += [future.result() for future in project_futures]
+    _store_cache()
+    return records
+
+
+def _store_cache() -> None:
+    try:
+        with locked_json_file(CACHE_PATH, {}) as cache:
+            cache.update(_load_cache())
+    except OSError as e:
+        logger.warning(f"Could not write {CACHE_PATH}: {e}")
+
+
+def preflight(variable: str):
+    """
+    Why the binary configured in `variable` cannot run, or None. Only stats
+    the file and reads the doctor cache, so it is cheap enough to run before
+    every command; a binary `dev doctor` found broken fails here until it
+    changes.
+    """
+    configured = os.getenv(variable)
+    if not configured:
+        return f"{variable} is not set in .env. Run 'dev doctor' to check your setup."
+    path = resolve_binary(configured)
+    if not path:
+        return f"{variable}={configured} does not exist. Run 'dev doctor' to check your setup."
+    if not os.access(path, os.X_OK):
+        return f"{variable}={configured} is not executable."
+    cached = _load_cache().get(path)
+    if cached and cached.get("error") and cached.get("fingerprint") == _fingerprint(path):
+        return f"{variable}={configured} failed its last check: {cached['error']}"
+    return None
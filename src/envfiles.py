@@ -0,0 +1,118 @@
+import os, re, json, logging
+from dotenv import dotenv_values, find_dotenv
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Project layers, lowest precedence first. devCLI's own .env comes before them.
+PROJECT_ENV_FILES = [".env", ".env.local"]
+PROJECT_JSON = "devCLI-project.json"
+
+REFERENCE = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)(?::-([^}]*))?\}")
+
+_cli_env = None
+_project_cache = {}  # project_dir -> (stamp, layers)
+
+
+def _parse_cli_env() -> dict:
+    # find_dotenv() searches upwards from this file, like the load_dotenv() calls it replaces.
+    path = find_dotenv()
+    with span("envfiles.load_cli_env"):
+        return {k: v for k, v in dotenv_values(path).items() if v is not None} if path else {}
+
+
+def load_cli_env() -> dict:
+    """
+    Parse devCLI's own .env once per process and export it into os.environ
+    (existing variables win, as with load_dotenv). Returns the parsed values.
+    """
+    global _cli_env
+    if _cli_env is None:
+        _cli_env = _parse_cli_env()
+        for key, value in _cli_env.items():
+            os.environ.setdefault(key, value)
+    return _cli_env
+
+
+def _stamp(project_dir: str) -> tuple:
+    stamp = []
+    for name in PROJECT_ENV_FILES + [PROJECT_JSON]:
+        try:
+            st = os.stat(os.path.join(project_dir, name))
+            stamp.append((name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            stamp.append((name, None, None))
+    return tuple(stamp)
+
+
+def _json_env(project_dir: str) -> dict:
+    try:
+        with open(os.path.join(project_dir, PROJECT_JSON), "r") as f:
+            block = json.load(f).get("env", {})
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(block, dict):
+        logger.warning(f"Ignoring 'env' in {PROJECT_JSON} of {project_dir}: expected an object.")
+        return {}
+    return {k: (json.dumps(v) if isinstance(v, bool) else str(v)) for k, v in block.items() if v is not None}
+
+
+def _read_layers(project_dir: str) -> list:
+    layers = []
+    for name in PROJECT_ENV_FILES:
+        path = os.path.join(project_dir, name)
+        if os.path.isfile(path):
+            # References are expanded after merging, so a layer can use values of the layers below it.
+            values = dotenv_values(path, interpolate=False)
+            layers.append((name, {k: v for k, v in values.items() if v is not None}))
+    layers.append((PROJECT_JSON, _json_env(project_dir)))
+    return layers
+
+
+def _project_layers(project_dir: str) -> list:
+    """
+    Parsed project layers, reread only when one of the files changed.
+    """
+    project_dir = os.path.abspath(project_dir)
+    stamp = _stamp(project_dir)
+    cached = _project_cache.get(project_dir)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    with span("envfiles.read_project_env", project=os.path.basename(project_dir)):
+        layers = _read_layers(project_dir)
+    _project_cache[project_dir] = (stamp, layers)
+    return layers
+
+
+def _expand(value: str, scope: dict) -> str:
+    return REFERENCE.sub(lambda m: scope.get(m.group(1)) or (m.group(2) or ""), value)
+
+
+def resolve_env(project_dir: str, port=None) -> dict:
+    """
+    {name: (value, source)} of every variable devCLI sets for the project:
+    devCLI's .env, then the project's .env, .env.local and the "env" block of
+    devCLI-project.json, later layers winning. ${VAR} and ${VAR:-default}
+    refer to earlier layers or the inherited environment.
+
+    The project's leased `port` is exported as PORT. It can be referenced by
+    every layer and wins over them, since that is the port devCLI checked
+    and mapped.
+    """
+    resolved = {k: (v, "devCLI .env") for k, v in load_cli_env().items()}
+    lease = {"PORT": (str(port), "port lease")} if port else {}
+    resolved.update(lease)
+    for source, values in _project_layers(project_dir):
+        for key, value in values.items():
+            scope = dict(os.environ, **{k: v for k, (v, _) in resolved.items()})
+            resolved[key] = (_expand(value, scope), source)
+    resolved.update(lease)
+    return resolved
+
+
+def project_env(project_dir: str, port=None) -> dict:
+    """
+    Environment overlay for the project's child processes (see executor's `env`).
+    """
+    return {k: v for k, (v, _) in resolve_env(project_dir, port).items()}
@@ -0,0 +1,234 @@
+import os, sys, time, shlex, signal, logging, subprocess
+from dataclasses import dataclass
+from typing import Optional, Union
+
+from tracing import span
+from runstate import record_process, forget_process
+
+logger = logging.getLogger(__name__)
+
+# A command string containing any of these needs a shell; everything else is split into argv.
+SHELL_CHARACTERS = set("|&;<>()$`*?[]{}~\n")
+SHELL_BUILTINS = {".", "source", "cd", "export", "set", "unset", "alias", "exec", "eval"}
+
+# Where commands sharing the terminal write their stdout (None: inherited).
+# `--output json|ndjson` points it at stderr, so stdout only carries records.
+child_stdout = None
+
+
+@dataclass
+class CommandResult:
+    """
+    Outcome of a command run through `execute`.
+    """
+    command: Union[str, list]
+    cwd: Optional[str] = None
+    returncode: Optional[int] = None
+    stdout: Optional[str] = None
+    stderr: Optional[str] = None
+    started_at: float = 0.0
+    seconds: float = 0.0
+    timed_out: bool = False
+    cancelled: bool = False
+    error: Optional[str] = None  # Set when the command could not be started at all.
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not (self.timed_out or self.cancelled)
+
+    @property
+    def text(self) -> str:
+        return self.command if isinstance(self.command, str) else shlex.join(str(part) for part in self.command)
+
+    def describe(self) -> str:
+        if self.error:
+            return self.error
+        if self.timed_out:
+            return f"'{self.text}' timed out after {self.seconds:.1f}s"
+        if self.cancelled:
+            return f"'{self.text}' was cancelled"
+        return f"'{self.text}' failed with exit code {self.returncode}"
+
+
+class CommandError(Exception):
+    """
+    Raised by `execute(check=True)` when a command fails or cannot be started.
+    """
+    def __init__(self, result: CommandResult):
+        super().__init__(result.describe())
+        self.result = result
+
+    @property
+    def returncode(self):
+        return self.result.returncode
+
+
+def needs_shell(command: str) -> bool:
+    if sys.platform.startswith("win"):
+        return True  # .cmd/.bat shims such as npm.cmd only resolve through the shell.
+    if any(c in SHELL_CHARACTERS for c in command):
+        return True
+    try:
+        argv = shlex.split(command)
+    except ValueError:
+        return True
+    return not argv or argv[0] in SHELL_BUILTINS or "=" in argv[0]
+
+
+def prepare(command, shell: bool = None) -> tuple:
+    """
+    (args, shell) for Popen. Strings are split into argv unless they use shell
+    syntax; lists are never run through a shell unless asked to.
+    """
+    if isinstance(command, str):
+        if shell is None:
+            shell = needs_shell(command)
+        return (command if shell else shlex.split(command)), shell
+    argv = [str(part) for part in command]
+    if shell:
+        return shlex.join(argv), True
+    return argv, False
+
+
+def _session_kwargs(new_session: bool) -> dict:
+    if not new_session:
+        return {}
+    if sys.platform.startswith("win"):
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def terminate(process: subprocess.Popen, timeout: float = 3.0, group: bool = True) -> None:
+    """
+    Stop a process and, when it leads its own session, everything it spawned:
+    SIGTERM first, SIGKILL after `timeout` seconds.
+    """
+    def send(sig):
+        try:
+            if group and hasattr(os, "killpg"):
+                os.killpg(process.pid, sig)
+            elif sig == signal.SIGTERM:
+                process.terminate()
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+
+    send(signal.SIGTERM)
+    try:
+        process.wait(timeout)
+    except subprocess.TimeoutExpired:
+        send(getattr(signal, "SIGKILL", signal.SIGTERM))
+        process.wait()
+
+
+def _start_error(argv, cwd, error: OSError) -> str:
+    if cwd and not os.path.isdir(cwd):
+        return f"Working directory {cwd} does not exist"
+    if isinstance(error, FileNotFoundError):
+        program = argv if isinstance(argv, str) else argv[0]
+        return f"Command not found: {program} (is it installed and in your PATH?)"
+    return f"Could not start command: {error}"
+
+
+def execute(command, cwd: str = None, env: dict = None, timeout: float = None, capture: bool = False,
+            merge_stderr: bool = False, check: bool = False, shell: bool = None, project: str = None,
+            cancel=None, input: str = None) -> CommandResult:
+    """
+    Run a command to completion without touching the process-wide cwd.
+
+    `env` is an overlay on top of os.environ. With `capture`, stdout and
+    stderr are returned as text (`merge_stderr` folds stderr into stdout);
+    otherwise the command shares the terminal. `project` records the process
+    in the run state for `dev ps`/`dev stats` while it runs. A `cancel` event
+    (threading.Event) or an expired `timeout` stops the command together with
+    its children. With `check`, failures raise CommandError.
+    """
+    args, use_shell = prepare(command, shell)
+    result = CommandResult(command=command, cwd=cwd, started_at=time.time())
+    # Cancellable commands get their own session so their children can be stopped with them.
+    # Others stay in our process group and receive Ctrl+C together with devCLI.
+    new_session = cancel is not None
+    kwargs = _session_kwargs(new_session)
+    if capture:
+        kwargs["stdout"] = subprocess.PIPE
+        kwargs["stderr"] = subprocess.STDOUT if merge_stderr else subprocess.PIPE
+    elif child_stdout is not None:
+        kwargs["stdout"] = child_stdout
+    if input is not None:
+        kwargs["stdin"] = subprocess.PIPE
+
+    started = time.perf_counter()
+    with span("child_process", command=result.text):
+        try:
+            process = subprocess.Popen(args, shell=use_shell, cwd=cwd, env=dict(os.environ, **env) if env else None,
+                                       text=True, **kwargs)
+        except OSError as e:
+            result.error = _start_error(args, cwd, e)
+            result.seconds = time.perf_counter() - started
+            logger.debug(result.error)
+            if check:
+                raise CommandError(result)
+            return result
+
+        if project:
+            try:
+                record_process(project, process.pid, result.text, cwd or os.getcwd())
+            except OSError as e:
+                logger.warning(f"Could not record process {process.pid} for '{project}': {e}")
+        try:
+            result.stdout, result.stderr = _wait(process, result, timeout, cancel, input, new_session)
+        finally:
+            if project:
+                try:
+                    forget_process(process.pid)
+                except OSError as e:
+                    logger.warning(f"Could not remove process {process.pid} from run state: {e}")
+
+    result.returncode = process.returncode
+    result.seconds = time.perf_counter() - started
+    if not result.ok:
+        logger.debug(f"{result.describe()} (cwd: {cwd or os.getcwd()})")
+        if check:
+            raise CommandError(result)
+    return result
+
+
+def _wait(process, result, timeout, cancel, input, group) -> tuple:
+    deadline = time.monotonic() + timeout if timeout else None
+    while True:
+        step = 0.1 if cancel is not None else None
+        if deadline is not None:
+            remaining = max(deadline - time.monotonic(), 0)
+            step = remaining if step is None else min(step, remaining)
+        try:
+            return process.communicate(input, timeout=step)
+        except subprocess.TimeoutExpired:
+            input = None  # Already sent; communicate() must not get it twice.
+            if cancel is not None and cancel.is_set():
+                result.cancelled = True
+            elif deadline is not None and time.monotonic() >= deadline:
+                result.timed_out = True
+            else:
+                continue
+            terminate(process, group=group)
+            return process.communicate()
+
+
+def spawn(command, cwd: str = None, env: dict = None, shell: bool = None, new_session: bool = False,
+          quiet: bool = False, output=None) -> subprocess.Popen:
+    """
+    Start a long-running command (an editor, a dev server under `dev watch`,
+    a detached run) and return immediately. `quiet` discards its output;
+    `output` is a file that receives stdout and stderr instead.
+    """
+    args, use_shell = prepare(command, shell)
+    kwargs = _session_kwargs(new_session)
+    if quiet:
+        kwargs.update(stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    elif output is not None:
+        kwargs.update(stdin=subprocess.DEVNULL, stdout=output, stderr=subprocess.STDOUT)
+        if sys.platform.startswith("win") and new_session:
+            kwargs["creationflags"] |= subprocess.DETACHED_PROCESS  # Nothing is written to the console.
+    logger.debug(f"Spawning {args} in {cwd or os.getcwd()}")
+    return subprocess.Popen(args, shell=use_shell, cwd=cwd, env=dict(os.environ, **env) if env else None, **kwargs)
@@ -0,0 +1,139 @@
+import os, time, logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from executor import execute
+from runstate import locked_json_file, read_json_file
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.expanduser(os.path.join("~", ".devcli", "cache", "git-status.json"))
+DEFAULT_MAX_AGE = 60.0  # Seconds, override with "gitStatusMaxAge" in config.json
+DEFAULT_JOBS = min(32, (os.cpu_count() or 1) * 4)  # git status mostly waits on the disk.
+STATUS_TIMEOUT = 30.0
+
+# Files git rewrites on staging, commits, checkouts, resets, merges and fetches.
+# Unstaged edits touch none of them, which is why cached entries also expire.
+STAMP_FILES = ["index", "HEAD", os.path.join("logs", "HEAD"), "FETCH_HEAD", "packed-refs"]
+
+# No index refresh (and no index.lock) from `git status`, so repos can be queried
+# while an editor or another git command is using them.
+GIT_ENV = {"GIT_OPTIONAL_LOCKS": "0", "LC_ALL": "C"}
+
+
+def git_dir(repo: str):
+    """
+    The repo's git directory, following `gitdir:` files of worktrees and
+    submodules. None when `repo` is not a git checkout.
+    """
+    dot_git = os.path.join(repo, ".git")
+    if os.path.isdir(dot_git):
+        return dot_git
+    try:
+        with open(dot_git, "r") as f:
+            line = f.readline().strip()
+    except OSError:
+        return None
+    if not line.startswith("gitdir:"):
+        return None
+    return os.path.normpath(os.path.join(repo, line[len("gitdir:"):].strip()))
+
+
+def _stamp(repo: str, directory: str) -> list:
+    stamp = []
+    for path in [os.path.join(directory, name) for name in STAMP_FILES] + [repo]:
+        try:
+            stamp.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            stamp.append(None)
+    return stamp
+
+
+def parse_porcelain_v2(text: str) -> dict:
+    """
+    Branch, upstream, ahead/behind and change counts from the output of
+    `git status --porcelain=v2 --branch`.
+    """
+    status = {"branch": None, "commit": None, "upstream": None, "ahead": 0, "behind": 0,
+              "staged": 0, "modified": 0, "untracked": 0, "conflicts": 0}
+    for line in text.splitlines():
+        if line.startswith("# branch.oid "):
+            oid = line.split()[2]
+            status["commit"] = None if oid == "(initial)" else oid
+        elif line.startswith("# branch.head "):
+            head = line.split(" ", 2)[2]
+            status["branch"] = None if head == "(detached)" else head
+        elif line.startswith("# branch.upstream "):
+            status["upstream"] = line.split(" ", 2)[2]
+        elif line.startswith("# branch.ab "):
+            ahead, behind = line.split()[2:4]
+            status["ahead"], status["behind"] = int(ahead), -int(behind)
+        elif line.startswith(("1 ", "2 ")):
+            xy = line[2:4]
+            status["staged"] += xy[0] != "."
+            status["modified"] += xy[1] != "."
+        elif line.startswith("u "):
+            status["conflicts"] += 1
+        elif line.startswith("? "):
+            status["untracked"] += 1
+    status["dirty"] = any(status[key] for key in ("staged", "modified", "untracked", "conflicts"))
+    return status
+
+
+def repo_status(repo: str) -> dict:
+    """
+    Run one `git status` in `repo` (as cwd of the child, never via chdir).
+    On failure the returned status carries an "error".
+    """
+    result = execute(["git", "status", "--porcelain=v2", "--branch", "--untracked-files=normal"],
+                     cwd=repo, env=GIT_ENV, capture=True, timeout=STATUS_TIMEOUT)
+    if not result.ok:
+        error = (result.stderr or "").strip().splitlines()
+        return {"error": error[-1] if error else result.describe()}
+    return parse_porcelain_v2(result.stdout)
+
+
+def collect(projects: list, jobs: int = DEFAULT_JOBS, refresh: bool = False, max_age: float = DEFAULT_MAX_AGE):
+    """
+    Yield {"name", "path", **status} for every project that is a git checkout,
+    in completion order. A cached status is reused while the repo's git files
+    are unchanged and the entry is younger than `max_age`; everything else is
+    queried on a pool of `jobs` threads. The cache is written once at the end.
+    """
+    cache = {} if refresh else read_json_file(CACHE_PATH, {})
+    now = time.time()
+    pending, updates = [], {}
+    for project in projects:
+        path = os.path.normpath(project["path"])
+        directory = git_dir(path)
+        if not directory:
+            continue
+        stamp = _stamp(path, directory)
+        entry = cache.get(path)
+        if entry and entry.get("stamp") == stamp and now - entry.get("checked_at", 0) < max_age:
+            yield dict(entry["status"], name=project["name"], path=path, cached=True)
+        else:
+            pending.append((project["name"], path, stamp))
+
+    try:
+        with span("gitstatus.collect", repos=len(pending)), ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+            futures = {pool.submit(repo_status, path): (name, path, stamp) for name, path, stamp in pending}
+            for future in as_completed(futures):
+                name, path, stamp = futures[future]
+                status = future.result()
+                if "error" not in status:
+                    updates[path] = {"stamp": stamp, "checked_at": now, "status": status}
+                yield dict(status, name=name, path=path, cached=False)
+    finally:
+        if updates:
+            _store(updates)
+
+
+def _store(updates: dict) -> None:
+    try:
+        with locked_json_file(CACHE_PATH, {}) as cache:
+            cache.update(updates)
+            for path in [path for path in cache if not os.path.isdir(path)]:
+                del cache[path]
+    except OSError as e:
+        logger.warning(f"Could not write git status cache {CACHE_PATH}: {e}")
@@ -0,0 +1,210 @@
+import os, time, logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from executor import execute
+from gitstatus import git_dir, repo_status, GIT_ENV
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FETCH_TTL = 300.0  # Seconds, override with "fetchTtl" in config.json
+FETCH_TIMEOUT = 120.0
+GIT_TIMEOUT = 30.0
+
+# Result statuses. Only "updated" changes a repo; everything else leaves it as it was.
+UPDATED, UP_TO_DATE, AHEAD, DIRTY, DIVERGED, DETACHED, NO_UPSTREAM, FAILED = (
+    "updated", "up to date", "ahead", "dirty", "diverged", "detached", "no upstream", "failed")
+
+
+def _git(repo: str, *args, timeout: float = GIT_TIMEOUT):
+    return execute(["git", *args], cwd=repo, env=GIT_ENV, capture=True, timeout=timeout)
+
+
+def _error(result) -> str:
+    lines = (result.stderr or "").strip().splitlines()
+    return lines[-1] if lines else result.describe()
+
+
+def common_dir(repo: str):
+    """
+    The git directory shared by all worktrees of the repo. Projects inside the
+    same clone or its worktrees resolve to the same path, which is what fetches
+    are deduplicated on.
+    """
+    directory = git_dir(repo)
+    if not directory:
+        return None
+    try:
+        with open(os.path.join(directory, "commondir"), "r") as f:
+            return os.path.normpath(os.path.join(directory, f.read().strip()))
+    except OSError:
+        return directory
+
+
+def tracking_target(repo: str) -> dict:
+    """
+    {"branch", "remote", "target"} of the checked out branch. `target` is its
+    upstream or, for a branch without one, the remote's default branch when
+    that is the branch checked out. None values when they cannot be found.
+    """
+    info = {"branch": None, "remote": None, "target": None}
+    head = _git(repo, "symbolic-ref", "-q", "--short", "HEAD")
+    if not head.ok:
+        return info
+    info["branch"] = head.stdout.strip()
+    upstream = _git(repo, "for-each-ref", "--format=%(upstream:short)|%(upstream:remotename)", f"refs/heads/{info['branch']}")
+    target, _, remote = upstream.stdout.strip().partition("|") if upstream.ok else ("", "", "")
+    if target:
+        info.update(target=target, remote=remote or None)
+        return info
+
+    remotes = _git(repo, "remote")
+    remote = "origin" if remotes.ok and "origin" in remotes.stdout.split() else None
+    if remote:
+        default = default_branch(repo, remote)
+        info["remote"] = remote
+        if default == info["branch"]:
+            info["target"] = f"{remote}/{default}"
+    return info
+
+
+def default_branch(repo: str, remote: str = "origin"):
+    """
+    The remote's default branch (what its HEAD points to), falling back to
+    main or master when the clone does not know the remote HEAD.
+    """
+    head = _git(repo, "symbolic-ref", "-q", "--short", f"refs/remotes/{remote}/HEAD")
+    if head.ok and head.stdout.strip():
+        return head.stdout.strip()[len(remote) + 1:]
+    for name in ("main", "master"):
+        if _git(repo, "show-ref", "-q", "--verify", f"refs/remotes/{remote}/{name}").ok:
+            return name
+    return None
+
+
+def fetched_recently(common: str, ttl: float) -> bool:
+    try:
+        return time.time() - os.stat(os.path.join(common, "FETCH_HEAD")).st_mtime < ttl
+    except OSError:
+        return False
+
+
+def fetch(repo: str, remote: str) -> tuple:
+    """
+    (ok, error) of `git fetch --prune` for one remote. Partial clones keep
+    their filter (blob:none for clones made with it); full clones cannot take
+    a filter without converting them, so they fetch normally.
+    """
+    args = ["fetch", "--prune", "--quiet"]
+    partial = _git(repo, "config", "--get", f"remote.{remote}.partialclonefilter")
+    if partial.ok and partial.stdout.strip():
+        args.append(f"--filter={partial.stdout.strip()}")
+    result = _git(repo, *args, remote, timeout=FETCH_TIMEOUT)
+    return (True, None) if result.ok else (False, _error(result))
+
+
+def fast_forward(repo: str, info: dict) -> dict:
+    """
+    Fast-forward the checked out branch to its target when the working tree
+    is clean and the branch has no commits of its own. Anything else is
+    reported, never reset.
+    """
+    report = {"branch": info["branch"], "target": info["target"], "ahead": 0, "behind": 0, "error": None}
+    if not info["branch"]:
+        return dict(report, status=DETACHED)
+    if not info["target"]:
+        return dict(report, status=NO_UPSTREAM)
+
+    counts = _git(repo, "rev-list", "--left-right", "--count", f"HEAD...{info['target']}")
+    if not counts.ok:
+        return dict(report, status=FAILED, error=_error(counts))
+    ahead, behind = (int(n) for n in counts.stdout.split())
+    report.update(ahead=ahead, behind=behind)
+    if not behind:
+        return dict(report, status=AHEAD if ahead else UP_TO_DATE)
+    if ahead:
+        return dict(report, status=DIVERGED)
+    status = repo_status(repo)
+    if status.get("error"):
+        return dict(report, status=FAILED, error=status["error"])
+    if status["staged"] or status["modified"] or status["conflicts"]:
+        return dict(report, status=DIRTY)
+
+    before = _git(repo, "rev-parse", "HEAD").stdout.strip()
+    merge = _git(repo, "merge", "--ff-only", "--quiet", info["target"])
+    if not merge.ok:
+        # e.g. an untracked file would be overwritten. git leaves the tree untouched.
+        return dict(report, status=FAILED, error=_error(merge))
+    after = _git(repo, "rev-parse", "HEAD").stdout.strip()
+    return dict(report, status=UPDATED, before=before, after=after)
+
+
+def _update_group(common: str, repos: list, ttl: float) -> list:
+    """
+    Fetch each remote of one clone once, then fast-forward every project
+    checked out from it.
+    """
+    infos = [(name, path, tracking_target(path)) for name, path in repos]
+    fetched, skipped, errors = set(), fetched_recently(common, ttl), {}
+    for name, path, info in infos:
+        remote = info["remote"]
+        if skipped or not remote or remote in fetched or remote in errors:
+            continue
+        with span("gitsync.fetch", repo=name):
+            ok, error = fetch(path, remote)
+        if ok:
+            fetched.add(remote)
+        else:
+            errors[remote] = error
+
+    reports = []
+    for name, path, info in infos:
+        if info["remote"] in errors:
+            report = dict(branch=info["branch"], target=info["target"], status=FAILED, error=errors[info["remote"]])
+        else:
+            report = fast_forward(path, info)
+        reports.append(dict(report, name=name, path=path, fetched=info["remote"] in fetched))
+    return reports
+
+
+def update_repos(projects: list, jobs: int = 8, fetch_ttl: float = DEFAULT_FETCH_TTL):
+    """
+    Fetch and fast-forward many projects in parallel, yielding one report per
+    git project as clones finish. Projects sharing a clone are fetched once,
+    and clones fetched less than `fetch_ttl` seconds ago are not fetched again.
+    """
+    groups = {}
+    for project in projects:
+        path = os.path.normpath(project["path"])
+        common = common_dir(path)
+        if common:
+            groups.setdefault(common, []).append((project["name"], path))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        futures = [pool.submit(_update_group, common, repos, fetch_ttl) for common, repos in groups.items()]
+        for future in as_completed(futures):
+            yield from future.result()
+
+
+def update_repo(name: str, path: str, fetch_ttl: float = DEFAULT_FETCH_TTL) -> dict:
+    return next(update_repos([{"name": name, "path": path}], jobs=1, fetch_ttl=fetch_ttl),
+                {"name": name, "path": path, "status": FAILED, "error": "Not a git repository"})
+
+
+def describe(report: dict) -> str:
+    status = report["status"]
+    if status == UPDATED:
+        return f"fast-forwarded {report['branch']} {report['before'][:8]}..{report['after'][:8]} ({report['behind']} commits)"
+    if status == DIRTY:
+        return f"{report['behind']} commits behind {report['target']}, not updated: uncommitted changes"
+    if status == DIVERGED:
+        return f"diverged from {report['target']} ({report['ahead']} ahead, {report['behind']} behind), not updated"
+    if status == AHEAD:
+        return f"{report['ahead']} commits ahead of {report['target']}"
+    if status == NO_UPSTREAM:
+        return f"{report['branch']} has no upstream"
+    if status == DETACHED:
+        return "detached HEAD, not updated"
+    if status == FAILED:
+        return f"failed: {report['error']}"
+    return f"up to date with {report['target']}"
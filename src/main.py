@@ -1,13 +1,40 @@
 import sys
 import click, logging, os
-from commands import run_dev, alias, code, docker, init, list_folders, update, help, start, config_cmd
+import tracing
+import render
+import executor
+import prompts
+import plugins
+
+# Tracing has to be switched on before the command modules are imported,
+# otherwise dotenv and config loading at import time would not be recorded.
+if "--trace" in sys.argv[1:] or os.getenv("DEVCLI_TRACE"):
+    tracing.enable()
+
+with tracing.span("import commands"):
+    from commands import run_dev, alias, code, docker, init, list_folders, update, help, start, config_cmd, bench, stats, ps, stop, restart, ports, affected, install, task, watch, env, git, du, clean, doctor, logs
 
 # Get a logger for this module
 logger = logging.getLogger(__name__)
 
-@click.group(help="General commands")
+@click.group(cls=plugins.PluginGroup, help="General commands")
 @click.option('--verbose', is_flag=True, help='Enable verbose output for debugging.')
-def cli(verbose: bool) -> None:
+@click.option('--trace', is_flag=True, help='Print a timing breakdown of the command phases.')
+@click.option('--trace-export', is_flag=True, help='Also write the trace as Chrome trace-event JSON to ~/.devcli/traces/.')
+@click.option('--output', type=click.Choice(render.FORMATS), default="table", envvar="DEVCLI_OUTPUT", show_default=True,
+              help='Output format of listing commands. ndjson streams one JSON record per line.')
+@click.option('--yes', '-y', is_flag=True, envvar="DEVCLI_YES", help='Answer yes to confirmations and take the default of other prompts.')
+@click.pass_context
+def cli(ctx, verbose: bool, trace: bool, trace_export: bool, output: str, yes: bool) -> None:
+    render.set_format(output)
+    prompts.set_assume_yes(yes)
+    if render.is_machine():
+        executor.child_stdout = sys.stderr
+    if trace or trace_export:
+        tracing.enable()
+        ctx.call_on_close(lambda: report_trace(trace_export))
+        ctx.with_resource(tracing.span(f"dev {ctx.invoked_subcommand}"))
+
     # Console logging
     initial_level = logging.DEBUG if verbose else logging.INFO
     logging.basicConfig(level=initial_level, format='%(levelname)s: %(name)s - %(message)s') # Added %(name)s
@@ -20,6 +47,11 @@ def cli(verbose: bool) -> None:
         os.makedirs(log_file_dir, exist_ok=True)
         logger.debug(f"Log directory ensured: {log_file_dir}")
 
+        # Avoid stacking handlers when cli() is invoked repeatedly in one process (e.g. by `dev bench`).
+        root_logger = logging.getLogger()
+        if any(isinstance(h, logging.FileHandler) and h.baseFilename == log_file_path for h in root_logger.handlers):
+            return
+
         file_handler = logging.FileHandler(log_file_path)
         formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s')
         file_handler.setFormatter(formatter)
@@ -33,6 +65,20 @@ def cli(verbose: bool) -> None:
         print(f"Error setting up file logging: {e}", file=sys.stderr)
 
 
+def report_trace(export: bool) -> None:
+    """
+    Print the recorded spans to stderr and optionally export them.
+    """
+    for line in tracing.format_report():
+        click.echo(line, err=True)
+    if export:
+        try:
+            path = tracing.export_chrome_trace()
+            click.echo(f"Trace written to {path}", err=True)
+        except OSError as e:
+            logger.error(f"Could not write trace file: {e}")
+
+
 cli.add_command(code)
 cli.add_command(run_dev)
 cli.add_command(alias)
@@ -43,6 +89,22 @@ cli.add_command(help)
 cli.add_command(update)
 cli.add_command(start)
 cli.add_command(config_cmd)
+cli.add_command(bench)
+cli.add_command(stats)
+cli.add_command(ps)
+cli.add_command(stop)
+cli.add_command(restart)
+cli.add_command(ports)
+cli.add_command(env)
+cli.add_command(affected)
+cli.add_command(install)
+cli.add_command(task)
+cli.add_command(watch)
+cli.add_command(git)
+cli.add_command(du)
+cli.add_command(clean)
+cli.add_command(doctor)
+cli.add_command(logs)
 
 
 if __name__ == "__main__":
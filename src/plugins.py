@@ -0,0 +1,199 @@
+import os, sys, logging, importlib, importlib.util
+import click
+
+from runstate import locked_json_file, read_json_file
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "devcli.commands"
+PLUGIN_DIR = os.path.expanduser(os.path.join("~", ".devcli", "plugins"))
+CACHE_PATH = os.path.expanduser(os.path.join("~", ".devcli", "cache", "plugins.json"))
+MANIFEST_VERSION = 1
+COMMAND_ATTRIBUTES = ["command", "cli"]  # Where a plugin file keeps its click command.
+
+
+def _stamp() -> list:
+    """
+    mtimes of every directory on sys.path and of the plugin files. Installing
+    or removing a distribution adds or removes its .dist-info directory,
+    which changes the mtime of the site-packages directory holding it.
+    """
+    paths = [p for p in sys.path if p] + [PLUGIN_DIR]
+    try:
+        with os.scandir(PLUGIN_DIR) as it:
+            paths += sorted(e.path for e in it)
+    except OSError:
+        pass
+    stamp = []
+    for path in paths:
+        try:
+            stamp.append([path, os.stat(path).st_mtime_ns])
+        except OSError:
+            stamp.append([path, None])
+    return stamp
+
+
+def _plugin_files() -> dict:
+    """
+    {command name: path} of ~/.devcli/plugins: `name.py` files and `name/`
+    packages. Underscores in the file name become dashes.
+    """
+    found = {}
+    try:
+        entries = sorted(os.scandir(PLUGIN_DIR), key=lambda e: e.name)
+    except OSError:
+        return found
+    for entry in entries:
+        if entry.name.startswith(("_", ".")):
+            continue
+        if entry.is_file() and entry.name.endswith(".py"):
+            found[entry.name[:-3].replace("_", "-")] = entry.path
+        elif entry.is_dir() and os.path.isfile(os.path.join(entry.path, "__init__.py")):
+            found[entry.name.replace("_", "-")] = os.path.join(entry.path, "__init__.py")
+    return found
+
+
+def discover() -> dict:
+    """
+    {command name: spec} of every plugin, without importing any of them.
+    Files in the plugin directory win over installed entry points.
+    """
+    from importlib.metadata import entry_points
+    commands = {}
+    with span("plugins.discover"):
+        for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+            dist = getattr(entry_point, "dist", None)
+            commands[entry_point.name] = {"kind": "entry point", "target": entry_point.value,
+                                          "source": dist.name if dist else None}
+        for name, path in _plugin_files().items():
+            commands[name] = {"kind": "file", "target": path, "source": path}
+    return commands
+
+
+def load_manifest(refresh: bool = False) -> dict:
+    """
+    The discovered plugins, reused from the cache while nothing was installed
+    or removed and the plugin directory did not change.
+    """
+    stamp = _stamp()
+    cached = read_json_file(CACHE_PATH, {})
+    if not refresh and cached.get("version") == MANIFEST_VERSION and cached.get("stamp") == stamp:
+        return cached["commands"]
+    commands = discover()
+    # Help texts learned from earlier imports stay valid while the plugin points at the same target.
+    for name, spec in commands.items():
+        old = cached.get("commands", {}).get(name, {})
+        if old.get("target") == spec["target"]:
+            spec.update({key: old[key] for key in ("help", "usage") if key in old})
+    _write_manifest(stamp, commands)
+    return commands
+
+
+def _write_manifest(stamp: list, commands: dict) -> None:
+    try:
+        with locked_json_file(CACHE_PATH, {}) as cache:
+            cache.clear()
+            cache.update(version=MANIFEST_VERSION, stamp=stamp, commands=commands)
+    except OSError as e:
+        logger.warning(f"Could not write plugin manifest {CACHE_PATH}: {e}")
+
+
+def _remember_help(name: str, command: click.Command, usage: str) -> None:
+    try:
+        with locked_json_file(CACHE_PATH, {}) as cache:
+            spec = cache.get("commands", {}).get(name)
+            if spec is not None:
+                spec.update(help=command.get_short_help_str(limit=80), usage=usage)
+    except OSError as e:
+        logger.debug(f"Could not update plugin manifest: {e}")
+
+
+def load_command(name: str, spec: dict) -> click.Command:
+    """
+    Import a plugin and return its click command.
+    """
+    with span("plugins.load", command=name):
+        if spec["kind"] == "entry point":
+            module_name, _, attribute = spec["target"].partition(":")
+            obj = importlib.import_module(module_name)
+            for part in filter(None, attribute.split(".")):
+                obj = getattr(obj, part)
+        else:
+            module_spec = importlib.util.spec_from_file_location(f"devcli_plugin_{name.replace('-', '_')}", spec["target"])
+            module = importlib.util.module_from_spec(module_spec)
+            sys.modules[module_spec.name] = module
+            module_spec.loader.exec_module(module)
+            obj = next((getattr(module, a) for a in COMMAND_ATTRIBUTES if isinstance(getattr(module, a, None), click.Command)), None)
+    if not isinstance(obj, click.Command):
+        raise TypeError(f"{spec['target']} does not provide a click command (expected one of: {', '.join(COMMAND_ATTRIBUTES)})")
+    return obj
+
+
+class PluginGroup(click.Group):
+    """
+    The `dev` group: built-in commands plus plugins, which are only imported
+    when they are invoked. Built-in commands win over plugins of the same name.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._manifest = None
+        self._loaded = {}
+
+    def plugins(self) -> dict:
+        if self._manifest is None:
+            try:
+                manifest = load_manifest()
+            except Exception as e:  # A broken plugin setup must not take the built-in commands down with it.
+                logger.error(f"Could not discover plugins: {e}")
+                manifest = {}
+            self._manifest = {name: spec for name, spec in manifest.items() if name not in self.commands}
+        return self._manifest
+
+    def list_commands(self, ctx) -> list:
+        return sorted(set(self.commands) | set(self.plugins()))
+
+    def get_command(self, ctx, name):
+        if name in self.commands:
+            return self.commands[name]
+        if name in self._loaded:
+            return self._loaded[name]
+        spec = self.plugins().get(name)
+        if spec is None:
+            return None
+        try:
+            command = load_command(name, spec)
+        except Exception as e:
+            logger.debug(f"Loading plugin '{name}' failed", exc_info=True)
+            raise click.ClickException(f"Could not load plugin command '{name}' from {spec['source']}: {e}")
+        self._loaded[name] = command
+        _remember_help(name, command, usage_of(command, ctx, name))
+        return command
+
+    def summaries(self, ctx) -> list:
+        """
+        [(name, usage, short help)] of every command. Plugins that were not
+        imported in this process are described from the manifest.
+        """
+        rows = []
+        for name in self.list_commands(ctx):
+            command = self.commands.get(name) or self._loaded.get(name)
+            if command is not None:
+                if not command.hidden:
+                    rows.append((name, usage_of(command, ctx, name), command.get_short_help_str(limit=80)))
+                continue
+            spec = self._manifest[name]
+            rows.append((name, spec.get("usage", ""), spec.get("help") or f"Plugin from {spec['source']}."))
+        return rows
+
+    def format_commands(self, ctx, formatter) -> None:
+        rows = [(name, short_help) for name, _, short_help in self.summaries(ctx)]
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
+
+
+def usage_of(command: click.Command, ctx, name: str) -> str:
+    pieces = command.collect_usage_pieces(click.Context(command, info_name=name, parent=ctx))
+    return " ".join(piece for piece in pieces if piece != "[OPTIONS]")
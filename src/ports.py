@@ -0,0 +1,91 @@
+import os, re, time, socket, logging
+
+from runstate import RUN_DIR, locked_json_file, read_json_file
+
+logger = logging.getLogger(__name__)
+
+LEASES_PATH = os.path.join(RUN_DIR, "ports.json")
+PORT_RANGE = (3000, 3999)
+PROBE_TIMEOUT = 0.05  # Seconds. Local connects either succeed or get refused almost instantly.
+
+
+def is_port_free(port: int, host: str = "127.0.0.1") -> bool:
+    """
+    Fast probe: a port is taken when something accepts a TCP connection on it.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(PROBE_TIMEOUT)
+        return sock.connect_ex((host, port)) != 0
+
+
+def load_leases() -> dict:
+    """
+    Port leases as {"<port>": {"project": <path>, "leased_at": <timestamp>}}.
+    """
+    return read_json_file(LEASES_PATH, {})
+
+
+def lease_for(project_path: str):
+    project_path = os.path.abspath(project_path)
+    for port, lease in load_leases().items():
+        if lease.get("project") == project_path:
+            return int(port)
+    return None
+
+
+def lease_port(project_path: str, preferred: int = None, port_range: tuple = None) -> int:
+    """
+    Return the port leased to a project, leasing a new one if needed. The
+    preferred port is used when it is neither leased nor in use; otherwise the
+    first free port of the range (by default the 1000 ports from `preferred`)
+    is taken.
+    """
+    project_path = os.path.abspath(project_path)
+    if not port_range:
+        port_range = (preferred, preferred + 999) if preferred else PORT_RANGE
+    with locked_json_file(LEASES_PATH, {}) as leases:
+        for port, lease in leases.items():
+            if lease.get("project") == project_path:
+                return int(port)
+
+        candidates = ([preferred] if preferred else []) + list(range(port_range[0], port_range[1] + 1))
+        for port in candidates:
+            if str(port) in leases or not is_port_free(port):
+                continue
+            leases[str(port)] = {"project": project_path, "leased_at": time.time()}
+            logger.info(f"Leased port {port} to {project_path}")
+            return port
+
+    raise RuntimeError(f"No free port left in range {port_range[0]}-{port_range[1]}.")
+
+
+def release_port(project_path: str) -> list:
+    """
+    Drop every lease held by a project. Returns the released ports.
+    """
+    project_path = os.path.abspath(project_path)
+    with locked_json_file(LEASES_PATH, {}) as leases:
+        released = [int(p) for p, lease in leases.items() if lease.get("project") == project_path]
+        for port in released:
+            del leases[str(port)]
+    return released
+
+
+def prune_leases() -> list:
+    """
+    Drop leases of projects whose directory no longer exists.
+    """
+    with locked_json_file(LEASES_PATH, {}) as leases:
+        stale = [p for p, lease in leases.items() if not os.path.isdir(lease.get("project", ""))]
+        for port in stale:
+            del leases[port]
+    return [int(p) for p in stale]
+
+
+def render_compose_ports(compose_text: str, host_port: int, container_port: int) -> str:
+    """
+    Replace the host side of `"<host>:<container_port>"` mappings in a compose
+    file with the leased port.
+    """
+    pattern = re.compile(rf'(?<![\d.:])(["\']?)((?:\d+\.\d+\.\d+\.\d+:)?)\d+:{container_port}(/\w+)?\1(?![\d])')
+    return pattern.sub(lambda m: f"{m.group(1)}{m.group(2)}{host_port}:{container_port}{m.group(3) or ''}{m.group(1)}", compose_text)
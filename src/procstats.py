@@ -0,0 +1,140 @@
+import os, time, logging
+
+logger = logging.getLogger(__name__)
+
+PROC_ROOT = "/proc"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def is_supported() -> bool:
+    return os.path.isdir(os.path.join(PROC_ROOT, "self"))
+
+
+def _read_stat(pid: int):
+    """
+    Return (ppid, cpu_ticks) for a process from /proc/<pid>/stat, or None.
+    """
+    try:
+        with open(f"{PROC_ROOT}/{pid}/stat", "r") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        # fields[0] is the state, so ppid is fields[1], utime/stime are 11/12.
+        return int(fields[1]), int(fields[11]) + int(fields[12])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def _read_rss(pid: int) -> int:
+    try:
+        with open(f"{PROC_ROOT}/{pid}/statm", "r") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _count_fds(pid: int):
+    try:
+        return len(os.listdir(f"{PROC_ROOT}/{pid}/fd"))
+    except OSError:
+        return None  # Not our process, or it just exited.
+
+
+def snapshot() -> dict:
+    """
+    Read ppid and cpu ticks of every process once. The result is shared by all
+    process trees in a sample so /proc is only walked a single time.
+    """
+    processes = {}
+    for name in os.listdir(PROC_ROOT):
+        if not name.isdigit():
+            continue
+        stat = _read_stat(int(name))
+        if stat:
+            processes[int(name)] = stat
+    return processes
+
+
+def children_map(processes: dict) -> dict:
+    children = {}
+    for pid, (ppid, _) in processes.items():
+        children.setdefault(ppid, []).append(pid)
+    return children
+
+
+def descendants(root_pid: int, children: dict) -> list:
+    """
+    All descendants of `root_pid`, breadth first.
+    """
+    found, queue = [], [root_pid]
+    while queue:
+        for child in children.get(queue.pop(0), []):
+            found.append(child)
+            queue.append(child)
+    return found
+
+
+def sample_tree(root_pid: int, processes: dict, children: dict) -> dict:
+    """
+    Aggregate usage of a process and all its descendants.
+    """
+    if root_pid not in processes:
+        return None
+    tree = [root_pid] + descendants(root_pid, children)
+    fds = [_count_fds(pid) for pid in tree]
+    return {
+        "pid": root_pid,
+        "processes": len(tree),
+        "children": len(tree) - 1,
+        "cpu_ticks": sum(processes[pid][1] for pid in tree),
+        "rss_bytes": sum(_read_rss(pid) for pid in tree),
+        "open_fds": sum(n for n in fds if n is not None),
+    }
+
+
+def sample(entries: list, previous: dict = None, interval: float = 0.5) -> tuple:
+    """
+    Sample every recorded process tree. CPU usage is the delta against
+    `previous` (the state returned by an earlier call); without it a second
+    snapshot is taken after `interval` seconds.
+
+    Returns (results, state); pass `state` as `previous` to the next call.
+    """
+    def take():
+        return time.monotonic(), snapshot()
+
+    if previous is None:
+        first_time, first = take()
+        first_children = children_map(first)
+        time.sleep(interval)
+        prev_ticks = {}
+        for entry in entries:
+            tree = sample_tree(entry["pid"], first, first_children)
+            if tree:
+                prev_ticks[entry["pid"]] = tree["cpu_ticks"]
+        previous = {"time": first_time, "ticks": prev_ticks}
+
+    now, processes = take()
+    children = children_map(processes)
+    elapsed = max(now - previous["time"], 1e-6)
+    results, ticks = [], {}
+    for entry in entries:
+        tree = sample_tree(entry["pid"], processes, children)
+        if not tree:
+            results.append({"project": entry.get("project"), "pid": entry.get("pid"), "alive": False})
+            continue
+        ticks[entry["pid"]] = tree["cpu_ticks"]
+        delta = tree["cpu_ticks"] - previous["ticks"].get(entry["pid"], tree["cpu_ticks"])
+        tree.update({
+            "project": entry.get("project"),
+            "alive": True,
+            "cpu_percent": round(delta / CLOCK_TICKS / elapsed * 100, 1),
+        })
+        results.append(tree)
+    return results, {"time": now, "ticks": ticks}
+
+
+def format_bytes(n: int) -> str:
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if n < 1024 or unit == "GiB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
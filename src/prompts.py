@@ -0,0 +1,129 @@
+import os, re, sys, json, logging
+import click
+
+import render
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+ANSWERS_PATH = os.path.expanduser(os.path.join("~", ".devcli", "answers.json"))
+ENV_PREFIX = "DEVCLI_ANSWER_"
+
+TRUE_WORDS = {"y", "yes", "true", "1", "on"}
+FALSE_WORDS = {"n", "no", "false", "0", "off"}
+
+_assume_yes = False
+_answers = None
+
+
+class PromptError(click.ClickException):
+    """
+    A prompt that cannot be shown (no terminal) and has no answer from
+    --yes, the environment or the answers file.
+    """
+
+
+def set_assume_yes(value: bool) -> None:
+    global _assume_yes
+    _assume_yes = bool(value)
+
+
+def env_name(key: str) -> str:
+    return ENV_PREFIX + re.sub(r"[^A-Za-z0-9]", "_", key).upper()
+
+
+def _answers_file() -> dict:
+    """
+    Preset answers from DEVCLI_ANSWERS or ~/.devcli/answers.json, read once.
+    """
+    global _answers
+    if _answers is None:
+        path = os.getenv("DEVCLI_ANSWERS") or ANSWERS_PATH
+        _answers = {}
+        if os.path.exists(path):
+            try:
+                with open(path, "r") as f:
+                    _answers = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring answers file {path}: {e}")
+    return _answers
+
+
+def _preset(key: str):
+    if key is None:
+        return None
+    value = os.getenv(env_name(key))
+    if value is not None:
+        return value
+    return _answers_file().get(key)
+
+
+def _interactive() -> bool:
+    return sys.stdin.isatty() and sys.stdout.isatty()
+
+
+def _no_answer(message: str, key: str) -> PromptError:
+    hint = f"Pass --yes, set {env_name(key)} or add \"{key}\" to {os.getenv('DEVCLI_ANSWERS') or ANSWERS_PATH}." if key else "Pass --yes."
+    return PromptError(f"'{message}' needs an answer, but there is no terminal to ask in. {hint}")
+
+
+def _inquirer():
+    # InquirerPy and prompt_toolkit take a noticeable part of startup, so they are only imported for a prompt shown.
+    with span("prompts.import_inquirer"):
+        from InquirerPy import inquirer
+    return inquirer
+
+
+def confirm(message: str, default: bool = False, key: str = None) -> bool:
+    """
+    Yes/no question. Answered without a prompt, in this order, by a preset
+    answer for `key`, --yes, or the default in machine output modes.
+    """
+    preset = _preset(key)
+    if preset is not None:
+        if isinstance(preset, bool):
+            return preset
+        if str(preset).strip().lower() in TRUE_WORDS | FALSE_WORDS:
+            return str(preset).strip().lower() in TRUE_WORDS
+        raise PromptError(f"Invalid answer '{preset}' for '{key}': expected yes or no.")
+    if _assume_yes:
+        return True
+    if render.is_machine():
+        return default
+    if not _interactive():
+        raise _no_answer(message, key)
+    return _inquirer().confirm(message=message, default=default).execute()
+
+
+def text(message: str, default: str = None, key: str = None) -> str:
+    """
+    Free text. A preset answer wins; --yes and machine output modes take the
+    default, which fails when there is none.
+    """
+    preset = _preset(key)
+    if preset is not None:
+        return str(preset)
+    if (_assume_yes or render.is_machine()) and default is not None:
+        return default
+    if not _interactive():
+        raise _no_answer(message, key)
+    return _inquirer().text(message=message, default=default or "").execute()
+
+
+def select(message: str, choices: list, default=None, key: str = None):
+    """
+    Pick one of `choices` (values, or {"name", "value"} dicts) and return its
+    value. A preset answer may be a value or a name.
+    """
+    values = {(c["value"] if isinstance(c, dict) else c): (c["name"] if isinstance(c, dict) else c) for c in choices}
+    preset = _preset(key)
+    if preset is not None:
+        for value, name in values.items():
+            if str(preset) in (str(value), str(name)):
+                return value
+        raise PromptError(f"Invalid answer '{preset}' for '{key}': expected one of {', '.join(map(str, values))}.")
+    if (_assume_yes or render.is_machine()) and default is not None:
+        return default
+    if not _interactive():
+        raise _no_answer(message, key)
+    return _inquirer().select(message=message, choices=choices, default=default).execute()
@@ -0,0 +1,147 @@
+import os, sys, json, time, shutil, hashlib, logging
+
+from executor import execute
+
+logger = logging.getLogger(__name__)
+
+VENV_DIR = ".venv"
+STAMP_FILE = ".devcli-sync.json"  # Inside .venv, so deleting the venv forces a full sync.
+
+# Checked in this order. Fully pinned files are synced exactly, the others installed incrementally.
+LOCK_FILES = ["uv.lock", "requirements.lock", "requirements-lock.txt"]
+REQUIREMENT_FILES = ["requirements.txt", "requirements-dev.txt"]
+
+
+def find_uv():
+    """
+    The uv binary: UV_PATH from .env, otherwise uv on PATH. None when missing.
+    """
+    configured = os.getenv("UV_PATH")
+    if configured and os.path.exists(configured):
+        return configured
+    return shutil.which("uv")
+
+
+def venv_python(project_dir: str) -> str:
+    bin_dir = "Scripts" if sys.platform.startswith("win") else "bin"
+    return os.path.join(project_dir, VENV_DIR, bin_dir, "python.exe" if sys.platform.startswith("win") else "python")
+
+
+def dependency_source(project_dir: str):
+    """
+    (kind, file) describing where the project's dependencies come from:
+    "uv-lock", "lock", "requirements", "pyproject", or (None, None).
+    """
+    exists = lambda name: os.path.isfile(os.path.join(project_dir, name))
+    if exists("uv.lock") and exists("pyproject.toml"):
+        return "uv-lock", "uv.lock"
+    for name in LOCK_FILES[1:]:
+        if exists(name):
+            return "lock", name
+    for name in REQUIREMENT_FILES:
+        if exists(name):
+            return "requirements", name
+    if exists("pyproject.toml"):
+        return "pyproject", "pyproject.toml"
+    return None, None
+
+
+def _sync_key(project_dir: str, tool: str, source: tuple) -> str:
+    digest = hashlib.sha256(json.dumps([tool, source[0]]).encode())
+    if source[1]:
+        with open(os.path.join(project_dir, source[1]), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _read_stamp(project_dir: str) -> dict:
+    try:
+        with open(os.path.join(project_dir, VENV_DIR, STAMP_FILE), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_stamp(project_dir: str, key: str, tool: str) -> None:
+    try:
+        with open(os.path.join(project_dir, VENV_DIR, STAMP_FILE), "w") as f:
+            json.dump({"key": key, "tool": tool, "synced_at": time.time()}, f)
+    except OSError as e:
+        logger.warning(f"Could not write sync stamp for {project_dir}: {e}")
+
+
+def _commands(tool: str, uv: str, project_dir: str, source: tuple, python_version: str) -> list:
+    """
+    The commands creating (if needed) and syncing the venv with `tool`.
+    """
+    python = venv_python(project_dir)
+    kind, file = source
+    commands = []
+    if tool == "uv":
+        if kind in ("uv-lock", "pyproject"):
+            # uv sync manages .venv itself, including creating it.
+            commands.append([uv, "sync"] + (["--frozen"] if kind == "uv-lock" else []) + (["--python", python_version] if python_version else []))
+        else:
+            if not os.path.exists(python):
+                commands.append([uv, "venv", VENV_DIR] + (["--python", python_version] if python_version else []))
+            if kind == "lock":
+                commands.append([uv, "pip", "sync", "--python", python, file])
+            elif kind == "requirements":
+                commands.append([uv, "pip", "install", "--python", python, "-r", file])
+        return commands
+
+    if not os.path.exists(python):
+        base = shutil.which(f"python{python_version}") if python_version else None
+        commands.append([base or sys.executable, "-m", "venv", VENV_DIR])
+    if kind in ("lock", "requirements"):
+        commands.append([python, "-m", "pip", "install", "-r", file])
+    elif kind in ("uv-lock", "pyproject"):
+        commands.append([python, "-m", "pip", "install", "-e", "."])
+    return commands
+
+
+def sync_environment(project_dir: str, python_version: str = None, force: bool = False) -> dict:
+    """
+    Create or update the project's .venv. Uses uv when available (its global
+    cache is shared by all projects, so installs are mostly links) and falls
+    back to venv + pip. Lockfiles are synced exactly, requirements files
+    installed incrementally. Nothing runs when the dependency file did not
+    change since the last sync.
+
+    Returns {"tool", "status": "synced"|"up to date"|"failed", "seconds", "source", "error"}.
+    """
+    started = time.perf_counter()
+    uv = find_uv()
+    tool = "uv" if uv else "pip"
+    source = dependency_source(project_dir)
+    report = {"tool": tool, "source": source[1], "status": "up to date", "error": None}
+
+    key = _sync_key(project_dir, tool, source)
+    if not force and os.path.exists(venv_python(project_dir)) and _read_stamp(project_dir).get("key") == key:
+        report["seconds"] = time.perf_counter() - started
+        return report
+
+    env = {"PIP_DISABLE_PIP_VERSION_CHECK": "1"}
+    for command in _commands(tool, uv, project_dir, source, python_version):
+        logger.info(f"Python env of {os.path.basename(project_dir)}: {' '.join(command)}")
+        result = execute(command, cwd=project_dir, env=env, capture=True, merge_stderr=True)
+        if not result.ok:
+            logger.error(f"{result.describe()}\n{result.stdout or ''}")
+            report.update(status="failed", error=result.describe())
+            break
+    else:
+        _write_stamp(project_dir, key, tool)
+        report["status"] = "synced"
+    report["seconds"] = time.perf_counter() - started
+    return report
+
+
+def write_requirements(project_dir: str, requirements: list) -> None:
+    """
+    Seed requirements.txt for a new project from its template, unless the
+    project already has one.
+    """
+    path = os.path.join(project_dir, "requirements.txt")
+    if requirements and not os.path.exists(path):
+        with open(path, "w") as f:
+            f.write("\n".join(requirements) + "\n")
@@ -0,0 +1,212 @@
+import os, sys, json, shlex, logging
+import click
+from dataclasses import dataclass
+from typing import Optional
+
+from config import load_config
+from executor import execute, CommandResult
+import gitsync
+
+logger = logging.getLogger(__name__)
+
+CONTROL_DIR = os.path.expanduser(os.path.join("~", ".devcli", "ssh"))
+# How long an idle master connection stays open for later commands. Override with "sshControlPersist" in config.json.
+DEFAULT_CONTROL_PERSIST = "10m"
+# Forces a transport for every remote project, e.g. DEVCLI_TRANSPORT=local to try a setup without a network.
+TRANSPORT_ENV = "DEVCLI_TRANSPORT"
+
+# Mirrors gitsync.fast_forward on the remote checkout and prints one "devcli-update" line with the outcome.
+# FETCH_HEAD younger than $DEVCLI_FETCH_TTL seconds is reused; stat -c is GNU, stat -f BSD/macOS.
+UPDATE_SCRIPT = (
+    'fetch_head=$(git rev-parse --git-path FETCH_HEAD) || exit 1; '
+    'fetched=$(stat -c %Y "$fetch_head" 2>/dev/null || stat -f %m "$fetch_head" 2>/dev/null); '
+    'if [ -z "$fetched" ] || [ $(( $(date +%s) - fetched )) -ge "${DEVCLI_FETCH_TTL:-0}" ]; then '
+    'git fetch --prune --quiet || exit 1; fi; '
+    'before=$(git rev-parse HEAD) || exit 1; after=$before; ahead=0; behind=0; '
+    'branch=$(git symbolic-ref --quiet --short HEAD); '
+    'target=$(git rev-parse --quiet --abbrev-ref --symbolic-full-name "@{upstream}" 2>/dev/null); '
+    'if [ -z "$branch" ]; then status=detached; '
+    'elif [ -z "$target" ]; then status=no-upstream; '
+    'else counts=$(git rev-list --left-right --count "HEAD...@{upstream}") || exit 1; set -- $counts; ahead=$1; behind=$2; '
+    'if [ "$behind" = 0 ]; then if [ "$ahead" = 0 ]; then status=up-to-date; else status=ahead; fi; '
+    'elif [ "$ahead" != 0 ]; then status=diverged; '
+    'elif [ -n "$(git status --porcelain --untracked-files=no)" ]; then status=dirty; '
+    'else git merge --ff-only --quiet "@{upstream}" || exit 1; status=updated; after=$(git rev-parse HEAD); fi; fi; '
+    'echo "devcli-update $status ${branch:--} ${target:--} $ahead $behind $before $after"'
+)
+# The status words of UPDATE_SCRIPT.
+UPDATE_STATUSES = {"updated": gitsync.UPDATED, "up-to-date": gitsync.UP_TO_DATE, "ahead": gitsync.AHEAD,
+                   "dirty": gitsync.DIRTY, "diverged": gitsync.DIVERGED, "detached": gitsync.DETACHED,
+                   "no-upstream": gitsync.NO_UPSTREAM}
+INSTALL_SCRIPT = ('if [ -f bun.lock ] || [ -f bun.lockb ]; then bun install; '
+                  'elif [ -f package.json ]; then npm install; '
+                  'elif [ -f uv.lock ] || [ -f pyproject.toml ]; then uv sync; '
+                  'elif [ -f requirements.txt ]; then python3 -m venv .venv && .venv/bin/pip install -r requirements.txt; '
+                  'else echo "Nothing to install."; fi')
+
+
+class RemoteError(click.ClickException):
+    """
+    An invalid `host` setting in devCLI-project.json.
+    """
+
+
+@dataclass
+class Remote:
+    """
+    Where a project runs: `path` on `host`, reached through `transport`.
+    """
+    host: str
+    path: str
+    user: Optional[str] = None
+    port: Optional[int] = None
+    identity_file: Optional[str] = None
+    transport: str = "ssh"
+
+    @property
+    def destination(self) -> str:
+        return f"{self.user}@{self.host}" if self.user else self.host
+
+    def describe(self) -> str:
+        return f"{self.destination}:{self.path}"
+
+
+def default_path(target_dir: str) -> str:
+    """
+    The remote path of a local folder when `host` names none: the same place
+    relative to the home directory, or the same absolute path outside of it.
+    """
+    home = os.path.expanduser("~")
+    target_dir = os.path.abspath(target_dir)
+    if target_dir == home or target_dir.startswith(home + os.sep):
+        relative = os.path.relpath(target_dir, home).replace(os.sep, "/")
+        return "~" if relative == "." else f"~/{relative}"
+    return target_dir.replace(os.sep, "/")
+
+
+def parse_host(spec, target_dir: str) -> Remote:
+    """
+    A `host` setting: "[user@]host[:path]" or {"name", "user", "port", "path",
+    "identityFile", "transport"}.
+    """
+    if isinstance(spec, str):
+        destination, _, path = spec.partition(":")
+        user, _, host = destination.rpartition("@")
+        spec = {"name": host, "user": user or None, "path": path or None}
+    if not isinstance(spec, dict) or not spec.get("name"):
+        raise RemoteError(f"Invalid host {spec!r}: expected \"user@host:/path\" or an object with a \"name\".")
+    transport = os.getenv(TRANSPORT_ENV) or spec.get("transport", "ssh")
+    if transport not in TRANSPORTS:
+        raise RemoteError(f"Unknown transport '{transport}'. Use one of: {', '.join(TRANSPORTS)}.")
+    try:
+        port = int(spec["port"]) if spec.get("port") else None
+    except (TypeError, ValueError):
+        raise RemoteError(f"Invalid port {spec['port']!r} for host '{spec['name']}'.")
+    return Remote(host=spec["name"], path=spec.get("path") or default_path(target_dir), user=spec.get("user"),
+                  port=port, identity_file=spec.get("identityFile"), transport=transport)
+
+
+def for_project(target_dir: str, project_config: dict = None) -> Optional[Remote]:
+    """
+    The remote of a project whose devCLI-project.json has a `host`, or None
+    for projects that run locally.
+    """
+    if project_config is None:
+        try:
+            with open(os.path.join(target_dir, "devCLI-project.json"), "r") as f:
+                project_config = json.load(f)
+        except (OSError, ValueError):
+            return None
+    spec = project_config.get("host")
+    return parse_host(spec, target_dir) if spec else None
+
+
+def _cd(path: str) -> str:
+    if path == "~" or path.startswith("~/"):
+        rest = path[2:]
+        return 'cd "$HOME"' + (f"/{shlex.quote(rest)}" if rest else "")
+    return f"cd {shlex.quote(path)}"
+
+
+def script(remote: Remote, command: str, env: dict = None) -> str:
+    """
+    The shell line that runs `command` in the remote project folder.
+    """
+    exports = "".join(f"export {key}={shlex.quote(str(value))}; " for key, value in (env or {}).items())
+    return f"{exports}{_cd(remote.path)} && {command}"
+
+
+def control_options() -> list:
+    """
+    ssh options that share one connection per host: the first command opens a
+    master connection, later ones reuse it and skip the handshake until it
+    has been idle for ControlPersist.
+    """
+    if sys.platform.startswith("win"):
+        return []  # OpenSSH for Windows has no ControlMaster.
+    os.makedirs(CONTROL_DIR, mode=0o700, exist_ok=True)
+    persist = load_config().get("sshControlPersist", DEFAULT_CONTROL_PERSIST)
+    # %C is a hash of host, port and user, short enough for the socket path limit.
+    return ["-o", "ControlMaster=auto", "-o", f"ControlPath={os.path.join(CONTROL_DIR, '%C')}",
+            "-o", f"ControlPersist={persist}"]
+
+
+def ssh_argv(remote: Remote, line: str, tty: bool) -> list:
+    argv = [os.getenv("SSH_PATH") or "ssh"] + control_options()
+    if remote.port:
+        argv += ["-p", str(remote.port)]
+    if remote.identity_file:
+        argv += ["-i", os.path.expanduser(remote.identity_file)]
+    # A forced terminal makes the remote command exit with the connection (Ctrl+C, `dev stop`).
+    argv += ["-tt" if tty else "-T", remote.destination, line]
+    return argv
+
+
+def local_argv(remote: Remote, line: str, tty: bool) -> list:
+    # Runs the remote line on this machine: for hosts that are this machine and for trying a setup offline.
+    return ["/bin/sh", "-c", line]
+
+
+TRANSPORTS = {"ssh": ssh_argv, "local": local_argv}
+
+
+def command_argv(remote: Remote, command: str, env: dict = None, tty: bool = False) -> list:
+    return TRANSPORTS[remote.transport](remote, script(remote, command, env), tty)
+
+
+def run(remote: Remote, command: str, env: dict = None, tty: bool = False, **kwargs) -> CommandResult:
+    """
+    Run `command` in the remote project folder through `execute`; keyword
+    arguments (cwd, capture, project, timeout, ...) are passed on.
+    """
+    logger.debug(f"Running '{command}' on {remote.describe()} via {remote.transport}")
+    return execute(command_argv(remote, command, env, tty), **kwargs)
+
+
+def update(remote: Remote, fetch_ttl: float = gitsync.DEFAULT_FETCH_TTL) -> dict:
+    """
+    Fetch and fast-forward the remote checkout when its working tree is clean
+    and the branch has no commits of its own. Same report as
+    gitsync.update_repo, so gitsync.describe works on it.
+    """
+    result = run(remote, UPDATE_SCRIPT, env={"DEVCLI_FETCH_TTL": int(fetch_ttl)}, capture=True, merge_stderr=True)
+    marker = next((line.split() for line in (result.stdout or "").splitlines() if line.startswith("devcli-update ")), None)
+    report = {"name": os.path.basename(remote.path), "path": remote.describe(), "branch": None, "target": None,
+              "ahead": 0, "behind": 0, "before": None, "after": None, "error": None}
+    if not result.ok or not marker or len(marker) != 8 or marker[1] not in UPDATE_STATUSES:
+        detail = (result.stdout or "").strip().splitlines()
+        return dict(report, status=gitsync.FAILED, error=detail[-1] if detail else result.describe())
+    _, status, branch, target, ahead, behind, before, after = marker
+    return dict(report, status=UPDATE_STATUSES[status], branch=None if branch == "-" else branch,
+                target=None if target == "-" else target, ahead=int(ahead), behind=int(behind), before=before, after=after)
+
+
+def install(remote: Remote) -> bool:
+    """
+    Install dependencies in the remote checkout with the package manager its
+    files point to.
+    """
+    result = run(remote, INSTALL_SCRIPT, tty=sys.stdin.isatty())
+    if not result.ok:
+        logger.error(f"Remote install on {remote.describe()}: {result.describe()}")
+    return result.ok
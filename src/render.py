@@ -0,0 +1,55 @@
+import json
+import click
+
+FORMATS = ["table", "json", "ndjson"]
+
+_format = "table"
+
+
+def set_format(output_format: str) -> None:
+    global _format
+    _format = output_format or "table"
+
+
+def get_format() -> str:
+    return _format
+
+
+def is_machine() -> bool:
+    return _format != "table"
+
+
+def _json_default(value):
+    if isinstance(value, (set, tuple)):
+        return list(value)
+    return str(value)
+
+
+def emit(records, table=None) -> int:
+    """
+    Render records (dicts) in the selected output format and return how many
+    there were. `ndjson` writes each record as soon as the iterable yields it,
+    `json` prints one array, `table` hands the list to `table(records)` for
+    the human-readable output.
+    """
+    if _format == "ndjson":
+        count = 0
+        for record in records:
+            click.echo(json.dumps(record, default=_json_default))  # click.echo flushes every line.
+            count += 1
+        return count
+    records = list(records)
+    if _format == "json":
+        click.echo(json.dumps(records, indent=2, default=_json_default))
+    elif table:
+        table(records)
+    return len(records)
+
+
+def status(message: str) -> None:
+    """
+    Progress and status text: stdout for humans, stderr in machine output
+    modes so stdout stays parseable.
+    """
+    click.echo(message, err=is_machine())
+
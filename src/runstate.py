@@ -0,0 +1,273 @@
+import os, json, time, signal, logging
+from contextlib import contextmanager
+
+import state
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, state is best effort.
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+RUN_DIR = os.path.expanduser(os.path.join("~", ".devcli", "run"))
+LOG_DIR = os.path.join(RUN_DIR, "logs")
+
+
+def read_json_file(path: str, default: dict) -> dict:
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logger.error(f"Could not read state from {path}: {e}")
+        return default
+
+
+def _write_json_file(path: str, data: dict) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+@contextmanager
+def locked_json_file(path: str, default: dict):
+    """
+    Yield the content of a JSON state file for modification while holding an
+    exclusive lock on `<path>.lock`. The data is written back atomically when
+    the block exits without an error.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(f"{path}.lock", "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            data = read_json_file(path, default)
+            yield data
+            _write_json_file(path, data)
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def load_processes() -> list:
+    """
+    Recorded processes that have not been seen exiting (the `runs` table of
+    the state store).
+    """
+    return state.active_runs()
+
+
+def process_start_ticks(pid: int):
+    """
+    Start time of a process in clock ticks since boot, used to tell a recorded
+    process apart from a later process that reused its PID. None if unknown.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+        # The command name may contain spaces, so split after the closing parenthesis.
+        return int(stat.rsplit(")", 1)[1].split()[19])
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def record_process(project: str, pid: int, command: str, cwd: str, **extra) -> dict:
+    """
+    Record a launched startup command so `dev stats` can find it later.
+    """
+    try:
+        pgid = os.getpgid(pid)
+    except (OSError, AttributeError):
+        pgid = None
+    entry = {
+        "project": project,
+        "pid": pid,
+        "pgid": pgid,
+        "command": command,
+        "cwd": cwd,
+        "started_at": time.time(),
+        "proc_start": process_start_ticks(pid),
+    }
+    entry.update(extra)
+    state.add_run(entry)
+    logger.debug(f"Recorded process {pid} for project '{project}'")
+    return entry
+
+
+def forget_process(pid: int) -> None:
+    state.end_runs([pid])
+    logger.debug(f"Marked run of process {pid} as ended")
+
+
+def is_alive(entry: dict) -> bool:
+    """
+    True when the recorded process still runs and is the same process.
+    """
+    pid = entry.get("pid")
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists but owned by someone else.
+    except (OSError, TypeError):
+        return False
+    recorded = entry.get("proc_start")
+    if recorded is not None and process_start_ticks(pid) not in (None, recorded):
+        return False
+    return not _is_zombie(pid)
+
+
+def collect_garbage() -> list:
+    """
+    Drop entries whose process is gone (crashed, killed outside devCLI or
+    PID reused). Returns the entries that were removed.
+    """
+    stale = [p for p in load_processes() if not is_alive(p)]
+    if stale:
+        state.end_runs([p["pid"] for p in stale])
+    for entry in stale:
+        logger.info(f"Removed stale run entry for '{entry.get('project')}' (pid {entry.get('pid')}).")
+    return stale
+
+
+def find_processes(project: str, target_dir: str = None) -> list:
+    """
+    Live entries recorded under a project name, or running from `target_dir`.
+    """
+    return [
+        p for p in load_processes()
+        if (p.get("project") == project or (target_dir and p.get("cwd") == target_dir)) and is_alive(p)
+    ]
+
+
+def log_path_for(cwd: str) -> str:
+    """
+    The log file of detached runs started in `cwd`.
+    """
+    return os.path.join(LOG_DIR, f"{os.path.basename(os.path.normpath(cwd))}.log")
+
+
+def tail_lines(path: str, count: int) -> tuple:
+    """
+    (last `count` lines, size) of a log file, read backwards in blocks so
+    long logs are not read whole.
+    """
+    with open(path, "rb") as f:
+        position = size = f.seek(0, os.SEEK_END)
+        data = b""
+        while position > 0 and data.count(b"\n") <= count:
+            step = min(65536, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    lines = data.decode(errors="replace").splitlines()
+    return (lines[-count:] if count > 0 else []), size
+
+
+def launch_detached(project: str, command: str, cwd: str, port=None, env: dict = None) -> dict:
+    """
+    Start a startup command in its own session with output redirected to a
+    log file, record it and return the run entry immediately. `env` is an
+    overlay on top of os.environ.
+    """
+    # Imported here: the executor records the processes it runs through this module.
+    from executor import spawn
+    os.makedirs(LOG_DIR, exist_ok=True)
+    log_path = log_path_for(cwd)
+    with open(log_path, "ab") as log_file:
+        log_file.write(f"\n--- {time.strftime('%Y-%m-%d %H:%M:%S')} {command}\n".encode())
+        log_file.flush()
+        process = spawn(command, cwd=cwd, env=env, new_session=True, output=log_file)
+    logger.info(f"Started '{project}' detached with pid {process.pid}. Logs: {log_path}")
+    return record_process(project, process.pid, command, cwd, mode="detached", port=port, log_path=log_path)
+
+
+def group_alive(pgid: int) -> bool:
+    """
+    True while any process of the group runs. Zombies do not count where
+    /proc shows them.
+    """
+    try:
+        os.killpg(pgid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    if not os.path.isdir("/proc"):
+        return True
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat", "r") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if len(fields) > 2 and int(fields[2]) == pgid and fields[0] != "Z":
+            return True
+    return False
+
+
+def stop_process(entry: dict, timeout: float = 10.0, kill_timeout: float = 5.0) -> bool:
+    """
+    SIGTERM the process (its whole process group when it leads one), wait up
+    to `timeout` seconds, then SIGKILL. For a group, waiting lasts until every
+    member is gone, not just the leader: a child that ignores SIGTERM after
+    its shell exited still gets the SIGKILL. Returns True once all are gone.
+    """
+    pid, pgid = entry.get("pid"), entry.get("pgid")
+    # Only signal the group if the process leads its own group, never ours.
+    own_group = hasattr(os, "killpg") and pgid is not None and pgid == pid and pgid != os.getpgrp()
+
+    def send(sig):
+        try:
+            if own_group:
+                os.killpg(pgid, sig)
+            else:
+                os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def running():
+        return group_alive(pgid) if own_group else is_alive(entry)
+
+    def wait(seconds):
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            if not running():
+                return True
+            time.sleep(0.1)
+        return not running()
+
+    if not is_alive(entry) and not (own_group and group_alive(pgid)):
+        forget_process(pid)
+        return True
+
+    logger.debug(f"Sending SIGTERM to {'group' if own_group else 'process'} {pid}")
+    send(signal.SIGTERM)
+    stopped = wait(timeout)
+    if not stopped:
+        logger.warning(f"{'Process group' if own_group else 'Process'} {pid} did not exit within {timeout}s, sending SIGKILL.")
+        # Repeated, as group members may still fork until they are killed.
+        deadline = time.monotonic() + kill_timeout
+        while not stopped and time.monotonic() < deadline:
+            send(signal.SIGKILL)
+            stopped = wait(0.5)
+
+    if stopped:
+        forget_process(pid)
+    return stopped
+
+
+def _is_zombie(pid: int) -> bool:
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            return f.read().rsplit(")", 1)[1].split()[0] == "Z"
+    except (OSError, IndexError):
+        return False
@@ -0,0 +1,321 @@
+import os, json, time, sqlite3, logging, threading
+from contextlib import contextmanager
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+STATE_DB_PATH = os.path.expanduser(os.path.join("~", ".devcli", "state.db"))
+SCHEMA_VERSION = 2
+BUSY_TIMEOUT = 10.0  # Seconds a writer waits for another dev process to commit.
+RUN_HISTORY_DAYS = 30
+PROJECT_INDEX_SETTING = "projectIndex"  # Version, roots and directory mtimes of the stored project index.
+
+# config.json keys that change while devCLI is used. They live in the store so
+# that switching projects does not rewrite config.json.
+VOLATILE_SETTINGS = ["currentProject"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS aliases (
+    name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS aliases_by_path ON aliases(path);
+CREATE TABLE IF NOT EXISTS projects (
+    path TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    folder TEXT NOT NULL,
+    root TEXT NOT NULL,
+    markers TEXT NOT NULL,
+    tags TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS projects_by_name ON projects(name);
+CREATE INDEX IF NOT EXISTS projects_by_folder ON projects(folder);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    pgid INTEGER,
+    command TEXT,
+    cwd TEXT,
+    mode TEXT,
+    port INTEGER,
+    log_path TEXT,
+    proc_start INTEGER,
+    started_at REAL NOT NULL,
+    ended_at REAL
+);
+CREATE INDEX IF NOT EXISTS runs_active ON runs(ended_at, pid);
+CREATE INDEX IF NOT EXISTS runs_by_project ON runs(project, started_at);
+CREATE TABLE IF NOT EXISTS dir_sizes (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    file_bytes INTEGER NOT NULL,
+    subdirs TEXT NOT NULL
+);
+"""
+
+RUN_COLUMNS = ["project", "pid", "pgid", "command", "cwd", "mode", "port", "log_path", "proc_start", "started_at"]
+
+_local = threading.local()
+
+
+def connect() -> sqlite3.Connection:
+    """
+    The calling thread's connection, opened (and migrated) on first use.
+    WAL mode lets readers continue while another dev process writes.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        with span("state.connect"):
+            os.makedirs(os.path.dirname(STATE_DB_PATH), exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly by transaction().
+            conn = sqlite3.connect(STATE_DB_PATH, timeout=BUSY_TIMEOUT, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            _migrate(conn)
+        _local.conn = conn
+    return conn
+
+
+@contextmanager
+def transaction():
+    """
+    Yield a connection inside a write transaction. BEGIN IMMEDIATE takes the
+    write lock up front, so concurrent writers queue (up to BUSY_TIMEOUT)
+    instead of failing halfway through.
+    """
+    conn = connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another process may have migrated while we waited for the lock.
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            # Every table is created with IF NOT EXISTS, so the schema brings any version up to date.
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    conn.execute(statement)
+            if version < 1:
+                _import_json_state(conn)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _read_json(path):
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not import {path} into the state store: {e}")
+        return None
+
+
+def _import_json_state(conn: sqlite3.Connection) -> None:
+    """
+    One-time import of the JSON files devCLI used before the store. The files
+    are left in place.
+    """
+    now = time.time()
+    aliases = _read_json(os.getenv("ALIAS_PATH")) or {}
+    conn.executemany("INSERT OR IGNORE INTO aliases (name, path, created_at) VALUES (?, ?, ?)",
+                     [(name, path, now) for name, path in aliases.items()])
+
+    config = _read_json(os.getenv("CONFIG_PATH")) or {}
+    for key in VOLATILE_SETTINGS:
+        if config.get(key) is not None:
+            conn.execute("INSERT OR IGNORE INTO settings (key, value, updated_at) VALUES (?, ?, ?)",
+                         (key, json.dumps(config[key]), now))
+
+    run_state = _read_json(os.path.expanduser(os.path.join("~", ".devcli", "run", "state.json"))) or {}
+    for entry in run_state.get("processes", []):
+        conn.execute(f"INSERT INTO runs ({', '.join(RUN_COLUMNS)}) VALUES ({', '.join('?' * len(RUN_COLUMNS))})",
+                     [entry.get(column) for column in RUN_COLUMNS[:-1]] + [entry.get("started_at", now)])
+    logger.info(f"Imported {len(aliases)} aliases and {len(run_state.get('processes', []))} runs into {STATE_DB_PATH}")
+
+
+# Settings
+
+def get_setting(key: str, default=None):
+    row = connect().execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+    return json.loads(row["value"]) if row else default
+
+
+def set_setting(key: str, value) -> None:
+    with transaction() as conn:
+        if value is None:
+            conn.execute("DELETE FROM settings WHERE key = ?", (key,))
+        else:
+            conn.execute("INSERT INTO settings (key, value, updated_at) VALUES (?, ?, ?) "
+                         "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                         (key, json.dumps(value), time.time()))
+
+
+# Aliases
+
+def load_aliases() -> dict:
+    """
+    All aliases in the order they were added.
+    """
+    return {row["name"]: row["path"] for row in connect().execute("SELECT name, path FROM aliases ORDER BY rowid")}
+
+
+def set_aliases(aliases: dict) -> None:
+    """
+    Add or update aliases in one transaction.
+    """
+    now = time.time()
+    with transaction() as conn:
+        conn.executemany("INSERT INTO aliases (name, path, created_at) VALUES (?, ?, ?) "
+                         "ON CONFLICT(name) DO UPDATE SET path = excluded.path",
+                         [(name, path, now) for name, path in aliases.items()])
+
+
+def remove_aliases(names: list) -> int:
+    with transaction() as conn:
+        return conn.executemany("DELETE FROM aliases WHERE name = ?", [(name,) for name in names]).rowcount
+
+
+def replace_aliases(aliases: dict) -> None:
+    """
+    Make the stored aliases equal to `aliases`, touching only changed rows.
+    """
+    now = time.time()
+    with transaction() as conn:
+        current = {row["name"]: row["path"] for row in conn.execute("SELECT name, path FROM aliases")}
+        conn.executemany("DELETE FROM aliases WHERE name = ?", [(name,) for name in current if name not in aliases])
+        conn.executemany("INSERT INTO aliases (name, path, created_at) VALUES (?, ?, ?) "
+                         "ON CONFLICT(name) DO UPDATE SET path = excluded.path",
+                         [(name, path, now) for name, path in aliases.items() if current.get(name) != path])
+
+
+# Projects (the discovery index)
+
+def _project_from_row(row) -> dict:
+    return {"name": row["name"], "path": row["path"], "root": row["root"],
+            "markers": json.loads(row["markers"]), "tags": json.loads(row["tags"])}
+
+
+def iter_projects():
+    """
+    Stored projects ordered by name, read from the cursor one row at a time.
+    """
+    for row in connect().execute("SELECT * FROM projects ORDER BY name"):
+        yield _project_from_row(row)
+
+
+def load_projects() -> list:
+    return list(iter_projects())
+
+
+def find_projects(name: str) -> list:
+    """
+    Projects with this index name or, failing that, this folder name.
+    """
+    conn = connect()
+    rows = conn.execute("SELECT * FROM projects WHERE name = ?", (name,)).fetchall()
+    if not rows:
+        rows = conn.execute("SELECT * FROM projects WHERE folder = ? ORDER BY name", (name,)).fetchall()
+    return [_project_from_row(row) for row in rows]
+
+
+def replace_projects(projects: list, index_meta: dict) -> None:
+    """
+    Store a freshly scanned project index together with the data used to
+    validate it.
+    """
+    with transaction() as conn:
+        conn.execute("INSERT INTO settings (key, value, updated_at) VALUES (?, ?, ?) "
+                     "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                     (PROJECT_INDEX_SETTING, json.dumps(index_meta), time.time()))
+        conn.execute("DELETE FROM projects")
+        conn.executemany("INSERT OR REPLACE INTO projects (path, name, folder, root, markers, tags) VALUES (?, ?, ?, ?, ?, ?)",
+                         [(p["path"], p["name"], os.path.basename(p["path"]), p["root"], json.dumps(p["markers"]),
+                           json.dumps(p["tags"])) for p in projects])
+
+
+# Runs
+
+def add_run(entry: dict) -> int:
+    values = [entry.get(column) for column in RUN_COLUMNS]
+    with transaction() as conn:
+        # Old history is dropped here, so the table does not grow without bound.
+        conn.execute("DELETE FROM runs WHERE ended_at < ?", (time.time() - RUN_HISTORY_DAYS * 86400,))
+        return conn.execute(f"INSERT INTO runs ({', '.join(RUN_COLUMNS)}) VALUES ({', '.join('?' * len(RUN_COLUMNS))})",
+                            values).lastrowid
+
+
+def end_runs(pids: list) -> None:
+    with transaction() as conn:
+        conn.executemany("UPDATE runs SET ended_at = ? WHERE pid = ? AND ended_at IS NULL",
+                         [(time.time(), pid) for pid in pids])
+
+
+def active_runs() -> list:
+    """
+    Runs not marked as ended, as dicts shaped like the old run state entries.
+    """
+    rows = connect().execute("SELECT * FROM runs WHERE ended_at IS NULL ORDER BY started_at").fetchall()
+    return [{key: row[key] for key in row.keys() if key not in ("id", "ended_at") and row[key] is not None} for row in rows]
+
+
+def last_run_times() -> dict:
+    """
+    {cwd: start time of the latest run} over the kept run history.
+    """
+    rows = connect().execute("SELECT cwd, MAX(started_at) AS started_at FROM runs WHERE cwd IS NOT NULL GROUP BY cwd")
+    return {row["cwd"]: row["started_at"] for row in rows}
+
+
+def recent_runs(project: str = None, limit: int = 20) -> list:
+    query, args = "SELECT * FROM runs", []
+    if project:
+        query, args = query + " WHERE project = ?", [project]
+    rows = connect().execute(query + " ORDER BY started_at DESC LIMIT ?", args + [limit]).fetchall()
+    return [dict(row) for row in rows]
+
+
+# Directory sizes (the `dev du` cache)
+
+def load_dir_sizes(root: str) -> dict:
+    """
+    {path: (mtime_ns, file_bytes, subdirs)} of `root` and every directory below it.
+    """
+    rows = connect().execute("SELECT * FROM dir_sizes WHERE path = ? OR (path >= ? AND path < ?)",
+                             (root, root + os.sep, root + chr(ord(os.sep) + 1)))
+    return {row["path"]: (row["mtime_ns"], row["file_bytes"], json.loads(row["subdirs"])) for row in rows}
+
+
+def replace_dir_sizes(root: str, sizes: dict) -> None:
+    """
+    Make the stored entries below `root` equal to `sizes`, dropping those of
+    directories that no longer exist.
+    """
+    with transaction() as conn:
+        conn.execute("DELETE FROM dir_sizes WHERE path = ? OR (path >= ? AND path < ?)",
+                     (root, root + os.sep, root + chr(ord(os.sep) + 1)))
+        conn.executemany("INSERT OR REPLACE INTO dir_sizes (path, mtime_ns, file_bytes, subdirs) VALUES (?, ?, ?, ?)",
+                         [(path, mtime, size, json.dumps(subdirs)) for path, (mtime, size, subdirs) in sizes.items()])
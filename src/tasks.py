@@ -0,0 +1,290 @@
+import os, glob, json, time, shutil, hashlib, logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from runstate import locked_json_file, read_json_file
+from tracing import span
+from executor import execute
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.path.expanduser(os.path.join("~", ".devcli", "cache", "tasks"))
+CACHE_INDEX_PATH = os.path.join(CACHE_DIR, "index.json")
+DEFAULT_CACHE_MAX_BYTES = 1024 ** 3  # 1 GiB, override with "taskCacheMaxBytes" in config.json
+
+
+class TaskError(Exception):
+    pass
+
+
+def load_tasks(project_dir: str) -> dict:
+    """
+    The "tasks" section of a project's devCLI-project.json:
+
+        "tasks": {
+            "build": {"command": "npm run build", "inputs": ["src/**", "package.json"],
+                      "outputs": ["dist/**"], "dependsOn": ["lint"]}
+        }
+    """
+    project_json_path = os.path.join(project_dir, "devCLI-project.json")
+    try:
+        with open(project_json_path, "r") as f:
+            tasks = json.load(f).get("tasks", {})
+    except FileNotFoundError:
+        raise TaskError(f"devCLI-project.json not found in {project_dir}.")
+    except json.JSONDecodeError as e:
+        raise TaskError(f"Could not parse {project_json_path}: {e}")
+    for name, task in tasks.items():
+        if not isinstance(task, dict) or not task.get("command"):
+            raise TaskError(f"Task '{name}' needs a 'command'.")
+    return tasks
+
+
+def expand_globs(project_dir: str, patterns: list) -> list:
+    """
+    Project-relative files matched by glob patterns ('**' is recursive).
+    """
+    files = set()
+    for pattern in patterns or []:
+        for path in glob.glob(os.path.join(project_dir, pattern), recursive=True):
+            if os.path.isfile(path):
+                files.add(os.path.relpath(path, project_dir))
+    return sorted(files)
+
+
+class FileHasher:
+    """
+    Content hashes of files, memoised by (size, mtime) so unchanged files are
+    not read again within a run.
+    """
+    def __init__(self):
+        self._memo = {}
+
+    def hash_file(self, path: str) -> str:
+        st = os.stat(path)
+        key = (path, st.st_size, st.st_mtime_ns)
+        if key not in self._memo:
+            digest = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            self._memo[key] = digest.hexdigest()
+        return self._memo[key]
+
+
+def cacheable(task: dict) -> bool:
+    """
+    Only tasks that declare `inputs` are cached. Without them nothing tells
+    when the result is stale, so the task always runs.
+    """
+    return bool(task.get("inputs"))
+
+
+def _digest_files(digest, project_dir: str, patterns: list, hasher: FileHasher) -> None:
+    for rel_path in expand_globs(project_dir, patterns):
+        digest.update(rel_path.encode())
+        digest.update(hasher.hash_file(os.path.join(project_dir, rel_path)).encode())
+
+
+def task_key(project_dir: str, name: str, task: dict, dep_keys: list, hasher: FileHasher, env: dict = None) -> str:
+    """
+    Cache key of a task: its command, declared outputs, the environment
+    overlay it runs with, the content of every input file and the keys of
+    the tasks it depends on.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([name, task["command"], task.get("outputs", []), sorted((env or {}).items()), dep_keys]).encode())
+    _digest_files(digest, project_dir, task.get("inputs", []), hasher)
+    return digest.hexdigest()
+
+
+def result_key(project_dir: str, name: str, task: dict, hasher: FileHasher, env: dict = None) -> str:
+    """
+    Key of a task that is not cached, taken after it ran: its command,
+    environment and the content of its outputs. Dependents see a new key
+    only when those outputs changed.
+    """
+    digest = hashlib.sha256()
+    digest.update(json.dumps([name, task["command"], sorted((env or {}).items())]).encode())
+    _digest_files(digest, project_dir, task.get("outputs", []), hasher)
+    return digest.hexdigest()
+
+
+def _entry_dir(key: str) -> str:
+    return os.path.join(CACHE_DIR, key[:2], key)
+
+
+def restore(project_dir: str, key: str):
+    """
+    Copy cached outputs of `key` back into the project. Returns the cached log,
+    or None on a cache miss.
+    """
+    entry_dir = _entry_dir(key)
+    meta_path = os.path.join(entry_dir, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    files_dir = os.path.join(entry_dir, "files")
+    for rel_path in meta["outputs"]:
+        target = os.path.join(project_dir, rel_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(os.path.join(files_dir, rel_path), target)
+    with locked_json_file(CACHE_INDEX_PATH, {}) as index:
+        if key in index:
+            index[key]["last_used"] = time.time()
+    return meta.get("log", "")
+
+
+def store(project_dir: str, key: str, task: dict, log: str, max_bytes: int) -> None:
+    """
+    Save a successful run's outputs under `key` and evict least recently used
+    entries beyond `max_bytes`.
+    """
+    entry_dir = _entry_dir(key)
+    files_dir = os.path.join(entry_dir, "files")
+    outputs = expand_globs(project_dir, task.get("outputs", []))
+    size = 0
+    for rel_path in outputs:
+        target = os.path.join(files_dir, rel_path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(os.path.join(project_dir, rel_path), target)
+        size += os.path.getsize(target)
+    os.makedirs(entry_dir, exist_ok=True)
+    with open(os.path.join(entry_dir, "meta.json"), "w") as f:
+        json.dump({"outputs": outputs, "log": log, "created": time.time()}, f)
+
+    with locked_json_file(CACHE_INDEX_PATH, {}) as index:
+        index[key] = {"size": size, "last_used": time.time(), "project": project_dir}
+        total = sum(e["size"] for e in index.values())
+        for old_key in sorted(index, key=lambda k: index[k]["last_used"]):
+            if total <= max_bytes or old_key == key:
+                continue
+            total -= index[old_key]["size"]
+            shutil.rmtree(_entry_dir(old_key), ignore_errors=True)
+            del index[old_key]
+            logger.debug(f"Evicted task cache entry {old_key}")
+
+
+def cache_stats() -> dict:
+    index = read_json_file(CACHE_INDEX_PATH, {})
+    return {"entries": len(index), "bytes": sum(e["size"] for e in index.values())}
+
+
+def clear_cache() -> None:
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+
+def resolve_order(tasks: dict, requested: list) -> dict:
+    """
+    Requested tasks plus their transitive dependencies, as {name: [deps]}.
+    """
+    graph, stack = {}, list(requested)
+    while stack:
+        name = stack.pop()
+        if name in graph:
+            continue
+        if name not in tasks:
+            raise TaskError(f"Unknown task '{name}'. Available: {', '.join(sorted(tasks)) or 'none'}.")
+        graph[name] = list(tasks[name].get("dependsOn", []))
+        stack.extend(graph[name])
+    # Reject cycles up front instead of waiting forever.
+    visiting, done = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise TaskError(f"Task dependency cycle involving '{name}'.")
+        visiting.add(name)
+        for dep in graph[name]:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in graph:
+        visit(name)
+    return graph
+
+
+def run_task(project_dir: str, name: str, task: dict, key: str, use_cache: bool, max_bytes: int,
+             env: dict = None, cancel=None) -> dict:
+    """
+    Run one task, or restore it from the cache when its key is known.
+    """
+    started = time.perf_counter()
+    if use_cache:
+        log = restore(project_dir, key)
+        if log is not None:
+            return {"task": name, "status": "cached", "log": log, "seconds": time.perf_counter() - started}
+
+    with span(f"task {name}"):
+        process = execute(task["command"], cwd=project_dir, env=env, capture=True, merge_stderr=True,
+                          shell=True, cancel=cancel)
+    output = process.stdout if process.error is None else process.error
+    result = {"task": name, "log": output, "seconds": time.perf_counter() - started}
+    if process.cancelled:
+        result["status"] = "cancelled"
+        return result
+    if not process.ok:
+        result.update(status="failed", returncode=process.returncode)
+        return result
+    if use_cache:
+        try:
+            store(project_dir, key, task, output, max_bytes)
+        except OSError as e:
+            logger.warning(f"Could not cache outputs of task '{name}': {e}")
+    result["status"] = "ran"
+    return result
+
+
+def run_tasks(project_dir: str, requested: list, jobs: int = 4, use_cache: bool = True,
+              max_bytes: int = DEFAULT_CACHE_MAX_BYTES, env: dict = None, on_result=None, cancel=None) -> list:
+    """
+    Run the requested tasks and their dependencies. Independent tasks run in
+    parallel on up to `jobs` threads; a task starts once all its dependencies
+    succeeded and is skipped if one of them failed. Setting the `cancel` event
+    (a threading.Event) stops running tasks and starts no new ones.
+    """
+    tasks = load_tasks(project_dir)
+    graph = resolve_order(tasks, requested)
+    hasher, keys, results = FileHasher(), {}, []
+    pending, running = dict(graph), {}
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            if cancel and cancel.is_set():
+                pending.clear()
+            running_names = {name for name, _ in running.values()}
+            for name, deps in list(pending.items()):
+                if any(d in pending or d in running_names for d in deps):
+                    continue
+                del pending[name]
+                failed_deps = [d for d in deps if d not in keys]
+                if failed_deps:
+                    result = {"task": name, "status": "skipped", "log": f"dependency failed: {', '.join(failed_deps)}"}
+                    results.append(result)
+                    if on_result:
+                        on_result(result)
+                    continue
+                # Keys are computed when a task becomes ready, after its dependencies wrote their outputs.
+                key = task_key(project_dir, name, tasks[name], [keys[d] for d in deps], hasher, env)
+                task_cached = use_cache and cacheable(tasks[name])
+                running[pool.submit(run_task, project_dir, name, tasks[name], key, task_cached, max_bytes, env, cancel)] = (name, key)
+                running_names.add(name)
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, key = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.error(f"Task '{name}' could not be run: {e}")
+                    result = {"task": name, "status": "failed", "log": str(e)}
+                if result["status"] in ("ran", "cached"):
+                    keys[name] = key if cacheable(tasks[name]) else result_key(project_dir, name, tasks[name], hasher, env)
+                results.append(result)
+                if on_result:
+                    on_result(result)
+    return results
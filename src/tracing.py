@@ -0,0 +1,151 @@
+import os, json, time, threading, functools, logging
+
+logger = logging.getLogger(__name__)
+
+# Tracing is off by default. Everything below is designed so that the disabled
+# path costs a single global lookup per span.
+_enabled = False
+_origin_ns = time.perf_counter_ns()
+_spans = []  # Finished spans: (name, start_ns, end_ns, depth, thread_id, args)
+_local = threading.local()
+
+TRACE_DIR = os.path.expanduser(os.path.join("~", ".devcli", "traces"))
+
+
+class _NullSpan:
+    """
+    Shared no-op span returned while tracing is disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "args", "start_ns", "depth")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.depth = getattr(_local, "depth", 0)
+        _local.depth = self.depth + 1
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end_ns = time.perf_counter_ns()
+        _local.depth = self.depth
+        if exc_type is not None:
+            self.args = dict(self.args or {}, error=exc_type.__name__)
+        _spans.append((self.name, self.start_ns, end_ns, self.depth, threading.get_ident(), self.args))
+        return False
+
+
+def enable() -> None:
+    """
+    Start recording spans. The trace origin is the moment tracing was enabled.
+    """
+    global _enabled, _origin_ns
+    if not _enabled:
+        _origin_ns = time.perf_counter_ns()
+    _enabled = True
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    _spans.clear()
+
+
+def span(name: str, **args):
+    """
+    Context manager timing a phase:
+
+        with span("config.load_config", path=path):
+            ...
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, args or None)
+
+
+def traced(name: str = None):
+    """
+    Decorator variant of `span`. Uses the qualified function name by default.
+    """
+    def decorator(fn):
+        span_name = name or f"{fn.__module__}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Span(span_name, None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def format_report(width: int = 30) -> list:
+    """
+    Flame-style breakdown of the recorded spans, in start order and indented by
+    nesting depth. Returns a list of lines.
+    """
+    if not _spans:
+        return ["No spans recorded."]
+
+    total_ns = max(time.perf_counter_ns(), max(s[2] for s in _spans)) - _origin_ns
+    lines = [f"Trace breakdown (total {total_ns / 1e6:.1f} ms)"]
+    main_thread = threading.main_thread().ident
+    for name, start_ns, end_ns, depth, thread_id, args in sorted(_spans, key=lambda s: (s[1], s[3])):
+        duration_ns = end_ns - start_ns
+        share = duration_ns / total_ns if total_ns else 0
+        bar = "█" * max(1, round(share * width)) if duration_ns else ""
+        label = "  " * depth + name
+        if thread_id != main_thread:
+            label += f" [thread {thread_id}]"
+        if args:
+            label += " " + " ".join(f"{k}={v}" for k, v in args.items())
+        lines.append(f"{duration_ns / 1e6:>9.2f} ms {share:>6.1%} {bar:<{width}} {label}")
+    return lines
+
+
+def export_chrome_trace(path: str = None) -> str:
+    """
+    Write the recorded spans in Chrome trace-event format (load it in
+    chrome://tracing or Perfetto). Returns the written path.
+    """
+    if not path:
+        os.makedirs(TRACE_DIR, exist_ok=True)
+        path = os.path.join(TRACE_DIR, f"trace-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}.json")
+
+    pid = os.getpid()
+    events = []
+    for name, start_ns, end_ns, depth, thread_id, args in _spans:
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": (start_ns - _origin_ns) / 1000,
+            "dur": (end_ns - start_ns) / 1000,
+            "pid": pid,
+            "tid": thread_id,
+        }
+        if args:
+            event["args"] = {k: str(v) for k, v in args.items()}
+        events.append(event)
+
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    logger.debug(f"Chrome trace written to {path}")
+    return path
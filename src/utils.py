@@ -1,15 +1,21 @@
-import os, sys, subprocess, logging
+import os, logging
 from typing import List
-from InquirerPy import inquirer
-from dotenv import load_dotenv
-from config import load_config # load_config uses logging
-import click # Added for click.echo in updateRepo
+import prompts
+from envfiles import load_cli_env, project_env
+from config import load_config, get_roots, BASE_PATH # load_config uses logging
+from tracing import traced
+from executor import execute, spawn
+from discovery import TAG_MARKERS, load_index, iter_index, lookup_project
+from workspaces import install_command
+from pyenv import sync_environment
+import gitsync
+import doctor
+import render
 
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-logger.debug(f"BASE_PATH from env: {os.getenv('BASE_PATH')}")
-BASE_PATH = os.getenv("BASE_PATH")
+load_cli_env()
+logger.debug(f"BASE_PATH from env: {BASE_PATH}")
 VSCODE_PATH = os.getenv("VSCODE_PATH")
 NPM_PATH = os.getenv("NPM_PATH")
 DOCKER_PATH = os.getenv("DOCKER_PATH")
@@ -20,7 +26,22 @@ aliases = load_config("alias")
 
 ## Fuction to get dirs in a path
 def get_dirs_in_path(path: str) -> List[str]:
-    return [d for d in os.listdir(path) if os.path.isdir(os.path.join(path, d))]
+    with os.scandir(path) as it:
+        return [e.name for e in it if e.is_dir()]
+
+
+def list_projects(refresh: bool = False) -> list:
+    """
+    All projects under the configured roots, from the cached project index.
+    """
+    return load_index(get_roots(), refresh=refresh)
+
+
+def iter_projects(refresh: bool = False):
+    """
+    list_projects() as a generator, for output that streams.
+    """
+    return iter_index(get_roots(), refresh=refresh)
 
 
 def select_dir_with_package_json():
@@ -33,27 +54,26 @@ def select_dir_with_package_json():
     """
     while True:
         # Get a list of directories containing `package.json`
-        dirs_with_package_json = [
-            d for d in os.listdir(BASE_PATH)
-            if os.path.isdir(os.path.join(BASE_PATH, d)) and
-            os.path.exists(os.path.join(BASE_PATH, d, "package.json"))
-        ]
+        projects_by_name = {p["name"]: p["path"] for p in list_projects() if "package.json" in p["markers"]}
+        dirs_with_package_json = list(projects_by_name)
 
         if not dirs_with_package_json:
             logger.warning("No directories with 'package.json' found.")
             return None
 
         # Prompt user to select a directory
-        selected_dir = inquirer.select(
+        selected_dir = prompts.select(
             message="Select a directory with 'package.json':",
             choices=dirs_with_package_json,
             default=dirs_with_package_json[0],
-        ).execute()
+            key="select.project",
+        )
 
         # Return the selected directory
-        return os.path.join(BASE_PATH, selected_dir)
+        return projects_by_name[selected_dir]
 
 
+@traced("utils.resolve_folder")
 def resolve_folder(folder_name):
     """
     Resolve the folder name using alias if applicable and validate existence.
@@ -62,10 +82,15 @@ def resolve_folder(folder_name):
         folder_name = aliases[folder_name]
     
     
-    target_dir = os.path.join(BASE_PATH, folder_name)
+    target_dir = os.path.join(BASE_PATH or "", folder_name)
     logger.debug(f"Resolved target_dir: {target_dir}")
     
     if not os.path.exists(target_dir):
+        # Not directly under BASE_PATH: look it up in the other roots and nested workspaces.
+        project = lookup_project(get_roots(), folder_name)
+        if project:
+            logger.debug(f"Resolved '{folder_name}' from project index: {project['path']}")
+            return project["path"]
         logger.warning(f"Target directory {target_dir} does not exist.")
         return None
     
@@ -85,82 +110,72 @@ def validate_package_json(target_dir):
 
 def change_directory(target_dir):
     """
-        Change the working directory to the target directory.
+        Change the working directory to the target directory. Only for the
+        `cd` command: everything that runs commands passes `cwd` to the
+        executor instead.
     """
     os.chdir(target_dir)
 
 
-def open_in_vscode():
+def open_in_vscode(target_dir):
     """
-    Open current directory in VS Code (or code-server) and detach from terminal.
+    Open a directory in VS Code (or code-server), detached from the terminal.
     """
-    logger.debug(f"Attempting to open VS Code at {os.getcwd()}")
+    logger.debug(f"Attempting to open VS Code at {target_dir}")
+    problem = doctor.preflight("VSCODE_PATH")
+    if problem:
+        logger.error(f"Error: {problem}")
+        return
     try:
-        kwargs = {
-            "stdout": subprocess.DEVNULL,
-            "stderr": subprocess.DEVNULL,
-        }
-
-        # Add platform-specific options
-        if sys.platform.startswith("win"):
-            kwargs["creationflags"] = subprocess.DETACHED_PROCESS
-        elif sys.platform.startswith("linux") or sys.platform.startswith("darwin"):
-            # On Unix-like systems (Linux/macOS/iOS): run via shell in background
-            subprocess.Popen(f"{VSCODE_PATH} . >/dev/null 2>&1 &", shell=True)
-            return
-
-        # Default fallback (Windows)
-        subprocess.Popen([VSCODE_PATH, "."], **kwargs)
-
+        spawn([VSCODE_PATH, "."], cwd=target_dir, new_session=True, quiet=True)
     except FileNotFoundError:
         logger.error(f"Error: VS Code or code-server not found at VSCODE_PATH: {VSCODE_PATH}. Please check your .env file.")
     except Exception as e:
         logger.error(f"Error opening VS Code: {e}")
 
 
-def run_npm_dev():
+def _run_dev_server(target_dir, binary, dev_args, install_args, name):
+    """
+    Run a package manager's dev script in the foreground; when it fails, try
+    to repair the install so the next attempt can succeed.
+    """
+    dev_command = " ".join([name] + dev_args)
+    problem = doctor.preflight(f"{name.upper()}_PATH")
+    if problem:
+        logger.error(f"Error: {problem}")
+        return
+    logger.debug(f"Running '{dev_command}' with {binary} in {target_dir}")
+    result = execute([binary] + dev_args, cwd=target_dir, env=project_env(target_dir), project=os.path.basename(target_dir))
+    if result.error:
+        logger.error(f"Error: '{name}' is not installed or not in your PATH. {name.upper()}_PATH: {binary}")
+        return
+    if result.ok:
+        return
+    logger.error(f"Error: Command '{dev_command}' failed with exit code {result.returncode}. Attempting recovery...")
+    install_command_text = " ".join([name] + install_args)
+    logger.info(f"Attempting '{install_command_text}'...")
+    install = execute([binary] + install_args, cwd=target_dir)
+    if install.ok:
+        logger.info(f"'{install_command_text}' completed. Please try running the dev command again.")
+    else:
+        logger.error(f"Error: {install.describe()}")
+
+
+def run_npm_dev(target_dir):
     """
         Run 'npm run dev' and handle errors.
     """
-    logger.debug(f"Running 'npm run dev' with NPM_PATH: {NPM_PATH}")
-    try:
-        subprocess.run([NPM_PATH, "run", "dev"], check=True)
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error: Command 'npm run dev' failed with exit code {e.returncode}. Attempting recovery...")
-        logger.debug(e)
-        try:
-            logger.info("Attempting 'npm i --force'...")
-            subprocess.run([NPM_PATH, "i", "--force"], check=True)
-            logger.info("'npm i --force' completed. Please try running the dev command again.")
-        except subprocess.CalledProcessError as install_error:
-            logger.error(f"Error: 'npm i --force' failed with exit code {install_error.returncode}.")
-            logger.debug(install_error)
-    except FileNotFoundError:
-        logger.error(f"Error: 'npm' is not installed or not in your PATH. NPM_PATH: {NPM_PATH}")
+    _run_dev_server(target_dir, NPM_PATH, ["run", "dev"], ["i", "--force"], "npm")
 
 
-def run_bun_dev():
+def run_bun_dev(target_dir):
     """
         Run 'bun dev' and handle errors.
     """
-    logger.debug(f"Running 'bun dev' with BUN_PATH: {BUN_PATH}")
-    try:
-        subprocess.run([BUN_PATH, "dev"], check=True)
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error: Command 'bun dev' failed with exit code {e.returncode}. Attempting recovery...")
-        logger.debug(e)
-        try:
-            logger.info("Attempting 'bun install'...")
-            subprocess.run([BUN_PATH, "install"], check=True)
-            logger.info("'bun install' completed. Please try running the dev command again.")
-        except subprocess.CalledProcessError as install_error:
-            logger.error(f"Error: 'bun install' failed with exit code {install_error.returncode}.")
-            logger.debug(install_error)
-    except FileNotFoundError:
-        logger.error(f"Error: 'bun' is not installed or not in your PATH. BUN_PATH: {BUN_PATH}")
+    _run_dev_server(target_dir, BUN_PATH, ["dev"], ["install"], "bun")
 
 
-def run_docker_compose_up(state, build, detach):
+def run_docker_compose_up(state, build, detach, target_dir):
     ## Run docker-compose with the provided arguments
     logger.debug(f"Running 'docker compose {state}' with build={build}, detach={detach}. DOCKER_PATH: {DOCKER_PATH}")
     args = [state]
@@ -169,107 +184,99 @@ def run_docker_compose_up(state, build, detach):
     if detach:
         args.append("--detach")
 
-    try:
-        subprocess.run([DOCKER_PATH, "compose"] + args, check=True)
-    except FileNotFoundError:
+    problem = doctor.preflight("DOCKER_PATH")
+    if problem:
+        logger.error(f"Error: {problem}")
+        return
+    result = execute([DOCKER_PATH, "compose"] + args, cwd=target_dir)
+    if result.error:
         logger.error(f"Error: 'docker compose' is not installed or not in your PATH. DOCKER_PATH: {DOCKER_PATH}")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error: Command 'docker compose {state}' failed with exit code {e.returncode}.")
-        logger.debug(e)
+    elif not result.ok:
+        logger.error(f"Error: Command 'docker compose {state}' failed with exit code {result.returncode}.")
         
 
+def _has_marker(folder: str, tag: str) -> bool:
+    return any(os.path.exists(os.path.join(folder, marker)) for marker in TAG_MARKERS[tag])
+
 def is_bun(folder: str) -> bool:
-    return (
-        os.path.exists(os.path.join(folder, "bun.lockb")) or
-        os.path.exists(os.path.join(folder, "bun.lock")) or
-        os.path.exists(os.path.join(folder, ".bunfig.toml"))
-    )
+    return _has_marker(folder, "BUN")
 
 def is_npm(folder: str) -> bool:
-    return (
-        os.path.exists(os.path.join(folder, "package-lock.json")) or
-        os.path.exists(os.path.join(folder, "yarn.lock")) or
-        os.path.exists(os.path.join(folder, "pnpm-lock.yaml"))
-    )
+    return _has_marker(folder, "NPM")
 
 def is_python(folder: str) -> bool:
-    return (
-        os.path.exists(os.path.join(folder, "requirements.txt")) or
-        os.path.exists(os.path.join(folder, ".venv")) or
-        os.path.exists(os.path.join(folder, "pyproject.toml"))
-    )
+    return _has_marker(folder, "PYTHON")
 
 def is_docker(folder: str) -> bool:
-    return (
-        os.path.exists(os.path.join(folder, "Dockerfile")) or
-        os.path.exists(os.path.join(folder, "docker-compose.yml"))
-    )
+    return _has_marker(folder, "DOCKER")
 
 
-def updateRepo(force: bool, no_pull: bool) -> bool:
+def updateRepo(force: bool, no_pull: bool, target_dir: str) -> bool:
     """
-        Update the repository by pulling the latest changes from the remote.
+        Fetch the repository and fast-forward the checked out branch. Dirty or
+        diverged repos are reported and left alone. Returns True when the branch
+        moved or, with `force`, when it was already up to date.
     """
-    logger.debug(f"Updating repo. Force: {force}, No Pull: {no_pull}")
-    try:
-        if force:
-            logger.warning("The --force option will discard any local changes and reset your current branch to origin/main.")
-            confirm_force_update = inquirer.confirm(
-                message="Are you sure you want to proceed with the force update? This is a destructive operation.",
-                default=False
-            ).execute()
-            if not confirm_force_update:
-                logger.info("Force update cancelled by the user.")
-                click.echo("Force update cancelled.")
-                return False # Indicate that the update was cancelled
-            
-            logger.info("Forcing update: git fetch --all and git reset --hard origin/main")
-            subprocess.run(["git", "fetch", "--all"], check=True)
-            subprocess.run(["git", "reset", "--hard", "origin/main"], check=True)
-            logger.info("Force update successful.")
-            return True
-        elif not no_pull:
-            logger.info("Pulling latest changes: git pull")
-            subprocess.run(["git", "pull"], check=True)
-            logger.info("Git pull successful.")
-            return True
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error: Git command failed with exit code {e.returncode}.")
-        logger.debug(e)
-        return False
-    except FileNotFoundError:
-        logger.error("Error: 'git' is not installed or not in your PATH.")
-        return False
-    except Exception as e:
-        logger.error(f"An unexpected error occurred during repo update: {e}")
-        logger.debug(e)
+    logger.debug(f"Updating repo in {target_dir}. Force: {force}, No Pull: {no_pull}")
+    if no_pull:
+        logger.debug("Repo update skipped as no_pull is True.")
         return False
 
-    logger.debug("Repo update skipped as no_pull is True and force is False.")
-    return False
-    
+    # --force always fetches; otherwise a fetch younger than fetchTtl is reused.
+    fetch_ttl = 0 if force else load_config().get("fetchTtl", gitsync.DEFAULT_FETCH_TTL)
+    report = gitsync.update_repo(os.path.basename(target_dir), target_dir, fetch_ttl=fetch_ttl)
+    message = f"{os.path.basename(target_dir)}: {gitsync.describe(report)}"
+    if report["status"] == gitsync.FAILED:
+        logger.error(message)
+    else:
+        logger.info(message)
+    return report["status"] == gitsync.UPDATED or (force and report["status"] == gitsync.UP_TO_DATE)
 
-def run_install_package(package_manager: str):
+
+@traced("utils.run_install_package")
+def run_install_package(package_manager: str, cwd: str = None, package_name: str = None) -> bool:
     """
-        Run the package manager's install command.
+        Run the package manager's install command, optionally for a single
+        workspace package only.
     """
-    logger.debug(f"Running install for package manager: {package_manager}")
-    try:
-        if package_manager == "npm":
-            logger.info(f"Running 'npm install' with NPM_PATH: {NPM_PATH}")
-            subprocess.run([NPM_PATH, "install"], check=True)
-            logger.info("'npm install' successful.")
-        elif package_manager == "bun":
-            logger.info(f"Running 'bun install' with BUN_PATH: {BUN_PATH}")
-            subprocess.run([BUN_PATH, "install"], check=True)
-            logger.info("'bun install' successful.")
-        else:
-            logger.error(f"Error: Unsupported package manager '{package_manager}'.")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"Error: Command '{package_manager} install' failed with exit code {e.returncode}.")
-        logger.debug(e)
-    except FileNotFoundError:
+    logger.debug(f"Running install for package manager: {package_manager}, package: {package_name}")
+    if package_manager == "uv" and not package_name:
+        return sync_python_env(cwd)
+    command = install_command(package_manager, package_name)
+    if not command:
+        logger.error(f"Error: Unsupported package manager '{package_manager}'.")
+        return False
+    # Prefer the binaries configured in .env over whatever is on PATH.
+    configured_paths = {"npm": NPM_PATH, "bun": BUN_PATH}
+    if configured_paths.get(package_manager):
+        command[0] = configured_paths[package_manager]
+
+    command_text = " ".join([package_manager] + command[1:])
+    logger.info(f"Running '{command_text}' with {command[0]}")
+    result = execute(command, cwd=cwd)
+    if result.ok:
+        logger.info(f"'{command_text}' successful.")
+        return True
+    if result.error:
         logger.error(f"Error: '{package_manager}' is not installed or not in your PATH. Path for {package_manager.upper()}_PATH might be missing in .env or incorrect.")
+    else:
+        logger.error(f"Error: Command '{command_text}' failed with exit code {result.returncode}.")
+    return False
+
+
+def sync_python_env(target_dir: str, force: bool = False) -> bool:
+    """
+        Create or update the project's .venv from its lockfile, requirements
+        or pyproject.toml (uv when installed, venv + pip otherwise).
+    """
+    report = sync_environment(target_dir, force=force)
+    source = report["source"] or "no dependency file"
+    if report["status"] == "failed":
+        logger.error(f"Error: Could not sync .venv of {target_dir}: {report['error']}")
+        render.status(f"❌ Could not sync .venv ({report['tool']}, {source}): {report['error']}")
+        return False
+    render.status(f"🐍 .venv {report['status']} ({report['tool']}, {source}) in {report['seconds']:.1f}s")
+    return True
 
 
 PROJECT_DETECTORS = {
@@ -0,0 +1,180 @@
+import os, re, time, hashlib, logging
+
+from runstate import locked_json_file, read_json_file, is_alive, process_start_ticks
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.path.expanduser(os.path.join("~", ".devcli", "cache", "start.json"))
+
+# Files whose content decides whether images (and installed dependencies) are stale.
+BUILD_INPUTS = ["Dockerfile", "docker-compose.yml", "docker-compose.yaml", "compose.yml", "compose.yaml", ".dockerignore",
+                "package.json", "package-lock.json", "bun.lock", "bun.lockb", "yarn.lock", "pnpm-lock.yaml",
+                "pyproject.toml", "uv.lock", "poetry.lock", "requirements.txt"]
+COMPOSE_FILES = ["docker-compose.yml", "docker-compose.yaml", "compose.yml", "compose.yaml"]
+
+# "docker-compose up --build" or "docker compose ... up ... --build", possibly after other commands.
+COMPOSE_UP = re.compile(r"(?P<compose>\S*docker-compose|\S*docker\s+compose)\b(?P<args>[^;&|]*?)\bup\b")
+BUILD_FLAG = re.compile(r"(?<=\s)--build(?=\s|$)")
+# Seconds after which a prewarm still marked "running" is taken for dead, even if its PID was reused.
+PREWARM_TIMEOUT = 3600.0
+
+
+def _fingerprint(path: str):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _load() -> dict:
+    return read_json_file(CACHE_PATH, {})
+
+
+def _update(name: str, **fields) -> None:
+    try:
+        with locked_json_file(CACHE_PATH, {}) as cache:
+            cache.setdefault(name, {}).update(fields)
+    except OSError as e:
+        logger.warning(f"Could not write {CACHE_PATH}: {e}")
+
+
+def project_record(name: str, alias_target):
+    """
+    The cached (path, project config) of the default project, or None when
+    its alias now points elsewhere or devCLI-project.json changed.
+    """
+    record = _load().get(name)
+    if not record or record.get("alias") != alias_target or "config" not in record:
+        return None
+    if _fingerprint(os.path.join(record["path"], "devCLI-project.json")) != record.get("project_json"):
+        return None
+    return record["path"], record["config"]
+
+
+def remember_project(name: str, alias_target, target_dir: str, project_config: dict) -> None:
+    _update(name, alias=alias_target, path=target_dir, config=project_config,
+            project_json=_fingerprint(os.path.join(target_dir, "devCLI-project.json")))
+
+
+def inputs_hash(name: str, target_dir: str) -> str:
+    """
+    Content hash of the project's BUILD_INPUTS. Files are only read again when
+    their mtime or size changed since the last call.
+    """
+    fingerprints = {file: _fingerprint(os.path.join(target_dir, file)) for file in BUILD_INPUTS}
+    fingerprints = {file: fp for file, fp in fingerprints.items() if fp}
+    record = _load().get(name, {})
+    if record.get("path") == target_dir and record.get("inputs") == fingerprints and record.get("inputs_hash"):
+        return record["inputs_hash"]
+    digest = hashlib.sha256()
+    for file in sorted(fingerprints):
+        digest.update(file.encode() + b"\0")
+        try:
+            with open(os.path.join(target_dir, file), "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        except OSError as e:
+            logger.debug(f"Could not hash {file}: {e}")
+        digest.update(b"\0")
+    value = digest.hexdigest()
+    _update(name, inputs=fingerprints, inputs_hash=value)
+    return value
+
+
+def compose_program(startup_command: str):
+    """
+    "docker-compose" or "docker compose" with the options the startup command
+    gives it before `up` (-f, -p, ...), when it starts containers with compose.
+    """
+    match = COMPOSE_UP.search(startup_command or "")
+    return re.sub(r"\s+", " ", match.group("compose") + match.group("args")).strip() if match else None
+
+
+def build_command(startup_command: str) -> str:
+    """
+    The `build` that the compose `up --build` of the startup command runs.
+    """
+    return f"{compose_program(startup_command)} build"
+
+
+def without_build(startup_command: str) -> str:
+    """
+    The startup command with `--build` dropped from its compose `up`.
+    """
+    match = COMPOSE_UP.search(startup_command)
+    rest = startup_command[match.end():]
+    tail = re.match(r"[^;&|]*", rest).group(0)
+    return startup_command[:match.end()] + re.sub(r"\s+--build(?=\s|$)", "", tail) + rest[len(tail):]
+
+
+def plan_build(name: str, target_dir: str, startup_command: str, force: bool = False) -> tuple:
+    """
+    (command to run, inputs hash to record once it built) for a compose
+    startup command with --build. --build is dropped while the hash matches
+    the last build; the hash is None when nothing is built.
+    """
+    match = COMPOSE_UP.search(startup_command or "")
+    if not match or not BUILD_FLAG.search(re.match(r"[^;&|]*", startup_command[match.end():]).group(0)):
+        return startup_command, None
+    current = inputs_hash(name, target_dir)
+    if not force and last_build(name) == current:
+        return without_build(startup_command), None
+    return startup_command, current
+
+
+def last_build(name: str):
+    return _load().get(name, {}).get("built_hash")
+
+
+def record_build(name: str, value) -> None:
+    _update(name, built_hash=value)
+
+
+def prewarm_commands(target_dir: str, startup_command: str) -> list:
+    """
+    Commands that bring images up to date ahead of `start`: pull the base
+    images and build. Empty for projects that do not run on compose.
+    """
+    compose = compose_program(startup_command)
+    if not compose or not any(os.path.exists(os.path.join(target_dir, f)) for f in COMPOSE_FILES):
+        return []
+    return [f"{build_command(startup_command)} --pull", f"{compose} pull --ignore-buildable"]
+
+
+def record_prewarm(name: str, status: str, **fields) -> None:
+    _update(name, prewarm=dict(fields, status=status, at=time.time()))
+
+
+def attach_prewarm(name: str, pid: int) -> None:
+    """
+    Record the PID of a background prewarm, unless it already finished or
+    recorded itself.
+    """
+    try:
+        with locked_json_file(CACHE_PATH, {}) as cache:
+            prewarm = cache.get(name, {}).get("prewarm")
+            if prewarm and prewarm["status"] == "running" and not prewarm.get("pid"):
+                prewarm.update(pid=pid, proc_start=process_start_ticks(pid))
+    except OSError as e:
+        logger.warning(f"Could not write {CACHE_PATH}: {e}")
+
+
+def last_prewarm(name: str):
+    """
+    The last prewarm record. A "running" one whose process is gone or that
+    started more than PREWARM_TIMEOUT ago is reported as failed.
+    """
+    prewarm = _load().get(name, {}).get("prewarm")
+    if prewarm and prewarm["status"] == "running":
+        if time.time() - prewarm.get("at", 0) > PREWARM_TIMEOUT or (prewarm.get("pid") and not is_alive(prewarm)):
+            return dict(prewarm, status="failed", error="it stopped before finishing")
+    return prewarm
+
+
+def installed_hash(name: str):
+    return _load().get(name, {}).get("installed_hash")
+
+
+def record_install(name: str, value: str) -> None:
+    _update(name, installed_hash=value)
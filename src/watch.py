@@ -0,0 +1,429 @@
+import os, re, sys, time, errno, select, struct, logging, threading
+import ctypes, ctypes.util
+
+import tasks as task_runner
+from executor import spawn, terminate
+
+logger = logging.getLogger(__name__)
+
+# Always ignored, with or without a .gitignore. Task outputs are ignored as well (see watch_tasks).
+BASE_IGNORE = [".git/", "node_modules/", ".venv/", "venv/", "__pycache__/", "*.pyc", "*.swp", "*~"]
+DEFAULT_DEBOUNCE = 0.2  # Seconds without new events before a burst counts as finished.
+POLL_INTERVAL = 0.5
+
+# From <sys/inotify.h>.
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MODIFY | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct("iIII")
+
+# A batch containing this path means "anything may have changed" (the event queue overflowed).
+EVERYTHING = "*"
+
+
+def glob_regex(pattern: str) -> str:
+    """
+    Translate a glob with '**' support into a regular expression over
+    '/'-separated relative paths.
+    """
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            body = pattern[i + 1:end]
+            out.append("[" + ("^" + body[1:] if body.startswith("!") else body) + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+def compile_patterns(patterns: list):
+    """
+    One regex matching any of the glob patterns, or None for an empty list.
+    """
+    patterns = [p[2:] if p.startswith("./") else p for p in patterns or []]
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{glob_regex(p)})" for p in patterns))
+
+
+class IgnoreRules:
+    """
+    .gitignore semantics that matter for watching: comments, '!' negation,
+    trailing '/' for directories, patterns with a '/' anchored to the root,
+    the others matched at any depth. The last matching rule wins and files
+    inside an ignored directory stay ignored.
+    """
+    def __init__(self, patterns: list):
+        self.rules = []
+        for line in patterns:
+            line = line.rstrip("\n")
+            if not line.strip() or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            line = line[1:] if negate else line
+            line = line.rstrip()
+            dir_only = line.endswith("/")
+            line = line.strip("/") if dir_only else line
+            anchored = "/" in line
+            regex = glob_regex(line.lstrip("/"))
+            if not anchored:
+                regex = "(?:.*/)?" + regex
+            self.rules.append((re.compile(regex), negate, dir_only))
+
+    @classmethod
+    def for_project(cls, project_dir: str, extra: list = None) -> "IgnoreRules":
+        patterns = list(BASE_IGNORE)
+        try:
+            with open(os.path.join(project_dir, ".gitignore"), "r") as f:
+                patterns += f.readlines()
+        except OSError:
+            pass
+        return cls(patterns + list(extra or []))
+
+    def _match(self, rel_path: str, is_dir: bool) -> bool:
+        ignored = False
+        for regex, negate, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.fullmatch(rel_path):
+                ignored = not negate
+        return ignored
+
+    def is_ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        parts = rel_path.split("/")
+        for i in range(1, len(parts)):
+            if self._match("/".join(parts[:i]), True):
+                return True
+        return self._match(rel_path, is_dir)
+
+
+def _walk(root: str, rel_dir: str, ignore: IgnoreRules):
+    """
+    Yield (rel_dir, file names) for every directory below `rel_dir` that is
+    not ignored.
+    """
+    stack = [rel_dir]
+    while stack:
+        current = stack.pop()
+        files = []
+        try:
+            with os.scandir(os.path.join(root, current)) as it:
+                for entry in it:
+                    rel_path = f"{current}/{entry.name}" if current else entry.name
+                    try:
+                        is_dir = entry.is_dir(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if ignore.is_ignored(rel_path, is_dir):
+                        continue
+                    if is_dir:
+                        stack.append(rel_path)
+                    else:
+                        files.append(entry.name)
+        except OSError as e:
+            logger.debug(f"Cannot read {os.path.join(root, current)}: {e}")
+            continue
+        yield current, files
+
+
+class InotifyWatcher:
+    """
+    Recursive inotify watch of a project, skipping ignored directories.
+    Directories created later are watched as they appear.
+    """
+    def __init__(self, root: str, ignore: IgnoreRules):
+        self.root, self.ignore = root, ignore
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_init1 failed: {os.strerror(ctypes.get_errno())}")
+        self.dirs = {}  # watch descriptor -> directory relative to root
+        try:
+            self._add_tree("")
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _add_watch(self, rel_dir: str) -> None:
+        wd = self.libc.inotify_add_watch(self.fd, os.path.join(self.root, rel_dir).encode(), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                raise OSError(err, "inotify watch limit reached (fs.inotify.max_user_watches)")
+            logger.debug(f"Cannot watch {rel_dir or '.'}: {os.strerror(err)}")
+            return
+        self.dirs[wd] = rel_dir
+
+    def _add_tree(self, rel_dir: str) -> list:
+        """
+        Watch `rel_dir` and everything below it. Returns the files found, which
+        may have been written before the watch existed.
+        """
+        found = []
+        for current, files in _walk(self.root, rel_dir, self.ignore):
+            self._add_watch(current)
+            found.extend(f"{current}/{name}" if current else name for name in files)
+        return found
+
+    def read(self, timeout: float) -> set:
+        """
+        Changed paths (relative to the root) seen within `timeout` seconds.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changed, offset = set(), 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b"\0").decode(errors="surrogateescape")
+            offset += EVENT_HEADER.size + length
+
+            if mask & IN_Q_OVERFLOW:
+                logger.warning("inotify queue overflowed, treating everything as changed.")
+                changed.add(EVERYTHING)
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            if wd not in self.dirs or not name:
+                continue
+            rel_dir = self.dirs[wd]
+            rel_path = f"{rel_dir}/{name}" if rel_dir else name
+            is_dir = bool(mask & IN_ISDIR)
+            if self.ignore.is_ignored(rel_path, is_dir):
+                continue
+            if is_dir:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    try:
+                        changed.update(self._add_tree(rel_path))
+                    except OSError as e:
+                        logger.warning(f"Not watching new directory {rel_path}: {e}")
+                continue
+            changed.add(rel_path)
+        return changed
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """
+    Fallback for platforms without inotify (or when the watch limit is hit):
+    compares size and mtime of every non-ignored file.
+    """
+    def __init__(self, root: str, ignore: IgnoreRules):
+        self.root, self.ignore = root, ignore
+        self.snapshot = self._scan()
+
+    def _scan(self) -> dict:
+        snapshot = {}
+        for current, files in _walk(self.root, "", self.ignore):
+            for name in files:
+                rel_path = f"{current}/{name}" if current else name
+                try:
+                    st = os.stat(os.path.join(self.root, rel_path))
+                except OSError:
+                    continue
+                snapshot[rel_path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+    def read(self, timeout: float) -> set:
+        time.sleep(min(timeout, POLL_INTERVAL))
+        current = self._scan()
+        changed = {p for p in current.keys() | self.snapshot.keys() if current.get(p) != self.snapshot.get(p)}
+        self.snapshot = current
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+def open_watcher(root: str, ignore: IgnoreRules):
+    if sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(root, ignore)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"inotify unavailable ({e}), falling back to polling.")
+    return PollingWatcher(root, ignore)
+
+
+def next_batch(watcher, debounce: float = DEFAULT_DEBOUNCE, timeout: float = 0.5) -> set:
+    """
+    Wait up to `timeout` seconds for a change, then keep collecting until no
+    event arrived for `debounce` seconds, so a burst (save-all, git checkout,
+    formatter run) is handled once. Returns an empty set when nothing changed.
+    """
+    changed = watcher.read(timeout)
+    if not changed:
+        return changed
+    deadline = time.monotonic() + max(debounce * 20, 2.0)  # Never wait forever on a constant stream.
+    while time.monotonic() < deadline:
+        more = watcher.read(debounce)
+        if not more:
+            break
+        changed |= more
+    return changed
+
+
+def affected_tasks(tasks: dict, watched: dict, changed: set, matchers: dict) -> set:
+    """
+    Watched tasks whose inputs match a changed path, plus the watched tasks
+    that depend on them.
+    """
+    if EVERYTHING in changed:
+        return set(watched)
+    hit = {name for name in watched if matchers[name] and any(matchers[name].fullmatch(p) for p in changed)}
+    dependents = {name: [n for n in watched if name in watched[n]] for name in watched}
+    stack = list(hit)
+    while stack:
+        for dependent in dependents[stack.pop()]:
+            if dependent not in hit:
+                hit.add(dependent)
+                stack.append(dependent)
+    return hit
+
+
+class _Run:
+    """
+    A task run on a background thread that can be cancelled.
+    """
+    def __init__(self, target, names: set, **kwargs):
+        self.names = names
+        self.cancel = threading.Event()
+        self.results = []
+        self.thread = threading.Thread(target=self._run, args=(target, sorted(names)), kwargs=kwargs, daemon=True)
+        self.thread.start()
+
+    def _run(self, target, names, **kwargs):
+        try:
+            self.results = target(names=names, cancel=self.cancel, **kwargs)
+        except task_runner.TaskError as e:
+            logger.error(str(e))
+
+    def stop(self) -> None:
+        self.cancel.set()
+        self.thread.join()
+
+
+def watch_tasks(project_dir: str, requested: list = None, debounce: float = DEFAULT_DEBOUNCE, jobs: int = 4,
+                max_bytes: int = task_runner.DEFAULT_CACHE_MAX_BYTES, env: dict = None, on_result=None, on_change=None) -> None:
+    """
+    Run the requested tasks (all tasks when none are given), then rerun the
+    affected ones whenever their inputs change, until interrupted. A run still
+    in flight when new changes arrive is cancelled; tasks it did not finish are
+    run again with the next batch.
+    """
+    def load():
+        tasks = task_runner.load_tasks(project_dir)
+        watched = task_runner.resolve_order(tasks, list(requested or tasks))
+        matchers = {name: compile_patterns(tasks[name].get("inputs")) for name in watched}
+        outputs = [p for name in watched for p in tasks[name].get("outputs", [])]
+        # Outputs are written by the runs themselves and must not trigger new ones.
+        return tasks, watched, matchers, IgnoreRules.for_project(project_dir, outputs)
+
+    tasks, watched, matchers, ignore = load()
+    for name in watched:
+        if not matchers[name]:
+            logger.warning(f"Task '{name}' declares no inputs, it only runs when a dependency changes.")
+
+    def run(names, cancel):
+        return task_runner.run_tasks(project_dir, names, jobs=jobs, max_bytes=max_bytes, env=env, on_result=on_result, cancel=cancel)
+
+    watcher = open_watcher(project_dir, ignore)
+    dirty = set(watched)
+    current = _Run(run, dirty)
+    try:
+        while True:
+            changed = next_batch(watcher, debounce)
+            if current and not current.thread.is_alive():
+                dirty -= {r["task"] for r in current.results if r["status"] in ("ran", "cached")}
+                current = None
+            if not changed:
+                continue
+            reloaded = None
+            if "devCLI-project.json" in changed:
+                logger.info("devCLI-project.json changed, reloading tasks.")
+                try:
+                    reloaded = load()
+                except task_runner.TaskError as e:
+                    # Often a half-saved edit; the next save triggers another reload.
+                    logger.error(f"Keeping the previous tasks: {e}")
+            if reloaded:
+                tasks, watched, matchers, watcher.ignore = reloaded
+                # Tasks that were renamed or removed would make every later run fail with "Unknown task".
+                dirty &= set(watched)
+                hit = set(watched)
+            else:
+                hit = affected_tasks(tasks, watched, changed, matchers)
+            if not hit:
+                continue
+            if on_change:
+                on_change(sorted(changed), sorted(hit))
+            if current:
+                current.stop()
+                dirty -= {r["task"] for r in current.results if r["status"] in ("ran", "cached")}
+            dirty |= hit
+            current = _Run(run, set(dirty))
+    finally:
+        if current:
+            current.stop()
+        watcher.close()
+
+
+def watch_command(project_dir: str, command: str, env: dict = None, debounce: float = DEFAULT_DEBOUNCE, on_change=None) -> None:
+    """
+    Keep a long running command (a project's startup command) running and
+    restart it whenever a non-ignored file changes.
+    """
+    ignore = IgnoreRules.for_project(project_dir)
+    watcher = open_watcher(project_dir, ignore)
+
+    def launch():
+        return spawn(command, cwd=project_dir, env=env, shell=True, new_session=True)
+
+    process = launch()
+    try:
+        while True:
+            changed = next_batch(watcher, debounce)
+            if not changed:
+                continue
+            if on_change:
+                on_change(sorted(changed), [command])
+            if process.poll() is None:
+                terminate(process)
+            process = launch()
+    finally:
+        if process.poll() is None:
+            terminate(process)
+        watcher.close()
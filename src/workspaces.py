@@ -0,0 +1,237 @@
+import os, re, glob, json, logging
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11
+    tomllib = None
+
+from executor import execute
+
+logger = logging.getLogger(__name__)
+
+# Changes to these files at the workspace root affect every package.
+ROOT_WIDE_FILES = {
+    "package.json", "package-lock.json", "yarn.lock", "pnpm-lock.yaml", "pnpm-workspace.yaml",
+    "bun.lock", "bun.lockb", "pyproject.toml", "uv.lock",
+}
+NODE_DEPENDENCY_FIELDS = ["dependencies", "devDependencies", "peerDependencies", "optionalDependencies"]
+
+
+def _read_json(path: str) -> dict:
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.debug(f"Could not read {path}: {e}")
+        return {}
+
+
+def _read_toml(path: str) -> dict:
+    if not tomllib:
+        logger.warning(f"Cannot parse {path}: tomllib needs Python 3.11 or newer.")
+        return {}
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except (OSError, ValueError) as e:
+        logger.debug(f"Could not read {path}: {e}")
+        return {}
+
+
+def _pnpm_workspace_globs(path: str) -> list:
+    """
+    Read the `packages:` list of a pnpm-workspace.yaml. Only this list is
+    needed, so a tiny line parser avoids a YAML dependency.
+    """
+    globs, in_packages = [], False
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                stripped = line.split("#", 1)[0].rstrip()
+                if not stripped:
+                    continue
+                if not line[0].isspace():
+                    in_packages = stripped.startswith("packages:")
+                    continue
+                if in_packages and stripped.lstrip().startswith("-"):
+                    globs.append(stripped.lstrip()[1:].strip().strip("'\""))
+    except OSError as e:
+        logger.debug(f"Could not read {path}: {e}")
+    return globs
+
+
+def _expand_globs(root: str, patterns: list, manifest: str) -> list:
+    """
+    Package directories matched by workspace globs that contain `manifest`.
+    Patterns starting with '!' exclude directories.
+    """
+    included, excluded = set(), set()
+    for pattern in patterns:
+        target = excluded if pattern.startswith("!") else included
+        for path in glob.glob(os.path.join(root, pattern.lstrip("!"))):
+            if os.path.isfile(os.path.join(path, manifest)):
+                target.add(os.path.normpath(path))
+    return sorted(included - excluded)
+
+
+def _requirement_name(requirement: str) -> str:
+    return re.split(r"[\s\[<>=!~;@(]", requirement.strip(), 1)[0].lower().replace("_", "-")
+
+
+def detect_package_manager(root: str) -> str:
+    if any(os.path.exists(os.path.join(root, f)) for f in ["bun.lock", "bun.lockb"]):
+        return "bun"
+    if any(os.path.exists(os.path.join(root, f)) for f in ["pnpm-lock.yaml", "pnpm-workspace.yaml"]):
+        return "pnpm"
+    if os.path.exists(os.path.join(root, "yarn.lock")):
+        return "yarn"
+    if os.path.exists(os.path.join(root, "package.json")):
+        return "npm"
+    if os.path.exists(os.path.join(root, "pyproject.toml")):
+        return "uv"
+    return None
+
+
+def load_workspace(root: str):
+    """
+    Parse the workspace rooted at `root` into a package graph:
+
+        {"root": ..., "manager": "npm", "packages": {name: {"path", "rel", "deps"}}}
+
+    `deps` only holds dependencies on other packages of the same workspace.
+    Returns None when `root` is not a workspace.
+    """
+    root = os.path.abspath(root)
+    packages = {}
+
+    package_json = _read_json(os.path.join(root, "package.json")) if os.path.exists(os.path.join(root, "package.json")) else {}
+    node_globs = package_json.get("workspaces", [])
+    if isinstance(node_globs, dict):  # Yarn classic: {"packages": [...], "nohoist": [...]}
+        node_globs = node_globs.get("packages", [])
+    if os.path.exists(os.path.join(root, "pnpm-workspace.yaml")):
+        node_globs = list(node_globs) + _pnpm_workspace_globs(os.path.join(root, "pnpm-workspace.yaml"))
+
+    for path in _expand_globs(root, node_globs, "package.json"):
+        manifest = _read_json(os.path.join(path, "package.json"))
+        name = manifest.get("name") or os.path.basename(path)
+        deps = set()
+        for field in NODE_DEPENDENCY_FIELDS:
+            deps.update((manifest.get(field) or {}).keys())
+        packages[name] = {"path": path, "rel": os.path.relpath(path, root), "deps": deps, "kind": "node", "scripts": manifest.get("scripts", {})}
+
+    if os.path.exists(os.path.join(root, "pyproject.toml")):
+        uv_workspace = _read_toml(os.path.join(root, "pyproject.toml")).get("tool", {}).get("uv", {}).get("workspace", {})
+        members = list(uv_workspace.get("members", [])) + [f"!{p}" for p in uv_workspace.get("exclude", [])]
+        for path in _expand_globs(root, members, "pyproject.toml"):
+            project = _read_toml(os.path.join(path, "pyproject.toml")).get("project", {})
+            name = (project.get("name") or os.path.basename(path)).lower().replace("_", "-")
+            deps = {_requirement_name(r) for r in project.get("dependencies", [])}
+            packages[name] = {"path": path, "rel": os.path.relpath(path, root), "deps": deps, "kind": "python", "scripts": {}}
+
+    if not packages:
+        return None
+
+    for package in packages.values():
+        package["deps"] = sorted(d for d in package["deps"] if d in packages)
+    return {"root": root, "manager": detect_package_manager(root), "packages": packages}
+
+
+def changed_files(root: str, since: str, merge_base: bool = True) -> list:
+    """
+    Files changed relative to `since`: committed and uncommitted changes to
+    tracked files plus untracked files, relative to `root`. With
+    `merge_base`, commits are compared from where HEAD forked off `since`, so
+    changes made only on `since` (upstream) do not count. Raises
+    CommandError when git fails.
+    """
+    base = since
+    if merge_base:
+        base = execute(["git", "merge-base", since, "HEAD"], cwd=root, capture=True, check=True).stdout.strip()
+    # Against the working tree: committed changes since `base` plus uncommitted ones. Without
+    # rename detection, a file moved between packages counts for both.
+    diff = execute(["git", "diff", "--name-only", "--no-renames", "--relative", base], cwd=root, capture=True, check=True).stdout.splitlines()
+    untracked = execute(["git", "ls-files", "--others", "--exclude-standard"], cwd=root, capture=True, check=True).stdout.splitlines()
+    return sorted(set(diff + untracked))
+
+
+def reverse_dependencies(workspace: dict) -> dict:
+    dependents = {name: [] for name in workspace["packages"]}
+    for name, package in workspace["packages"].items():
+        for dep in package["deps"]:
+            dependents[dep].append(name)
+    return dependents
+
+
+def topological_order(workspace: dict, names) -> list:
+    """
+    Order packages so dependencies come before their dependents.
+    """
+    names, ordered, seen = set(names), [], set()
+
+    def visit(name, stack=()):
+        if name in seen or name in stack:
+            return
+        for dep in workspace["packages"][name]["deps"]:
+            if dep in names:
+                visit(dep, stack + (name,))
+        seen.add(name)
+        ordered.append(name)
+
+    for name in sorted(names):
+        visit(name)
+    return ordered
+
+
+def affected_packages(workspace: dict, files: list) -> dict:
+    """
+    Packages touched by `files` plus everything that depends on them.
+    Returns {package name: reason}, in dependency order.
+    """
+    reasons = {}
+    packages = workspace["packages"]
+    if any("/" not in f and f in ROOT_WIDE_FILES for f in files):
+        return {name: "workspace root changed" for name in topological_order(workspace, packages)}
+
+    for name, package in packages.items():
+        prefix = package["rel"].replace(os.sep, "/").rstrip("/") + "/"
+        if any(f.startswith(prefix) for f in files):
+            reasons[name] = "changed"
+
+    dependents = reverse_dependencies(workspace)
+    queue = list(reasons)
+    while queue:
+        current = queue.pop(0)
+        for dependent in dependents[current]:
+            if dependent not in reasons:
+                reasons[dependent] = f"depends on {current}"
+                queue.append(dependent)
+    return {name: reasons[name] for name in topological_order(workspace, reasons)}
+
+
+def affected_since(root: str, since: str, merge_base: bool = True):
+    """
+    Convenience wrapper: (workspace, {name: reason}) or (None, {}) when `root`
+    is not a workspace. See changed_files() for `merge_base`.
+    """
+    workspace = load_workspace(root)
+    if not workspace:
+        return None, {}
+    return workspace, affected_packages(workspace, changed_files(root, since, merge_base))
+
+
+def install_command(manager: str, package_name: str = None) -> list:
+    """
+    Install command for a whole workspace or, with `package_name`, only the
+    dependencies of one package.
+    """
+    if manager == "npm":
+        return ["npm", "install"] + (["--workspace", package_name] if package_name else [])
+    if manager == "pnpm":
+        return ["pnpm", "install"] + (["--filter", f"{package_name}..."] if package_name else [])
+    if manager == "yarn":
+        return ["yarn", "workspaces", "focus", package_name] if package_name else ["yarn", "install"]
+    if manager == "bun":
+        return ["bun", "install"] + (["--filter", package_name] if package_name else [])
+    if manager == "uv":
+        return ["uv", "sync"] + (["--package", package_name] if package_name else [])
+    return None
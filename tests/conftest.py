@@ -0,0 +1,4 @@
+import os, sys
+
+CLI_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(CLI_ROOT_DIR, "src"))
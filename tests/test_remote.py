@@ -0,0 +1,165 @@
+import sys, subprocess
+import pytest
+
+import gitsync
+import remote
+from remote import Remote, RemoteError
+
+
+@pytest.fixture(autouse=True)
+def no_forced_transport(monkeypatch):
+    monkeypatch.delenv(remote.TRANSPORT_ENV, raising=False)
+
+
+def test_parse_host_string():
+    host = remote.parse_host("me@devbox:/srv/projects/api", "/tmp/api")
+    assert host == Remote(host="devbox", path="/srv/projects/api", user="me", transport="ssh")
+    assert host.describe() == "me@devbox:/srv/projects/api"
+
+
+def test_parse_host_string_without_path_uses_same_place_under_home(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    host = remote.parse_host("devbox", str(tmp_path / "code" / "api"))
+    assert (host.host, host.user, host.path) == ("devbox", None, "~/code/api")
+
+
+def test_parse_host_object():
+    host = remote.parse_host({"name": "devbox", "user": "me", "port": "2222", "path": "~/api",
+                              "identityFile": "~/.ssh/devbox", "transport": "local"}, "/tmp/api")
+    assert host == Remote(host="devbox", path="~/api", user="me", port=2222, identity_file="~/.ssh/devbox",
+                          transport="local")
+
+
+def test_parse_host_transport_env_wins(monkeypatch):
+    monkeypatch.setenv(remote.TRANSPORT_ENV, "local")
+    assert remote.parse_host({"name": "devbox", "transport": "ssh"}, "/tmp/api").transport == "local"
+
+
+@pytest.mark.parametrize("spec", [
+    {"name": "devbox", "port": "ssh"},
+    {"name": "devbox", "transport": "telnet"},
+    {"user": "me"},
+    "",
+    42,
+])
+def test_parse_host_invalid(spec):
+    with pytest.raises(RemoteError):
+        remote.parse_host(spec, "/tmp/api")
+
+
+def test_script_quotes_home_path_and_env():
+    host = Remote(host="devbox", path="~/path with space")
+    assert remote._cd(host.path) == "cd \"$HOME\"/'path with space'"
+    assert remote.script(host, "npm run dev", {"PORT": 3000, "NAME": "a b"}) == (
+        "export PORT=3000; export NAME='a b'; cd \"$HOME\"/'path with space' && npm run dev")
+
+
+def test_cd_home_and_absolute_paths():
+    assert remote._cd("~") == 'cd "$HOME"'
+    assert remote._cd("/srv/my api") == "cd '/srv/my api'"
+
+
+def test_run_local_transport_in_path_with_space(monkeypatch, tmp_path):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    (tmp_path / "path with space").mkdir()
+    host = Remote(host="devbox", path="~/path with space", transport="local")
+    result = remote.run(host, 'pwd && echo "$GREETING"', env={"GREETING": "it's me"}, capture=True)
+    assert result.ok
+    assert result.stdout.splitlines() == [str(tmp_path / "path with space"), "it's me"]
+
+
+@pytest.mark.skipif(sys.platform.startswith("win"), reason="OpenSSH for Windows has no ControlMaster")
+def test_ssh_argv_multiplexes_connections(monkeypatch, tmp_path):
+    monkeypatch.setattr(remote, "CONTROL_DIR", str(tmp_path / "ssh"))
+    monkeypatch.setattr(remote, "load_config", lambda: {"sshControlPersist": "5m"})
+    monkeypatch.delenv("SSH_PATH", raising=False)
+    host = Remote(host="devbox", path="~/api", user="me", port=2222, identity_file="/keys/devbox")
+    argv = remote.ssh_argv(host, "cd ~/api && ls", tty=False)
+    assert argv[0] == "ssh"
+    options = [argv[i + 1] for i, arg in enumerate(argv) if arg == "-o"]
+    assert options == ["ControlMaster=auto", f"ControlPath={tmp_path / 'ssh' / '%C'}", "ControlPersist=5m"]
+    assert (tmp_path / "ssh").is_dir()
+    assert argv[-5:] == ["-i", "/keys/devbox", "-T", "me@devbox", "cd ~/api && ls"]
+    assert argv[argv.index("-p") + 1] == "2222"
+    assert "-tt" in remote.ssh_argv(host, "ls", tty=True)
+
+
+@pytest.fixture
+def clone(monkeypatch, tmp_path):
+    """
+    A clone of a one-commit upstream repository, reached with the local transport.
+    """
+    for key in ("GIT_AUTHOR_NAME", "GIT_COMMITTER_NAME"):
+        monkeypatch.setenv(key, "devcli")
+    for key in ("GIT_AUTHOR_EMAIL", "GIT_COMMITTER_EMAIL"):
+        monkeypatch.setenv(key, "devcli@example.com")
+    monkeypatch.setenv(remote.TRANSPORT_ENV, "local")
+    upstream, checkout = tmp_path / "upstream", tmp_path / "checkout"
+    git(tmp_path, "init", "-q", "-b", "main", str(upstream))
+    commit(upstream, "README.md", "one")
+    git(tmp_path, "clone", "-q", str(upstream), str(checkout))
+    return upstream, checkout
+
+
+def git(cwd, *args) -> str:
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+def commit(repo, name, content) -> str:
+    (repo / name).write_text(content)
+    git(repo, "add", name)
+    git(repo, "commit", "-q", "-m", content)
+    return git(repo, "rev-parse", "HEAD")
+
+
+def test_update_up_to_date(clone):
+    _, checkout = clone
+    head = git(checkout, "rev-parse", "HEAD")
+    report = remote.update(remote.parse_host(f"devbox:{checkout}", str(checkout)), fetch_ttl=0)
+    assert report["status"] == gitsync.UP_TO_DATE
+    assert (report["branch"], report["target"], report["before"], report["after"]) == ("main", "origin/main", head, head)
+
+
+def test_update_fast_forwards(clone):
+    upstream, checkout = clone
+    before = git(checkout, "rev-parse", "HEAD")
+    after = commit(upstream, "README.md", "two")
+    report = remote.update(remote.parse_host(f"devbox:{checkout}", str(checkout)), fetch_ttl=0)
+    assert report["status"] == gitsync.UPDATED
+    assert (report["before"], report["after"], report["behind"]) == (before, after, 1)
+    assert git(checkout, "rev-parse", "HEAD") == after
+    assert gitsync.describe(report).startswith("fast-forwarded main")
+
+
+def test_update_leaves_dirty_checkout_alone(clone):
+    upstream, checkout = clone
+    before = git(checkout, "rev-parse", "HEAD")
+    commit(upstream, "README.md", "two")
+    (checkout / "README.md").write_text("local edit")
+    report = remote.update(remote.parse_host(f"devbox:{checkout}", str(checkout)), fetch_ttl=0)
+    assert report["status"] == gitsync.DIRTY
+    assert git(checkout, "rev-parse", "HEAD") == before
+    assert (checkout / "README.md").read_text() == "local edit"
+
+
+def test_update_reports_diverged(clone):
+    upstream, checkout = clone
+    commit(upstream, "README.md", "two")
+    commit(checkout, "local.txt", "mine")
+    report = remote.update(remote.parse_host(f"devbox:{checkout}", str(checkout)), fetch_ttl=0)
+    assert (report["status"], report["ahead"], report["behind"]) == (gitsync.DIVERGED, 1, 1)
+
+
+def test_update_reuses_recent_fetch(clone):
+    upstream, checkout = clone
+    host = remote.parse_host(f"devbox:{checkout}", str(checkout))
+    remote.update(host, fetch_ttl=0)
+    commit(upstream, "README.md", "two")
+    assert remote.update(host, fetch_ttl=3600)["status"] == gitsync.UP_TO_DATE
+    assert remote.update(host, fetch_ttl=0)["status"] == gitsync.UPDATED
+
+
+def test_update_missing_checkout_fails(clone, tmp_path):
+    report = remote.update(remote.parse_host(f"devbox:{tmp_path / 'missing'}", str(tmp_path)), fetch_ttl=0)
+    assert report["status"] == gitsync.FAILED
+    assert "missing" in report["error"]